@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+# Response headers kept with a cached body; everything else is dropped.
+CACHED_HEADERS = ("content-type", "etag", "last-modified", "link")
+
+CacheKey = tuple[str, str, tuple[tuple[str, str], ...], str]
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    stored_at: float
+    ttl_seconds: float
+
+    @property
+    def etag(self) -> str | None:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.headers.get("last-modified")
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.stored_at < self.ttl_seconds
+
+    def to_response(self) -> httpx.Response:
+        return httpx.Response(self.status_code, headers=self.headers, content=self.content)
+
+
+def parse_endpoint_ttls(raw: str) -> dict[str, float]:
+    """Parse ``"repos=60,pulls=30"`` into per-endpoint freshness windows (seconds, 0 allowed)."""
+    ttls: dict[str, float] = {}
+    for item in raw.split(","):
+        endpoint, _, seconds = item.partition("=")
+        try:
+            value = float(seconds)
+        except ValueError:
+            continue
+        if endpoint.strip() and value >= 0:
+            ttls[endpoint.strip()] = value
+    return ttls
+
+
+class ConditionalResponseCache:
+    """Bounded LRU of GitHub GET responses revalidated with ``ETag``/``Last-Modified``.
+
+    Entries are keyed by OAuth owner, path, query params and ``Accept`` so one
+    owner's data is never served to another. Within its endpoint TTL an entry
+    is served without a request; after that the caller revalidates it with
+    ``If-None-Match``/``If-Modified-Since`` and a ``304`` refreshes it.
+    GitHub does not count ``304`` responses against the rate limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1000,
+        default_ttl_seconds: float = 30.0,
+        endpoint_ttls: dict[str, float] | None = None,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._default_ttl_seconds = max(0.0, default_ttl_seconds)
+        self._endpoint_ttls = dict(endpoint_ttls or {})
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        self._hits = 0
+        self._revalidated = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(
+        oauth_owner: str,
+        path: str,
+        params: dict[str, Any] | None,
+        accept: str,
+    ) -> CacheKey:
+        normalized = tuple(sorted((str(name), str(value)) for name, value in (params or {}).items()))
+        return (oauth_owner.lower(), path, normalized, accept)
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self._endpoint_ttls.get(endpoint, self._default_ttl_seconds)
+
+    def lookup(self, key: CacheKey) -> CachedResponse | None:
+        """Return the entry for ``key`` (fresh or stale) and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def record_hit(self) -> None:
+        self._hits += 1
+
+    def record_miss(self) -> None:
+        self._misses += 1
+
+    def revalidate(self, key: CacheKey, entry: CachedResponse, response: httpx.Response) -> None:
+        """Handle a ``304`` for ``entry``: refresh its age and validators."""
+        for name in ("etag", "last-modified"):
+            if response.headers.get(name):
+                entry.headers[name] = response.headers[name]
+        entry.stored_at = time.monotonic()
+        # The entry may have been evicted while the request was in flight.
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._revalidated += 1
+        self._evict()
+
+    def store(self, key: CacheKey, response: httpx.Response, *, endpoint: str) -> None:
+        """Cache a ``200`` response that carries a validator; others are not cacheable."""
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        if response.status_code != 200 or not ("etag" in headers or "last-modified" in headers):
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = CachedResponse(
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+            stored_at=time.monotonic(),
+            ttl_seconds=self.ttl_for(endpoint),
+        )
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, path_prefix: str) -> int:
+        """Drop every entry, for any owner, whose path starts with ``path_prefix``."""
+        stale = [key for key in self._entries if key[1].startswith(path_prefix)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._hits + self._revalidated + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "revalidated": self._revalidated,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_ratio": round((self._hits + self._revalidated) / lookups, 4) if lookups else 0.0,
+        }
+
+
+PullKey = tuple[str, str, str, int]
+
+
+class PullDiffCache:
+    """Bounded LRU of pull request diffs, valid only for the revision they were fetched at.
+
+    The revision is the ``base...head`` SHA pair, which a push or a base
+    branch update changes, so a lookup with the current revision never
+    returns a stale diff. Keys include the OAuth owner, like the response cache.
+    """
+
+    def __init__(self, *, max_entries: int = 128) -> None:
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[PullKey, tuple[str, str]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(oauth_owner: str, owner: str, repo: str, pull_number: int) -> PullKey:
+        return (oauth_owner.lower(), owner.lower(), repo.lower(), pull_number)
+
+    def get(self, key: PullKey, revision: str | None) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None or not revision or entry[0] != revision:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[1]
+
+    def put(self, key: PullKey, revision: str, diff: str) -> None:
+        self._entries[key] = (revision, diff)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
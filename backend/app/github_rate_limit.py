@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from fastapi import HTTPException, status
+
+from .retry import RetryPolicy
+
+
+@dataclass
+class OwnerBudget:
+    """GitHub's last reported core rate limit for one OAuth owner."""
+
+    limit: int
+    remaining: int
+    reset_at: float
+    blocked_until: float = 0.0
+    next_slot: float = 0.0
+
+
+class GitHubRateLimiter:
+    """Per-OAuth-owner request scheduler driven by GitHub's rate-limit headers.
+
+    Every response updates the owner's budget from ``X-RateLimit-*``. While
+    ``remaining`` is below ``pace_below``, requests are spaced evenly until
+    the reset (a token bucket refilled at ``remaining / seconds_to_reset``);
+    at zero they wait for the reset. Secondary rate limits (``429`` or a
+    ``403`` with ``Retry-After`` or a "secondary rate limit" message) block
+    the owner for ``Retry-After`` or an exponential backoff and are retried.
+    Waits longer than ``max_wait_seconds`` fail fast with ``429`` instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        pace_below: int = 100,
+        max_wait_seconds: float = 60.0,
+        max_retries: int = 3,
+        backoff: RetryPolicy | None = None,
+    ) -> None:
+        self._pace_below = max(0, pace_below)
+        self._max_wait_seconds = max(0.0, max_wait_seconds)
+        self.max_retries = max(0, max_retries)
+        # Used only when GitHub sends neither Retry-After nor an exhausted budget;
+        # kept short because the caller is usually waiting on an HTTP response.
+        self._backoff = backoff or RetryPolicy(base_seconds=2.0, max_seconds=30.0, jitter=False)
+        self._budgets: dict[str, OwnerBudget] = {}
+        self._throttled = 0
+        self._throttled_seconds = 0.0
+        self._retries = 0
+        self._rejected = 0
+
+    @staticmethod
+    def _owner_key(oauth_owner: str) -> str:
+        return oauth_owner.lower()
+
+    def _reject(self, delay: float) -> HTTPException:
+        self._rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"GitHub rate limit exhausted for this owner; retry in {math.ceil(delay)} seconds.",
+            headers={"Retry-After": str(math.ceil(delay))},
+        )
+
+    def _reserve(self, oauth_owner: str, now: float) -> float:
+        """Claim the next request slot for ``oauth_owner``; returns seconds to wait."""
+        budget = self._budgets.get(self._owner_key(oauth_owner))
+        if budget is None:
+            return 0.0
+        if budget.reset_at <= now:
+            budget.remaining = max(budget.remaining, budget.limit)
+        start = max(now, budget.blocked_until)
+        interval = 0.0
+        if budget.remaining <= 0:
+            start = max(start, budget.reset_at)
+        elif budget.remaining < self._pace_below:
+            interval = max(0.0, budget.reset_at - now) / budget.remaining
+            start = max(start, budget.next_slot)
+        delay = start - now
+        if delay > self._max_wait_seconds:
+            raise self._reject(delay)
+        if interval:
+            budget.next_slot = start + interval
+        # Count the request against the budget until GitHub reports the real
+        # figure. An exhausted budget goes negative rather than refilling early,
+        # so every caller queues behind ``reset_at`` until the reset has passed.
+        budget.remaining -= 1
+        return delay
+
+    async def acquire(self, oauth_owner: str) -> None:
+        delay = self._reserve(oauth_owner, time.time())
+        if delay > 0:
+            self._throttled += 1
+            self._throttled_seconds += delay
+            await asyncio.sleep(delay)
+
+    def update(self, oauth_owner: str, response: httpx.Response) -> None:
+        headers = response.headers
+        resource = headers.get("x-ratelimit-resource", "core")
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_at = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        if resource != "core":
+            return
+        key = self._owner_key(oauth_owner)
+        budget = self._budgets.get(key)
+        if budget is None:
+            self._budgets[key] = OwnerBudget(limit=limit, remaining=remaining, reset_at=reset_at)
+            return
+        budget.limit = limit
+        budget.remaining = remaining
+        budget.reset_at = reset_at
+
+    @staticmethod
+    def _is_secondary_limit(response: httpx.Response) -> bool:
+        try:
+            payload = response.json()
+        except ValueError:
+            return False
+        message = payload.get("message") if isinstance(payload, dict) else None
+        return isinstance(message, str) and "secondary rate limit" in message.lower()
+
+    def should_retry(self, oauth_owner: str, response: httpx.Response, attempt: int) -> bool:
+        """Decide whether a ``403``/``429`` was rate limiting worth retrying.
+
+        Blocks the owner until the retry is due, so concurrent requests for the
+        same owner also hold off; the next ``acquire`` performs the wait.
+        """
+        if response.status_code not in {403, 429}:
+            return False
+        now = time.time()
+        headers = response.headers
+        retry_after = headers.get("retry-after", "").strip()
+        if retry_after.isdigit():
+            delay = float(retry_after)
+        elif headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset", "").isdigit():
+            delay = max(0.0, float(headers["x-ratelimit-reset"]) - now)
+        elif response.status_code == 429 or self._is_secondary_limit(response):
+            delay = self._backoff.delay_seconds(attempt + 1)
+        else:
+            return False
+        key = self._owner_key(oauth_owner)
+        budget = self._budgets.setdefault(key, OwnerBudget(limit=0, remaining=0, reset_at=now + delay))
+        budget.blocked_until = max(budget.blocked_until, now + delay)
+        if attempt >= self.max_retries or delay > self._max_wait_seconds:
+            return False
+        self._retries += 1
+        return True
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.time()
+        owners = {
+            owner: {
+                "limit": budget.limit,
+                "remaining": max(0, budget.remaining),
+                "reset_in_seconds": max(0, math.ceil(budget.reset_at - now)),
+                "blocked_for_seconds": max(0, math.ceil(budget.blocked_until - now)),
+            }
+            for owner, budget in sorted(self._budgets.items())
+        }
+        return {
+            "owners": owners,
+            "throttled_requests": self._throttled,
+            "throttled_seconds": round(self._throttled_seconds, 3),
+            "retries": self._retries,
+            "rejected": self._rejected,
+        }
+
+    def health(self) -> dict[str, Any]:
+        """Aggregate budget without owner names, for the unauthenticated ``/health``."""
+        now = time.time()
+        remaining = [budget.remaining for budget in self._budgets.values() if budget.reset_at > now]
+        return {
+            "tracked_owners": len(self._budgets),
+            "lowest_remaining": max(0, min(remaining)) if remaining else None,
+            "exhausted_owners": sum(1 for value in remaining if value <= 0),
+        }
@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import math
 import secrets
 import time
 from dataclasses import dataclass
-from typing import Any
-from urllib.parse import urlencode
+from typing import Any, AsyncIterator, Callable
+from urllib.parse import parse_qs, urlencode, urlsplit
 
 import httpx
 from fastapi import HTTPException, status
 
+from .github_cache import ConditionalResponseCache, PullDiffCache
+from .github_rate_limit import GitHubRateLimiter
 from .security import AuditLogger
-from .vault import LocalVault
+from .vault import AsyncVault
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+LOGGER = logging.getLogger("gitvibedev.github_service")
 
 
 @dataclass(frozen=True)
@@ -24,7 +38,28 @@ class GitHubConfig:
     oauth_token_url: str = "https://github.com/login/oauth/access_token"
 
 
+@dataclass(frozen=True)
+class GitHubHTTPConfig:
+    """Connection pool settings for the shared GitHub HTTP client."""
+
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = False
+
+
+@dataclass(frozen=True)
+class GitHubPage:
+    """One page of a GitHub list endpoint and its ``Link`` header positions."""
+
+    items: list[Any]
+    page: int
+    next_page: int | None
+    last_page: int | None
+
+
 class GitHubService:
+    MAX_PER_PAGE = 100
     OAUTH_STATE_PREFIX = "github_oauth_state::"
     OAUTH_STATE_TTL_SECONDS = 600
 
@@ -32,14 +67,113 @@ class GitHubService:
         self,
         *,
         config: GitHubConfig,
-        vault: LocalVault,
+        vault: AsyncVault,
         audit_logger: AuditLogger,
         timeout_seconds: float = 12.0,
+        http_config: GitHubHTTPConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        response_cache: ConditionalResponseCache | None = None,
+        page_concurrency: int = 1,
+        rate_limiter: GitHubRateLimiter | None = None,
+        diff_cache: PullDiffCache | None = None,
     ) -> None:
         self._config = config
         self._vault = vault
         self._audit_logger = audit_logger
         self._timeout_seconds = timeout_seconds
+        self._http_config = http_config or GitHubHTTPConfig()
+        self._transport = transport
+        self._http2 = self._http_config.http2 and HTTP2_AVAILABLE
+        if self._http_config.http2 and not HTTP2_AVAILABLE:
+            LOGGER.warning("GITHUB_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1.")
+        self._client: httpx.AsyncClient | None = None
+        self._cache = response_cache
+        self._page_concurrency = max(1, page_concurrency)
+        self._rate_limiter = rate_limiter or GitHubRateLimiter()
+        self._diff_cache = diff_cache
+        self._requests = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._connections_opened = 0
+        self._tls_handshakes = 0
+
+    async def start(self) -> None:
+        """Open the shared HTTP client; requests made before start() open it lazily."""
+        self._http_client()
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self._http_config.max_connections,
+                max_keepalive_connections=self._http_config.max_keepalive_connections,
+                keepalive_expiry=self._http_config.keepalive_expiry_seconds,
+            )
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout_seconds,
+                limits=limits,
+                http2=self._http2,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self._tls_handshakes += 1
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        client = self._http_client()
+        self._requests += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            return await client.request(method, url, extensions={"trace": self._trace}, **kwargs)
+        finally:
+            self._in_flight -= 1
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Request and connection counters for sizing the shared pool.
+
+        ``connections_opened`` counts TCP handshakes since startup; with a
+        healthy keep-alive pool it stays far below ``requests``.
+        """
+        pool = getattr(self._transport or getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "started": self._client is not None,
+            "http2": self._http2,
+            "max_connections": self._http_config.max_connections,
+            "max_keepalive_connections": self._http_config.max_keepalive_connections,
+            "keepalive_expiry_seconds": self._http_config.keepalive_expiry_seconds,
+            "requests": self._requests,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "connections_opened": self._connections_opened,
+            "tls_handshakes": self._tls_handshakes,
+            "open_connections": sum(1 for connection in connections if not connection.is_closed()),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "pool": self.pool_stats(),
+            "cache": self._cache.stats() if self._cache is not None else None,
+            "rate_limits": self._rate_limiter.snapshot(),
+            "diff_cache": self._diff_cache.stats() if self._diff_cache is not None else None,
+        }
+
+    def rate_limit_health(self) -> dict[str, Any]:
+        return self._rate_limiter.health()
+
+    def _invalidate_cache(self, path_prefix: str) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(path_prefix)
 
     @property
     def oauth_ready(self) -> bool:
@@ -89,21 +223,55 @@ class GitHubService:
         params: dict[str, Any] | None = None,
         json_body: dict[str, Any] | None = None,
         accept: str = "application/vnd.github+json",
+        cache_endpoint: str | None = None,
     ) -> httpx.Response:
-        access_token = self.get_access_token(oauth_owner)
+        """Call the GitHub REST API as ``oauth_owner``.
+
+        GETs that name a ``cache_endpoint`` go through the conditional response
+        cache: fresh entries are served locally, stale ones are revalidated
+        and a ``304`` is answered from the cache. Requests are paced by the
+        owner's rate-limit budget and secondary rate limits are retried.
+        """
+        # Resolved first so a revoked or removed owner is never served cached data.
+        access_token = await self.get_access_token(oauth_owner)
+        cache_key = None
+        cached = None
+        if self._cache is not None and cache_endpoint and method == "GET":
+            cache_key = self._cache.key(oauth_owner, path, params, accept)
+            cached = self._cache.lookup(cache_key)
+            if cached is not None and cached.is_fresh(time.monotonic()):
+                self._cache.record_hit()
+                return cached.to_response()
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Accept": accept,
             "X-GitHub-Api-Version": "2022-11-28",
         }
-        async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-            response = await client.request(
-                method=method,
-                url=f"{self._config.api_base_url.rstrip('/')}{path}",
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            elif cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        attempt = 0
+        while True:
+            await self._rate_limiter.acquire(oauth_owner)
+            response = await self._send(
+                method,
+                f"{self._config.api_base_url.rstrip('/')}{path}",
                 params=params,
                 json=json_body,
                 headers=headers,
             )
+            self._rate_limiter.update(oauth_owner, response)
+            if not self._rate_limiter.should_retry(oauth_owner, response, attempt):
+                break
+            attempt += 1
+        if cache_key is not None and self._cache is not None and cache_endpoint:
+            if response.status_code == 304 and cached is not None:
+                self._cache.revalidate(cache_key, cached, response)
+                return cached.to_response()
+            self._cache.record_miss()
+            self._cache.store(cache_key, response, endpoint=cache_endpoint)
         if response.status_code >= 400:
             detail = self._describe_github_error(response)
             raise HTTPException(
@@ -120,6 +288,7 @@ class GitHubService:
         oauth_owner: str,
         params: dict[str, Any] | None = None,
         json_body: dict[str, Any] | None = None,
+        cache_endpoint: str | None = None,
     ) -> Any:
         response = await self._github_api_request(
             method,
@@ -127,7 +296,12 @@ class GitHubService:
             oauth_owner=oauth_owner,
             params=params,
             json_body=json_body,
+            cache_endpoint=cache_endpoint,
         )
+        return self._decode_json(response)
+
+    @staticmethod
+    def _decode_json(response: httpx.Response) -> Any:
         try:
             return response.json()
         except ValueError as exc:
@@ -136,7 +310,141 @@ class GitHubService:
                 detail="GitHub API returned invalid JSON.",
             ) from exc
 
-    def create_oauth_start(
+    @staticmethod
+    def _parse_link_header(value: str | None) -> dict[str, str]:
+        """Map ``rel`` names to URLs from an RFC 8288 ``Link`` header."""
+        links: dict[str, str] = {}
+        for part in (value or "").split(","):
+            target, *attributes = part.split(";")
+            url = target.strip().removeprefix("<").removesuffix(">")
+            for attribute in attributes:
+                name, _, rel = attribute.strip().partition("=")
+                if name.strip() == "rel" and url:
+                    for rel_name in rel.strip().strip('"').split():
+                        links[rel_name] = url
+        return links
+
+    @staticmethod
+    def _link_page(links: dict[str, str], rel: str) -> int | None:
+        values = parse_qs(urlsplit(links.get(rel, "")).query).get("page", [])
+        return int(values[0]) if values and values[0].isdigit() else None
+
+    async def _fetch_page(
+        self,
+        path: str,
+        *,
+        oauth_owner: str,
+        params: dict[str, Any],
+        page: int,
+        description: str,
+        cache_endpoint: str | None,
+    ) -> GitHubPage:
+        response = await self._github_api_request(
+            "GET",
+            path,
+            oauth_owner=oauth_owner,
+            params={**params, "page": page},
+            cache_endpoint=cache_endpoint,
+        )
+        items = self._decode_json(response)
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Unexpected {description} payload from GitHub.",
+            )
+        links = self._parse_link_header(response.headers.get("link"))
+        return GitHubPage(
+            items=items,
+            page=page,
+            next_page=self._link_page(links, "next"),
+            last_page=self._link_page(links, "last"),
+        )
+
+    async def iter_pages(
+        self,
+        path: str,
+        *,
+        oauth_owner: str,
+        params: dict[str, Any] | None = None,
+        per_page: int = MAX_PER_PAGE,
+        start_page: int = 1,
+        max_pages: int | None = None,
+        concurrency: int | None = None,
+        description: str = "list",
+        cache_endpoint: str | None = None,
+    ) -> AsyncIterator[GitHubPage]:
+        """Stream the pages of a GitHub list endpoint by following ``Link: rel=next``.
+
+        Once the first response names the ``last`` page, up to ``concurrency``
+        following pages are fetched at a time; pages are always yielded in order.
+        """
+        base_params = {**(params or {}), "per_page": min(self.MAX_PER_PAGE, max(1, per_page))}
+        window = max(1, concurrency or self._page_concurrency)
+        stop_page = start_page + max_pages - 1 if max_pages is not None else None
+
+        async def fetch(page: int) -> GitHubPage:
+            return await self._fetch_page(
+                path,
+                oauth_owner=oauth_owner,
+                params=base_params,
+                page=page,
+                description=description,
+                cache_endpoint=cache_endpoint,
+            )
+
+        current = await fetch(start_page)
+        yield current
+        while current.next_page is not None and (stop_page is None or current.next_page <= stop_page):
+            if window > 1 and current.last_page is not None:
+                last = current.last_page if stop_page is None else min(current.last_page, stop_page)
+                numbers = range(current.next_page, min(last, current.next_page + window - 1) + 1)
+                pages = await asyncio.gather(*(fetch(number) for number in numbers))
+            else:
+                pages = [await fetch(current.next_page)]
+            for current in pages:
+                yield current
+
+    async def _collect(
+        self,
+        path: str,
+        *,
+        oauth_owner: str,
+        params: dict[str, Any],
+        limit: int,
+        description: str,
+        cache_endpoint: str,
+        convert: Callable[[Any], dict[str, Any] | None],
+        filtered: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Gather up to ``limit`` converted items across as many pages as needed.
+
+        ``filtered`` endpoints drop some items, so the page count cannot be
+        bounded up front.
+        """
+        per_page = min(self.MAX_PER_PAGE, limit)
+        pages = self.iter_pages(
+            path,
+            oauth_owner=oauth_owner,
+            params=params,
+            per_page=per_page,
+            max_pages=None if filtered else math.ceil(limit / per_page),
+            description=description,
+            cache_endpoint=cache_endpoint,
+        )
+        results: list[dict[str, Any]] = []
+        try:
+            async for page in pages:
+                for item in page.items:
+                    converted = convert(item)
+                    if converted is not None:
+                        results.append(converted)
+                    if len(results) >= limit:
+                        return results
+        finally:
+            await pages.aclose()
+        return results
+
+    async def create_oauth_start(
         self,
         *,
         redirect_uri: str | None,
@@ -152,13 +460,14 @@ class GitHubService:
             )
         state = secrets.token_urlsafe(24)
         expires_at = int(time.time()) + self.OAUTH_STATE_TTL_SECONDS
-        self._vault.set(
+        await self._vault.aset(
             self._state_vault_key(state),
             {
                 "expires_at": expires_at,
                 "owner_hint": owner_hint.lower(),
                 "redirect_uri": resolved_redirect_uri,
             },
+            ttl_seconds=self.OAUTH_STATE_TTL_SECONDS,
         )
         query = urlencode(
             {
@@ -175,10 +484,11 @@ class GitHubService:
             "expires_at": expires_at,
         }
 
-    def _consume_oauth_state(self, *, state: str, redirect_uri: str | None) -> dict[str, Any]:
+    async def _consume_oauth_state(
+        self, *, state: str, redirect_uri: str | None
+    ) -> dict[str, Any]:
         key = self._state_vault_key(state)
-        raw = self._vault.get(key)
-        self._vault.delete(key)
+        raw = await self._vault.atransaction(lambda txn: txn.pop(key))
         if not isinstance(raw, dict):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -208,12 +518,12 @@ class GitHubService:
         }
         if redirect_uri:
             payload["redirect_uri"] = redirect_uri
-        async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-            response = await client.post(
-                self._config.oauth_token_url,
-                data=payload,
-                headers={"Accept": "application/json"},
-            )
+        response = await self._send(
+            "POST",
+            self._config.oauth_token_url,
+            data=payload,
+            headers={"Accept": "application/json"},
+        )
         if response.status_code >= 400:
             detail = self._describe_github_error(response)
             raise HTTPException(
@@ -247,11 +557,11 @@ class GitHubService:
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
-        async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-            response = await client.get(
-                f"{self._config.api_base_url.rstrip('/')}/user",
-                headers=headers,
-            )
+        response = await self._send(
+            "GET",
+            f"{self._config.api_base_url.rstrip('/')}/user",
+            headers=headers,
+        )
         if response.status_code >= 400:
             detail = self._describe_github_error(response)
             raise HTTPException(
@@ -266,7 +576,7 @@ class GitHubService:
             )
         return payload
 
-    def _store_token(
+    async def _store_token(
         self,
         *,
         owner: str,
@@ -274,7 +584,7 @@ class GitHubService:
         scopes: list[str],
         token_type: str,
     ) -> None:
-        self._vault.set(
+        await self._vault.aset(
             self.oauth_vault_key(owner),
             {
                 "provider": "github",
@@ -290,7 +600,7 @@ class GitHubService:
         self, *, code: str, state: str, redirect_uri: str | None
     ) -> dict[str, Any]:
         self._require_oauth_ready()
-        state_payload = self._consume_oauth_state(state=state, redirect_uri=redirect_uri)
+        state_payload = await self._consume_oauth_state(state=state, redirect_uri=redirect_uri)
         resolved_redirect_uri = redirect_uri or str(state_payload.get("redirect_uri", ""))
         token_payload = await self._exchange_oauth_code(
             code=code,
@@ -301,7 +611,7 @@ class GitHubService:
         owner = str(user_payload["login"]).lower()
         scopes = self._parse_scopes(token_payload.get("scope"))
         token_type = str(token_payload.get("token_type", "bearer"))
-        self._store_token(
+        await self._store_token(
             owner=owner,
             access_token=access_token,
             scopes=scopes,
@@ -319,8 +629,8 @@ class GitHubService:
             "token_type": token_type,
         }
 
-    def get_access_token(self, oauth_owner: str) -> str:
-        raw = self._vault.get(self.oauth_vault_key(oauth_owner))
+    async def get_access_token(self, oauth_owner: str) -> str:
+        raw = await self._vault.aget(self.oauth_vault_key(oauth_owner))
         if not isinstance(raw, dict):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -334,8 +644,8 @@ class GitHubService:
             )
         return access_token
 
-    def oauth_metadata(self, oauth_owner: str) -> dict[str, Any]:
-        raw = self._vault.get(self.oauth_vault_key(oauth_owner))
+    async def oauth_metadata(self, oauth_owner: str) -> dict[str, Any]:
+        raw = await self._vault.aget(self.oauth_vault_key(oauth_owner))
         if not isinstance(raw, dict):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -349,35 +659,60 @@ class GitHubService:
             "updated_at": raw.get("updated_at"),
         }
 
+    @staticmethod
+    def _repository_summary(item: Any) -> dict[str, Any] | None:
+        if not isinstance(item, dict):
+            return None
+        owner_payload = item.get("owner")
+        return {
+            "id": item.get("id"),
+            "name": item.get("name"),
+            "full_name": item.get("full_name"),
+            "owner": owner_payload.get("login") if isinstance(owner_payload, dict) else "",
+            "private": bool(item.get("private", False)),
+            "default_branch": item.get("default_branch"),
+            "open_issues": item.get("open_issues_count", 0),
+        }
+
     async def list_repositories(self, *, oauth_owner: str, limit: int) -> list[dict[str, Any]]:
-        payload = await self._github_api_json(
-            "GET",
+        return await self._collect(
             "/user/repos",
             oauth_owner=oauth_owner,
-            params={"per_page": limit, "sort": "updated", "direction": "desc"},
+            params={"sort": "updated", "direction": "desc"},
+            limit=limit,
+            description="repository",
+            cache_endpoint="repos",
+            convert=self._repository_summary,
         )
-        if not isinstance(payload, list):
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unexpected repository payload from GitHub.",
-            )
-        repos: list[dict[str, Any]] = []
-        for item in payload:
-            if not isinstance(item, dict):
-                continue
-            owner_payload = item.get("owner")
-            repos.append(
-                {
-                    "id": item.get("id"),
-                    "name": item.get("name"),
-                    "full_name": item.get("full_name"),
-                    "owner": owner_payload.get("login") if isinstance(owner_payload, dict) else "",
-                    "private": bool(item.get("private", False)),
-                    "default_branch": item.get("default_branch"),
-                    "open_issues": item.get("open_issues_count", 0),
-                }
-            )
-        return repos
+
+    async def list_repositories_page(
+        self, *, oauth_owner: str, limit: int, page: int
+    ) -> dict[str, Any]:
+        """One page of repositories plus the next page number, for cursor pagination."""
+        result = await self._fetch_page(
+            "/user/repos",
+            oauth_owner=oauth_owner,
+            params={"sort": "updated", "direction": "desc", "per_page": min(self.MAX_PER_PAGE, limit)},
+            page=page,
+            description="repository",
+            cache_endpoint="repos",
+        )
+        repos = [repo for repo in map(self._repository_summary, result.items) if repo is not None]
+        return {"repos": repos, "next_page": result.next_page}
+
+    @staticmethod
+    def _pull_summary(item: Any) -> dict[str, Any] | None:
+        if not isinstance(item, dict):
+            return None
+        user_payload = item.get("user")
+        return {
+            "number": item.get("number"),
+            "title": item.get("title"),
+            "status": item.get("state"),
+            "author": user_payload.get("login") if isinstance(user_payload, dict) else "",
+            "html_url": item.get("html_url"),
+            "mergeable_state": item.get("mergeable_state"),
+        }
 
     async def list_pull_requests(
         self,
@@ -388,33 +723,34 @@ class GitHubService:
         limit: int,
         state_filter: str,
     ) -> list[dict[str, Any]]:
-        payload = await self._github_api_json(
-            "GET",
+        return await self._collect(
             f"/repos/{owner}/{repo}/pulls",
             oauth_owner=oauth_owner,
-            params={"state": state_filter, "per_page": limit},
+            params={"state": state_filter},
+            limit=limit,
+            description="pull request",
+            cache_endpoint="pulls",
+            convert=self._pull_summary,
         )
-        if not isinstance(payload, list):
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unexpected pull request payload from GitHub.",
-            )
-        pulls: list[dict[str, Any]] = []
-        for item in payload:
-            if not isinstance(item, dict):
-                continue
-            user_payload = item.get("user")
-            pulls.append(
-                {
-                    "number": item.get("number"),
-                    "title": item.get("title"),
-                    "status": item.get("state"),
-                    "author": user_payload.get("login") if isinstance(user_payload, dict) else "",
-                    "html_url": item.get("html_url"),
-                    "mergeable_state": item.get("mergeable_state"),
-                }
-            )
-        return pulls
+
+    @staticmethod
+    def _issue_summary(item: Any) -> dict[str, Any] | None:
+        # The issues endpoint also returns pull requests; those are skipped.
+        if not isinstance(item, dict) or "pull_request" in item:
+            return None
+        user_payload = item.get("user")
+        return {
+            "number": item.get("number"),
+            "title": item.get("title"),
+            "status": item.get("state"),
+            "author": user_payload.get("login") if isinstance(user_payload, dict) else "",
+            "labels": [
+                label.get("name")
+                for label in item.get("labels", [])
+                if isinstance(label, dict) and isinstance(label.get("name"), str)
+            ],
+            "html_url": item.get("html_url"),
+        }
 
     async def list_issues(
         self,
@@ -425,37 +761,16 @@ class GitHubService:
         limit: int,
         state_filter: str,
     ) -> list[dict[str, Any]]:
-        payload = await self._github_api_json(
-            "GET",
+        return await self._collect(
             f"/repos/{owner}/{repo}/issues",
             oauth_owner=oauth_owner,
-            params={"state": state_filter, "per_page": limit},
+            params={"state": state_filter},
+            limit=limit,
+            description="issue",
+            cache_endpoint="issues",
+            convert=self._issue_summary,
+            filtered=True,
         )
-        if not isinstance(payload, list):
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unexpected issue payload from GitHub.",
-            )
-        issues: list[dict[str, Any]] = []
-        for item in payload:
-            if not isinstance(item, dict) or "pull_request" in item:
-                continue
-            user_payload = item.get("user")
-            issues.append(
-                {
-                    "number": item.get("number"),
-                    "title": item.get("title"),
-                    "status": item.get("state"),
-                    "author": user_payload.get("login") if isinstance(user_payload, dict) else "",
-                    "labels": [
-                        label.get("name")
-                        for label in item.get("labels", [])
-                        if isinstance(label, dict) and isinstance(label.get("name"), str)
-                    ],
-                    "html_url": item.get("html_url"),
-                }
-            )
-        return issues
 
     async def merge_pull_request(
         self,
@@ -476,6 +791,8 @@ class GitHubService:
                 "commit_title": commit_title,
             },
         )
+        # Merging changes the pull list and can close linked issues.
+        self._invalidate_cache(f"/repos/{owner}/{repo}/")
         if not isinstance(payload, dict):
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
@@ -487,6 +804,17 @@ class GitHubService:
             "sha": payload.get("sha"),
         }
 
+    @staticmethod
+    def _collaborator_summary(item: Any) -> dict[str, Any] | None:
+        if not isinstance(item, dict):
+            return None
+        return {
+            "login": item.get("login"),
+            "id": item.get("id"),
+            "type": item.get("type"),
+            "permissions": item.get("permissions", {}),
+        }
+
     async def list_collaborators(
         self,
         *,
@@ -495,30 +823,15 @@ class GitHubService:
         oauth_owner: str,
         limit: int,
     ) -> list[dict[str, Any]]:
-        payload = await self._github_api_json(
-            "GET",
+        return await self._collect(
             f"/repos/{owner}/{repo}/collaborators",
             oauth_owner=oauth_owner,
-            params={"per_page": limit},
+            params={},
+            limit=limit,
+            description="collaborators",
+            cache_endpoint="collaborators",
+            convert=self._collaborator_summary,
         )
-        if not isinstance(payload, list):
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unexpected collaborators payload from GitHub.",
-            )
-        collaborators: list[dict[str, Any]] = []
-        for item in payload:
-            if not isinstance(item, dict):
-                continue
-            collaborators.append(
-                {
-                    "login": item.get("login"),
-                    "id": item.get("id"),
-                    "type": item.get("type"),
-                    "permissions": item.get("permissions", {}),
-                }
-            )
-        return collaborators
 
     async def add_collaborator(
         self,
@@ -535,6 +848,7 @@ class GitHubService:
             oauth_owner=oauth_owner,
             json_body={"permission": permission},
         )
+        self._invalidate_cache(f"/repos/{owner}/{repo}/collaborators")
         status_name = "invited" if response.status_code == 201 else "updated"
         return {"status": status_name, "username": username, "permission": permission}
 
@@ -551,6 +865,7 @@ class GitHubService:
             f"/repos/{owner}/{repo}/collaborators/{username}",
             oauth_owner=oauth_owner,
         )
+        self._invalidate_cache(f"/repos/{owner}/{repo}/collaborators")
         return {"status": "removed", "username": username}
 
     async def get_pull_review_context(
@@ -561,22 +876,44 @@ class GitHubService:
         pull_number: int,
         oauth_owner: str,
     ) -> dict[str, Any]:
+        """PR title, body and diff for an AI review.
+
+        The diff is fetched from ``compare/{base}...{head}`` at the SHAs named
+        by the PR JSON, so it cannot belong to a newer push and is cached
+        against that SHA pair. While both are unchanged a review costs only
+        the PR JSON, usually a cheap ``304``.
+        """
+        path = f"/repos/{owner}/{repo}/pulls/{pull_number}"
         pull_payload = await self._github_api_json(
             "GET",
-            f"/repos/{owner}/{repo}/pulls/{pull_number}",
+            path,
             oauth_owner=oauth_owner,
+            cache_endpoint="pull_detail",
         )
         if not isinstance(pull_payload, dict):
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Unexpected pull request payload from GitHub.",
             )
-        diff_response = await self._github_api_request(
-            "GET",
-            f"/repos/{owner}/{repo}/pulls/{pull_number}",
-            oauth_owner=oauth_owner,
-            accept="application/vnd.github.v3.diff",
-        )
+        head_sha = self._ref_sha(pull_payload, "head")
+        base_sha = self._ref_sha(pull_payload, "base")
+        revision = f"{base_sha}...{head_sha}" if base_sha and head_sha else None
+        diff_key = PullDiffCache.key(oauth_owner, owner, repo, pull_number)
+        diff = None
+        if self._diff_cache is not None and revision:
+            diff = self._diff_cache.get(diff_key, revision)
+        if diff is None:
+            # Without both SHAs fall back to the PR diff, which is never cached.
+            diff_path = f"/repos/{owner}/{repo}/compare/{revision}" if revision else path
+            response = await self._github_api_request(
+                "GET",
+                diff_path,
+                oauth_owner=oauth_owner,
+                accept="application/vnd.github.v3.diff",
+            )
+            diff = response.text
+            if self._diff_cache is not None and revision:
+                self._diff_cache.put(diff_key, revision, diff)
         return {
             "owner": owner,
             "repo": repo,
@@ -584,5 +921,12 @@ class GitHubService:
             "title": pull_payload.get("title", ""),
             "body": pull_payload.get("body", ""),
             "html_url": pull_payload.get("html_url", ""),
-            "diff": diff_response.text,
+            "head_sha": head_sha,
+            "diff": diff,
         }
+
+    @staticmethod
+    def _ref_sha(pull_payload: dict[str, Any], side: str) -> str | None:
+        ref = pull_payload.get(side)
+        sha = ref.get("sha") if isinstance(ref, dict) else None
+        return sha if isinstance(sha, str) and sha else None
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterable, Iterator
+
+LOGGER = logging.getLogger("gitvibedev.job_archive")
+
+
+class JobArchive:
+    """Append-only gzip JSON-lines archive of jobs removed by retention.
+
+    Each ``append`` adds one gzip member, which readers see as a single
+    concatenated stream. A sidecar ``<file>.idx`` maps every job id to the
+    byte offset and length of the member holding its newest record, so a
+    lookup decompresses only that member and an unknown id touches no file.
+    The index is kept in memory and rebuilt from the archive when the
+    sidecar is missing or does not cover the whole file.
+    """
+
+    INDEX_SUFFIX = ".idx"
+    READ_CHUNK_BYTES = 1 << 20
+
+    def __init__(self, file_path: str) -> None:
+        self._path = Path(file_path)
+        self._index_path = self._path.with_name(f"{self._path.name}{self.INDEX_SUFFIX}")
+        self._lock = Lock()
+        self._index: dict[str, tuple[int, int]] | None = None
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.chmod(self._path.parent, 0o700)
+        except PermissionError:
+            LOGGER.warning("Could not set job archive directory permissions to 0700.")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def size_bytes(self) -> int:
+        try:
+            return self._path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, jobs: Iterable[dict[str, Any]]) -> int:
+        """Archive ``jobs``; returns how many were written."""
+        jobs = list(jobs)
+        lines = [json.dumps(job, separators=(",", ":"), sort_keys=True) for job in jobs]
+        if not lines:
+            return 0
+        payload = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+        with self._lock:
+            index = self._index_unlocked()
+            with self._path.open("ab") as handle:
+                offset = handle.seek(0, os.SEEK_END)
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+            entries = {str(job["id"]): (offset, len(payload)) for job in jobs if job.get("id")}
+            index.update(entries)
+            # The sidecar is rebuildable, so a crash before this write only costs a rescan.
+            with self._index_path.open("a", encoding="utf-8") as handle:
+                handle.writelines(
+                    json.dumps([job_id, start, length]) + "\n" for job_id, (start, length) in entries.items()
+                )
+            for private_path in (self._path, self._index_path):
+                try:
+                    os.chmod(private_path, 0o600)
+                except PermissionError:
+                    LOGGER.warning("Could not set job archive permissions to 0600.")
+        return len(lines)
+
+    def find(self, job_id: str) -> dict[str, Any] | None:
+        return self.find_many([job_id]).get(job_id)
+
+    def find_many(self, job_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Newest archived record for each of ``job_ids``, reading only the members that hold them."""
+        wanted = set(job_ids)
+        if not wanted or not self._path.exists():
+            return {}
+        found: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            index = self._index_unlocked()
+            members: dict[tuple[int, int], set[str]] = {}
+            for job_id in wanted:
+                if job_id in index:
+                    members.setdefault(index[job_id], set()).add(job_id)
+            if not members:
+                return {}
+            with self._path.open("rb") as handle:
+                for (offset, length), ids in sorted(members.items()):
+                    handle.seek(offset)
+                    for line in gzip.decompress(handle.read(length)).decode("utf-8").splitlines():
+                        record = json.loads(line)
+                        if isinstance(record, dict) and record.get("id") in ids:
+                            found[record["id"]] = record
+        return found
+
+    def _index_unlocked(self) -> dict[str, tuple[int, int]]:
+        if self._index is None:
+            index = self._read_sidecar_unlocked()
+            if index is None:
+                index = self._rebuild_index_unlocked()
+            self._index = index
+        return self._index
+
+    def _read_sidecar_unlocked(self) -> dict[str, tuple[int, int]] | None:
+        """The persisted index, or ``None`` if it is missing, corrupt or stale."""
+        size = self.size_bytes()
+        try:
+            raw = self._index_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return {} if size == 0 else None
+        index: dict[str, tuple[int, int]] = {}
+        covered = 0
+        try:
+            for line in raw.splitlines():
+                job_id, offset, length = json.loads(line)
+                index[str(job_id)] = (int(offset), int(length))
+                covered = max(covered, int(offset) + int(length))
+        except (ValueError, TypeError):
+            return None
+        return index if covered == size else None
+
+    def _rebuild_index_unlocked(self) -> dict[str, tuple[int, int]]:
+        index: dict[str, tuple[int, int]] = {}
+        for offset, length, content in self._iter_members_unlocked():
+            for line in content.decode("utf-8").splitlines():
+                record = json.loads(line)
+                if isinstance(record, dict) and record.get("id"):
+                    index[str(record["id"])] = (offset, length)
+        lines = "".join(json.dumps([job_id, offset, length]) + "\n" for job_id, (offset, length) in index.items())
+        temp_path = self._index_path.with_name(f"{self._index_path.name}.tmp")
+        temp_path.write_text(lines, encoding="utf-8")
+        os.replace(temp_path, self._index_path)
+        if index:
+            LOGGER.info("Rebuilt job archive index for %s jobs.", len(index))
+        return index
+
+    def _iter_members_unlocked(self) -> Iterator[tuple[int, int, bytes]]:
+        """Yield ``(offset, length, content)`` for every complete gzip member."""
+        if not self._path.exists():
+            return
+        with self._path.open("rb") as handle:
+            decompressor = zlib.decompressobj(wbits=31)
+            position = member_start = 0
+            chunks: list[bytes] = []
+            pending = b""
+            while True:
+                data = pending or handle.read(self.READ_CHUNK_BYTES)
+                pending = b""
+                if not data:
+                    return
+                try:
+                    chunks.append(decompressor.decompress(data))
+                except zlib.error:
+                    LOGGER.warning("Job archive is corrupt after byte %s; ignoring the rest.", member_start)
+                    return
+                if not decompressor.eof:
+                    position += len(data)
+                    continue
+                pending = decompressor.unused_data
+                position += len(data) - len(pending)
+                yield member_start, position - member_start, b"".join(chunks)
+                member_start = position
+                chunks = []
+                decompressor = zlib.decompressobj(wbits=31)
@@ -1,106 +1,481 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
 import time
 import uuid
-from typing import Any, Awaitable, Callable
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
 
+from .job_archive import JobArchive
+from .retry import RetryPolicy
 from .security import AuditLogger
-from .vault import LocalVault
+from .vault import AsyncVault
+
+LOGGER = logging.getLogger("gitvibedev.job_queue")
 
 JobHandler = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
 
+JOB_PRIORITIES: dict[str, int] = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = "normal"
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+
+@dataclass(frozen=True)
+class JobRetentionPolicy:
+    """How long, and how many, finished jobs of each terminal status are kept."""
+
+    max_age_seconds: dict[str, int] = field(default_factory=dict)
+    max_count: dict[str, int] = field(default_factory=dict)
+    compaction_interval_seconds: float = 3600.0
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """One job for ``enqueue_many``."""
+
+    job_type: str
+    payload: dict[str, Any]
+    max_retries: int
+    priority: str = DEFAULT_PRIORITY
+
+
+class JobScheduler:
+    """Ready deques per priority plus a min-heap of delayed jobs keyed by ``run_after``.
+
+    Enqueue and dequeue are O(log n) at worst. Jobs whose type is at its
+    concurrency cap are parked per type and returned to the front of their
+    priority lane by ``release_type``. Entries are removed lazily: ``pop_ready``
+    skips ids for which ``is_runnable`` is false.
+    """
+
+    def __init__(self) -> None:
+        self._ready: dict[int, deque[str]] = {
+            level: deque() for level in sorted(JOB_PRIORITIES.values())
+        }
+        self._delayed: list[tuple[float, int, int, str]] = []
+        self._parked: dict[str, deque[tuple[int, str]]] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return (
+            sum(len(lane) for lane in self._ready.values())
+            + len(self._delayed)
+            + sum(len(lane) for lane in self._parked.values())
+        )
+
+    def clear(self) -> None:
+        for lane in self._ready.values():
+            lane.clear()
+        self._delayed.clear()
+        self._parked.clear()
+
+    def push(self, job_id: str, *, priority: int, run_after: float, now: float) -> None:
+        if run_after > now:
+            heapq.heappush(self._delayed, (run_after, next(self._sequence), priority, job_id))
+        else:
+            self._ready[priority].append(job_id)
+
+    def _promote_due(self, now: float) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, priority, job_id = heapq.heappop(self._delayed)
+            self._ready[priority].append(job_id)
+
+    def pop_ready(
+        self,
+        now: float,
+        *,
+        is_runnable: Callable[[str], bool],
+        job_type_of: Callable[[str], str],
+        has_capacity: Callable[[str], bool],
+    ) -> str | None:
+        self._promote_due(now)
+        for priority, lane in self._ready.items():
+            while lane:
+                job_id = lane.popleft()
+                if not is_runnable(job_id):
+                    continue
+                job_type = job_type_of(job_id)
+                if not has_capacity(job_type):
+                    self._parked.setdefault(job_type, deque()).append((priority, job_id))
+                    continue
+                return job_id
+        return None
+
+    def release_type(self, job_type: str) -> None:
+        parked = self._parked.pop(job_type, None)
+        while parked:
+            priority, job_id = parked.pop()
+            self._ready[priority].appendleft(job_id)
+
+    def next_run_after(self) -> float | None:
+        return self._delayed[0][0] if self._delayed else None
+
+
+class JobTimeoutError(RuntimeError):
+    """A job handler ran past its execution timeout and was cancelled."""
+
+
+async def run_with_timeout(
+    task: asyncio.Future[dict[str, Any]],
+    *,
+    timeout_seconds: float | None,
+) -> dict[str, Any]:
+    """Await a handler ``task``, cancelling it after ``timeout_seconds``.
+
+    The caller gets control back at the deadline even when the handler
+    swallows the cancellation, so a hung handler never keeps its worker.
+    """
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout_seconds)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        raise JobTimeoutError(f"Job exceeded its {timeout_seconds:g}s execution timeout.")
+    if task.cancelled():
+        raise RuntimeError("Job handler was cancelled.")
+    return task.result()
+
+
+class JobWatchers:
+    """Fans job state changes out to subscribers, e.g. server-sent event streams.
+
+    Each subscriber gets a bounded ``asyncio.Queue`` of public job snapshots,
+    limited to ``job_ids`` when given. A slow subscriber loses its oldest
+    snapshots rather than blocking the queue; readers should treat snapshots
+    as "latest state", not as a complete log.
+    """
+
+    def __init__(self, max_buffer: int = 100) -> None:
+        self._max_buffer = max(1, max_buffer)
+        self._subscribers: dict[asyncio.Queue[dict[str, Any]], frozenset[str] | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, job_ids: Iterable[str] | None = None) -> asyncio.Queue[dict[str, Any]]:
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=self._max_buffer)
+        self._subscribers[queue] = frozenset(job_ids) if job_ids is not None else None
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[dict[str, Any]]) -> None:
+        self._subscribers.pop(queue, None)
+
+    def publish(self, job: dict[str, Any]) -> None:
+        if not self._subscribers:
+            return
+        snapshot = public_job(job)
+        for queue, job_ids in self._subscribers.items():
+            if job_ids is not None and snapshot["id"] not in job_ids:
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+
+def parse_type_limits(raw: str) -> dict[str, int]:
+    """Parse ``"ai_review=2,other=1"`` into per-job-type concurrency limits."""
+    limits: dict[str, int] = {}
+    for item in raw.split(","):
+        job_type, _, limit = item.partition("=")
+        if job_type.strip() and limit.strip().isdigit():
+            limits[job_type.strip()] = max(1, int(limit))
+    return limits
+
+
+def parse_retry_policies(raw: str, *, default: RetryPolicy) -> dict[str, RetryPolicy]:
+    """Parse ``"ai_review=5:600,other=1:30"`` (base:max seconds) into per-type policies."""
+    policies: dict[str, RetryPolicy] = {}
+    for item in raw.split(","):
+        job_type, _, spec = item.partition("=")
+        base, _, ceiling = spec.partition(":")
+        try:
+            base_seconds = float(base)
+            max_seconds = float(ceiling) if ceiling.strip() else default.max_seconds
+        except ValueError:
+            continue
+        if job_type.strip() and base_seconds > 0:
+            policies[job_type.strip()] = RetryPolicy(
+                base_seconds=base_seconds,
+                max_seconds=max(base_seconds, max_seconds),
+                multiplier=default.multiplier,
+                jitter=default.jitter,
+            )
+    return policies
+
+
+def new_job(
+    *,
+    job_type: str,
+    payload: dict[str, Any],
+    max_retries: int,
+    priority: str = DEFAULT_PRIORITY,
+) -> dict[str, Any]:
+    """Fresh ``queued`` job record; raises ``ValueError`` on an unknown priority."""
+    if priority not in JOB_PRIORITIES:
+        raise ValueError(f"Unknown job priority '{priority}'.")
+    now = int(time.time())
+    return {
+        "id": str(uuid.uuid4()),
+        "type": job_type,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_retries": max(0, max_retries),
+        "created_at": now,
+        "updated_at": now,
+        "last_error": None,
+        "result": None,
+        "run_after": float(now),
+        "enqueued_at": time.time(),
+        "priority": priority,
+    }
+
+
+def public_job(job: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": job.get("id"),
+        "type": job.get("type"),
+        "status": job.get("status"),
+        "attempts": job.get("attempts"),
+        "max_retries": job.get("max_retries"),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at"),
+        "last_error": job.get("last_error"),
+        "result": job.get("result"),
+        "payload": job.get("payload"),
+        "priority": job.get("priority", DEFAULT_PRIORITY),
+        "dead_lettered_at": job.get("dead_lettered_at"),
+        "replays": job.get("replays", 0),
+    }
+
 
 class PersistentJobQueue:
+    """Vault-backed job queue served by ``worker_count`` concurrent workers.
+
+    ``type_concurrency`` caps how many jobs of one type run at once; jobs of a
+    type at its cap stay queued while workers pick up other work.
+
+    Idle workers block on a wakeup event that ``enqueue``, retries, finished
+    jobs and ``stop`` fire, and otherwise sleep exactly until the earliest
+    ``run_after``. ``poll_interval_seconds`` is only a safety-net recheck. ``stop``
+    lets in-flight jobs finish for up to ``drain_timeout_seconds`` before
+    cancelling them (cancelled jobs stay ``running`` until the next load or
+    until the reaper sees their lease expire).
+
+    Every job is persisted as its own ``background_job::<id>`` vault entry, so
+    a state transition rewrites only the job that changed. Queue order is
+    rebuilt at load time from each job's ``run_after`` and ``enqueued_at``.
+
+    With a ``retention`` policy, finished jobs past their age or count limit
+    are moved to the ``archive`` by ``compact`` (also run periodically while
+    the queue is started); ``get_job`` falls back to the archive.
+
+    Failed attempts are retried after a delay from the job type's
+    ``RetryPolicy`` (``retry_policies``, else ``default_retry_policy``). Jobs
+    that exhaust their retries end ``failed`` with ``dead_lettered_at`` set;
+    ``list_dead_letters`` and ``replay_dead_letters`` inspect and requeue them.
+
+    A running job holds a lease of ``lease_seconds``. A heartbeat renews the
+    lease while the handler is alive. Handlers are cancelled after their type's
+    ``execution_timeouts`` entry, or ``default_execution_timeout_seconds``. The
+    reaper treats a job whose lease expires as a failed attempt: it cancels
+    the handler, frees the type slot and retries or dead-letters the job. A
+    late result from a reaped attempt is discarded.
+    """
+
+    # Legacy single-blob layout; split into per-job entries on load.
     STATE_KEY = "background_job_queue_state"
+    JOB_KEY_PREFIX = "background_job::"
 
     def __init__(
         self,
         *,
-        vault: LocalVault,
+        vault: AsyncVault,
         audit_logger: AuditLogger,
-        poll_interval_seconds: float = 1.0,
+        poll_interval_seconds: float = 30.0,
         retry_base_seconds: int = 2,
+        default_retry_policy: RetryPolicy | None = None,
+        retry_policies: dict[str, RetryPolicy] | None = None,
+        worker_count: int = 1,
+        type_concurrency: dict[str, int] | None = None,
+        drain_timeout_seconds: float = 30.0,
+        retention: JobRetentionPolicy | None = None,
+        archive: JobArchive | None = None,
+        lease_seconds: float = 60.0,
+        default_execution_timeout_seconds: float | None = None,
+        execution_timeouts: dict[str, float] | None = None,
     ) -> None:
         self._vault = vault
         self._audit_logger = audit_logger
         self._poll_interval_seconds = max(0.2, poll_interval_seconds)
-        self._retry_base_seconds = max(1, retry_base_seconds)
+        self._wakeup = asyncio.Event()
+        self._default_retry_policy = default_retry_policy or RetryPolicy(
+            base_seconds=max(1, retry_base_seconds)
+        )
+        self._retry_policies = dict(retry_policies or {})
+        self._worker_count = max(1, worker_count)
+        self._type_concurrency = dict(type_concurrency or {})
+        self._drain_timeout_seconds = max(0.0, drain_timeout_seconds)
         self._handlers: dict[str, JobHandler] = {}
         self._jobs: dict[str, dict[str, Any]] = {}
-        self._queue: list[str] = []
+        self._scheduler = JobScheduler()
+        self._running_by_type: dict[str, int] = {}
         self._lock = asyncio.Lock()
-        self._worker_task: asyncio.Task[None] | None = None
+        self._worker_tasks: list[asyncio.Task[None]] = []
+        self._stop_event: asyncio.Event | None = None
+        self._retention = retention
+        self._archive = archive
+        self._maintenance_task: asyncio.Task[None] | None = None
+        self._lease_seconds = max(0.3, lease_seconds)
+        self._default_execution_timeout_seconds = default_execution_timeout_seconds
+        self._execution_timeouts = dict(execution_timeouts or {})
+        # job id -> lease id of the attempt currently allowed to finish it.
+        self._leases: dict[str, str] = {}
+        self._handler_tasks: dict[str, asyncio.Future[Any]] = {}
+        self._reaper_task: asyncio.Task[None] | None = None
+        self.watchers = JobWatchers()
         self._load_state()
 
     def register_handler(self, job_type: str, handler: JobHandler) -> None:
         self._handlers[job_type] = handler
 
+    @staticmethod
+    def _priority_level(job: dict[str, Any]) -> int:
+        priority = str(job.get("priority", DEFAULT_PRIORITY))
+        return JOB_PRIORITIES.get(priority, JOB_PRIORITIES[DEFAULT_PRIORITY])
+
+    def _schedule(self, job_id: str, job: dict[str, Any]) -> None:
+        self._scheduler.push(
+            job_id,
+            priority=self._priority_level(job),
+            run_after=float(job.get("run_after", 0.0)),
+            now=time.time(),
+        )
+
+    @classmethod
+    def _job_key(cls, job_id: str) -> str:
+        return f"{cls.JOB_KEY_PREFIX}{job_id}"
+
+    def _migrate_legacy_state(self) -> None:
+        with self._vault.backend.transaction() as txn:
+            legacy = txn.get(self.STATE_KEY)
+            if legacy is None:
+                return
+            txn.delete(self.STATE_KEY)
+            if not isinstance(legacy, dict):
+                return
+            jobs = legacy.get("jobs") if isinstance(legacy.get("jobs"), dict) else {}
+            order = legacy.get("queue") if isinstance(legacy.get("queue"), list) else []
+            position = {job_id: index for index, job_id in enumerate(order) if isinstance(job_id, str)}
+            for job_id, job in jobs.items():
+                if not isinstance(job, dict):
+                    continue
+                # Small positions sort legacy jobs ahead of anything enqueued later.
+                job.setdefault("enqueued_at", float(position.get(job_id, len(position))))
+                txn.set(self._job_key(job_id), job)
+
     def _load_state(self) -> None:
-        raw = self._vault.get(self.STATE_KEY, {})
-        if not isinstance(raw, dict):
-            self._jobs = {}
-            self._queue = []
-            return
-        jobs_raw = raw.get("jobs")
-        queue_raw = raw.get("queue")
-        self._jobs = jobs_raw if isinstance(jobs_raw, dict) else {}
-        self._queue = [item for item in queue_raw if isinstance(item, str)] if isinstance(queue_raw, list) else []
-        dirty = False
-        for job_id, job in list(self._jobs.items()):
+        self._scheduler.clear()
+        self._jobs = {}
+        self._migrate_legacy_state()
+        backend = self._vault.backend
+        loaded = backend.get_many(backend.keys(self.JOB_KEY_PREFIX))
+        requeued: dict[str, Any] = {}
+        invalid: list[str] = []
+        for key, job in loaded.items():
             if not isinstance(job, dict):
-                del self._jobs[job_id]
-                dirty = True
+                invalid.append(key)
                 continue
-            status_value = str(job.get("status", "queued"))
-            if status_value == "running":
+            if job.get("status") == "running":
                 job["status"] = "queued"
-                status_value = "queued"
-                dirty = True
-            if status_value == "queued" and job_id not in self._queue:
-                self._queue.append(job_id)
-                dirty = True
-        if dirty:
-            self._persist_state()
-
-    def _persist_state(self) -> None:
-        self._vault.set(
-            self.STATE_KEY,
-            {
-                "jobs": self._jobs,
-                "queue": self._queue,
-                "updated_at": int(time.time()),
-            },
+                job.pop("lease_expires_at", None)
+                requeued[key] = job
+            self._jobs[key[len(self.JOB_KEY_PREFIX) :]] = job
+        if requeued or invalid:
+            backend.apply_changes(requeued, invalid)
+        queued = sorted(
+            (
+                (float(job.get("run_after", 0.0)), float(job.get("enqueued_at", 0.0)), job_id)
+                for job_id, job in self._jobs.items()
+                if job.get("status", "queued") == "queued"
+            ),
         )
+        for _, _, job_id in queued:
+            self._schedule(job_id, self._jobs[job_id])
 
-    @staticmethod
-    def _public_job(job: dict[str, Any]) -> dict[str, Any]:
-        return {
-            "id": job.get("id"),
-            "type": job.get("type"),
-            "status": job.get("status"),
-            "attempts": job.get("attempts"),
-            "max_retries": job.get("max_retries"),
-            "created_at": job.get("created_at"),
-            "updated_at": job.get("updated_at"),
-            "last_error": job.get("last_error"),
-            "result": job.get("result"),
-            "payload": job.get("payload"),
-        }
+    async def _persist_job(self, job: dict[str, Any]) -> None:
+        await self._vault.aset(self._job_key(str(job["id"])), job)
+
+    def _signal_workers(self) -> None:
+        # Swap in a fresh event so every waiter wakes once and nothing is lost
+        # between a worker's empty dequeue and its wait.
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
 
     async def start(self) -> None:
-        if self._worker_task is None or self._worker_task.done():
-            self._worker_task = asyncio.create_task(self._worker_loop())
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        if self._stop_event is None or not self._worker_tasks:
+            # Created per start so the events and lock bind to the running loop.
+            self._stop_event = asyncio.Event()
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+        while len(self._worker_tasks) < self._worker_count:
+            self._worker_tasks.append(
+                asyncio.create_task(
+                    self._worker_loop(self._stop_event),
+                    name=f"job-worker-{len(self._worker_tasks)}",
+                )
+            )
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(
+                self._reaper_loop(self._stop_event),
+                name="job-lease-reaper",
+            )
+        if self._retention is not None and (
+            self._maintenance_task is None or self._maintenance_task.done()
+        ):
+            self._maintenance_task = asyncio.create_task(
+                self._maintenance_loop(self._stop_event),
+                name="job-maintenance",
+            )
 
     async def stop(self) -> None:
-        if self._worker_task is None:
+        for task in (self._maintenance_task, self._reaper_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._maintenance_task = None
+        self._reaper_task = None
+        if not self._worker_tasks:
             return
-        self._worker_task.cancel()
-        try:
-            await self._worker_task
-        except asyncio.CancelledError:
-            pass
-        self._worker_task = None
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._signal_workers()
+        _, pending = await asyncio.wait(
+            self._worker_tasks,
+            timeout=self._drain_timeout_seconds,
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._worker_tasks = []
+
+    def _type_has_capacity(self, job_type: str) -> bool:
+        limit = self._type_concurrency.get(job_type)
+        return limit is None or self._running_by_type.get(job_type, 0) < limit
 
     async def enqueue(
         self,
@@ -108,129 +483,457 @@ class PersistentJobQueue:
         job_type: str,
         payload: dict[str, Any],
         max_retries: int,
+        priority: str = DEFAULT_PRIORITY,
     ) -> dict[str, Any]:
-        now = int(time.time())
-        job_id = str(uuid.uuid4())
-        job = {
-            "id": job_id,
-            "type": job_type,
-            "payload": payload,
-            "status": "queued",
-            "attempts": 0,
-            "max_retries": max(0, max_retries),
-            "created_at": now,
-            "updated_at": now,
-            "last_error": None,
-            "result": None,
-            "run_after": float(now),
-        }
+        job = new_job(
+            job_type=job_type,
+            payload=payload,
+            max_retries=max_retries,
+            priority=priority,
+        )
+        job_id = str(job["id"])
         async with self._lock:
             self._jobs[job_id] = job
-            self._queue.append(job_id)
-            self._persist_state()
+            self._schedule(job_id, job)
+            await self._persist_job(job)
+            self.watchers.publish(job)
+        self._signal_workers()
         self._audit_logger.security(
             "job_enqueued",
             actor="system",
             details={"job_id": job_id, "job_type": job_type},
         )
-        return self._public_job(job)
+        return public_job(job)
+
+    async def enqueue_many(self, specs: list[JobSpec]) -> list[dict[str, Any]]:
+        """Enqueue ``specs`` under one lock with a single vault write and audit line."""
+        jobs = [
+            new_job(
+                job_type=spec.job_type,
+                payload=spec.payload,
+                max_retries=spec.max_retries,
+                priority=spec.priority,
+            )
+            for spec in specs
+        ]
+        if not jobs:
+            return []
+        async with self._lock:
+            for job in jobs:
+                self._jobs[str(job["id"])] = job
+                self._schedule(str(job["id"]), job)
+            await self._vault.aset_many({self._job_key(str(job["id"])): job for job in jobs})
+            for job in jobs:
+                self.watchers.publish(job)
+        self._signal_workers()
+        self._audit_logger.security(
+            "jobs_enqueued",
+            actor="system",
+            details={
+                "count": len(jobs),
+                "job_types": sorted({str(job["type"]) for job in jobs}),
+            },
+        )
+        return [public_job(job) for job in jobs]
+
+    async def list_jobs(
+        self,
+        *,
+        job_ids: list[str] | None = None,
+        status: str | None = None,
+        job_type: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Jobs by id (in the given order, archived ones included) or newest first.
+
+        ``status`` and ``job_type`` filter either selection.
+        """
+        async with self._lock:
+            if job_ids is not None:
+                ordered_ids = list(dict.fromkeys(job_ids))
+                found = {job_id: public_job(self._jobs[job_id]) for job_id in ordered_ids if job_id in self._jobs}
+            else:
+                ordered_ids = [
+                    job_id
+                    for job_id, _ in sorted(
+                        self._jobs.items(),
+                        key=lambda item: float(item[1].get("enqueued_at", 0.0)),
+                        reverse=True,
+                    )
+                ]
+                found = {job_id: public_job(self._jobs[job_id]) for job_id in ordered_ids}
+        missing = [job_id for job_id in ordered_ids if job_id not in found]
+        if job_ids is not None and missing and self._archive is not None:
+            archived = await asyncio.to_thread(self._archive.find_many, missing)
+            found.update(
+                {job_id: {**public_job(record), "archived": True} for job_id, record in archived.items()}
+            )
+        selected = [
+            found[job_id]
+            for job_id in ordered_ids
+            if job_id in found
+            and (status is None or found[job_id]["status"] == status)
+            and (job_type is None or found[job_id]["type"] == job_type)
+        ]
+        return selected[: max(0, limit)]
 
     async def get_job(self, job_id: str) -> dict[str, Any] | None:
         async with self._lock:
             job = self._jobs.get(job_id)
-            if not isinstance(job, dict):
-                return None
-            return self._public_job(job)
+            if isinstance(job, dict):
+                return public_job(job)
+        if self._archive is None:
+            return None
+        archived = await asyncio.to_thread(self._archive.find, job_id)
+        if archived is None:
+            return None
+        return {**public_job(archived), "archived": True}
+
+    def _retention_victims(self, now: float) -> list[str]:
+        policy = self._retention
+        if policy is None:
+            return []
+        by_status: dict[str, list[tuple[float, str]]] = {}
+        for job_id, job in self._jobs.items():
+            status_value = str(job.get("status", ""))
+            if status_value in TERMINAL_STATUSES:
+                by_status.setdefault(status_value, []).append(
+                    (float(job.get("updated_at", 0)), job_id)
+                )
+        victims: list[str] = []
+        for status_value, entries in by_status.items():
+            max_age = policy.max_age_seconds.get(status_value)
+            max_count = policy.max_count.get(status_value)
+            entries.sort(reverse=True)
+            for index, (updated_at, job_id) in enumerate(entries):
+                too_old = max_age is not None and now - updated_at > max_age
+                over_count = max_count is not None and index >= max_count
+                if too_old or over_count:
+                    victims.append(job_id)
+        return victims
+
+    async def compact(self) -> dict[str, Any]:
+        """Archive and drop finished jobs beyond the retention policy."""
+        async with self._lock:
+            victims = [self._jobs[job_id] for job_id in self._retention_victims(time.time())]
+            reclaimed_bytes = sum(
+                len(json.dumps(job, separators=(",", ":"), sort_keys=True)) for job in victims
+            )
+            if victims and self._archive is not None:
+                # Archive first: a crash before the delete only duplicates records.
+                await asyncio.to_thread(self._archive.append, victims)
+            if victims:
+                await self._vault.adelete_many([self._job_key(str(job["id"])) for job in victims])
+                for job in victims:
+                    self._jobs.pop(str(job["id"]), None)
+            remaining = len(self._jobs)
+        return {
+            "archived_jobs": len(victims) if self._archive is not None else 0,
+            "removed_jobs": len(victims),
+            "reclaimed_bytes": reclaimed_bytes,
+            "remaining_jobs": remaining,
+            "archive_bytes": self._archive.size_bytes() if self._archive is not None else 0,
+        }
+
+    async def _maintenance_loop(self, stop_event: asyncio.Event) -> None:
+        interval = self._retention.compaction_interval_seconds if self._retention else 3600.0
+        while not stop_event.is_set():
+            try:
+                report = await self.compact()
+            except (OSError, ValueError):
+                LOGGER.exception("Job compaction failed; will retry.")
+            else:
+                if report["removed_jobs"]:
+                    self._audit_logger.security("jobs_compacted", actor="system", details=report)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _is_runnable(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        return isinstance(job, dict) and job.get("status") == "queued"
+
+    def _job_type_of(self, job_id: str) -> str:
+        return str(self._jobs[job_id].get("type", ""))
 
     async def _dequeue_next_job_id(self) -> str | None:
         async with self._lock:
-            if not self._queue:
-                return None
             now = time.time()
-            queue_len = len(self._queue)
-            for _ in range(queue_len):
-                job_id = self._queue.pop(0)
-                job = self._jobs.get(job_id)
-                if not isinstance(job, dict) or job.get("status") != "queued":
-                    continue
-                run_after = float(job.get("run_after", 0.0))
-                if run_after > now:
-                    self._queue.append(job_id)
-                    continue
-                job["status"] = "running"
-                job["updated_at"] = int(now)
-                self._persist_state()
-                return job_id
-            return None
+            job_id = self._scheduler.pop_ready(
+                now,
+                is_runnable=self._is_runnable,
+                job_type_of=self._job_type_of,
+                has_capacity=self._type_has_capacity,
+            )
+            if job_id is None:
+                return None
+            job = self._jobs[job_id]
+            job_type = str(job.get("type", ""))
+            self._running_by_type[job_type] = self._running_by_type.get(job_type, 0) + 1
+            self._leases[job_id] = uuid.uuid4().hex
+            job["status"] = "running"
+            job["updated_at"] = int(now)
+            job["lease_expires_at"] = now + self._lease_seconds
+            await self._persist_job(job)
+            self.watchers.publish(job)
+            return job_id
+
+    def _holds_lease(self, job_id: str, lease_id: str | None) -> bool:
+        return lease_id is None or self._leases.get(job_id) == lease_id
 
-    async def _mark_completed(self, *, job_id: str, result: dict[str, Any]) -> None:
+    def _release_lease(self, job_id: str, lease_id: str, job_type: str) -> None:
+        if self._leases.get(job_id) != lease_id:
+            return
+        del self._leases[job_id]
+        self._handler_tasks.pop(job_id, None)
+        self._running_by_type[job_type] = max(0, self._running_by_type.get(job_type, 1) - 1)
+        if job_type in self._type_concurrency:
+            # A capped job type may have parked work waiting for this slot.
+            self._scheduler.release_type(job_type)
+            self._signal_workers()
+
+    def execution_timeout_for(self, job_type: str) -> float | None:
+        return self._execution_timeouts.get(job_type, self._default_execution_timeout_seconds)
+
+    async def _mark_completed(
+        self,
+        *,
+        job_id: str,
+        result: dict[str, Any],
+        lease_id: str | None = None,
+    ) -> None:
         async with self._lock:
             job = self._jobs.get(job_id)
-            if not isinstance(job, dict):
+            if not isinstance(job, dict) or not self._holds_lease(job_id, lease_id):
                 return
+            job.pop("lease_expires_at", None)
             job["status"] = "completed"
             job["result"] = result
             job["updated_at"] = int(time.time())
             job["last_error"] = None
-            self._persist_state()
+            await self._persist_job(job)
+            self.watchers.publish(job)
         self._audit_logger.security(
             "job_completed",
             actor="system",
             details={"job_id": job_id},
         )
 
-    async def _mark_failed_or_retry(self, *, job_id: str, error_message: str) -> None:
+    def retry_policy_for(self, job_type: str) -> RetryPolicy:
+        return self._retry_policies.get(job_type, self._default_retry_policy)
+
+    async def _mark_failed_or_retry(
+        self,
+        *,
+        job_id: str,
+        error_message: str,
+        lease_id: str | None = None,
+    ) -> None:
         async with self._lock:
             job = self._jobs.get(job_id)
-            if not isinstance(job, dict):
+            if not isinstance(job, dict) or not self._holds_lease(job_id, lease_id):
                 return
+            job.pop("lease_expires_at", None)
             attempts = int(job.get("attempts", 0)) + 1
             job["attempts"] = attempts
             job["updated_at"] = int(time.time())
             job["last_error"] = error_message
             max_retries = int(job.get("max_retries", 0))
             if attempts <= max_retries:
-                retry_delay = self._retry_base_seconds * attempts
+                retry_delay = self.retry_policy_for(str(job.get("type", ""))).delay_seconds(attempts)
                 job["status"] = "queued"
                 job["run_after"] = time.time() + retry_delay
-                self._queue.append(job_id)
-                self._persist_state()
+                self._schedule(job_id, job)
+                await self._persist_job(job)
+                self.watchers.publish(job)
+                self._signal_workers()
                 self._audit_logger.security(
                     "job_retry_scheduled",
                     actor="system",
-                    details={"job_id": job_id, "attempts": attempts, "retry_delay_seconds": retry_delay},
+                    details={
+                        "job_id": job_id,
+                        "attempts": attempts,
+                        "retry_delay_seconds": round(retry_delay, 3),
+                    },
                 )
                 return
             job["status"] = "failed"
-            self._persist_state()
+            job["dead_lettered_at"] = int(time.time())
+            await self._persist_job(job)
+            self.watchers.publish(job)
         self._audit_logger.security(
             "job_failed",
             actor="system",
-            details={"job_id": job_id, "attempts": attempts, "error": error_message},
+            details={"job_id": job_id, "attempts": attempts, "error": error_message, "dead_lettered": True},
         )
 
-    async def _worker_loop(self) -> None:
-        while True:
+    async def list_dead_letters(
+        self,
+        *,
+        job_type: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Dead-lettered jobs, most recently failed first."""
+        async with self._lock:
+            dead = [
+                job
+                for job in self._jobs.values()
+                if job.get("status") == "failed"
+                and job.get("dead_lettered_at") is not None
+                and (job_type is None or job.get("type") == job_type)
+            ]
+            dead.sort(key=lambda job: int(job.get("dead_lettered_at", 0)), reverse=True)
+            return [public_job(job) for job in dead[: max(0, limit)]]
+
+    async def replay_dead_letters(
+        self,
+        *,
+        job_ids: list[str] | None = None,
+        job_type: str | None = None,
+        limit: int = 100,
+        spread_seconds: float = 0.0,
+    ) -> list[str]:
+        """Requeue dead-lettered jobs with a fresh retry budget.
+
+        Selects ``job_ids`` when given, otherwise the oldest dead letters
+        (optionally of ``job_type``), up to ``limit``. Each replayed job gets a
+        random start within ``spread_seconds`` so a bulk replay does not land on
+        a recovering upstream all at once. All selected jobs are persisted in one
+        vault write.
+        """
+        async with self._lock:
+            if job_ids is not None:
+                candidates = [self._jobs.get(job_id) for job_id in dict.fromkeys(job_ids)]
+            else:
+                candidates = sorted(
+                    self._jobs.values(),
+                    key=lambda job: int(job.get("dead_lettered_at") or 0),
+                )
+            selected = [
+                job
+                for job in candidates
+                if isinstance(job, dict)
+                and job.get("status") == "failed"
+                and job.get("dead_lettered_at") is not None
+                and (job_type is None or job.get("type") == job_type)
+            ][: max(0, limit)]
+            if not selected:
+                return []
+            now = time.time()
+            for job in selected:
+                job["status"] = "queued"
+                job["attempts"] = 0
+                job["dead_lettered_at"] = None
+                job["replays"] = int(job.get("replays", 0)) + 1
+                job["updated_at"] = int(now)
+                job["run_after"] = now + random.uniform(0.0, max(0.0, spread_seconds))
+                job["enqueued_at"] = now
+                self._schedule(str(job["id"]), job)
+            await self._vault.aset_many({self._job_key(str(job["id"])): job for job in selected})
+            for job in selected:
+                self.watchers.publish(job)
+        self._signal_workers()
+        return [str(job["id"]) for job in selected]
+
+    async def _worker_loop(self, stop_event: asyncio.Event) -> None:
+        while not stop_event.is_set():
+            wakeup = self._wakeup
             job_id = await self._dequeue_next_job_id()
             if job_id is None:
-                await asyncio.sleep(self._poll_interval_seconds)
+                timeout = self._poll_interval_seconds
+                next_run_after = self._scheduler.next_run_after()
+                if next_run_after is not None:
+                    timeout = min(timeout, max(0.0, next_run_after - time.time()))
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
                 continue
+            await self._run_job(job_id)
+
+    async def _heartbeat(self, job_id: str, lease_id: str) -> None:
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
             async with self._lock:
                 job = self._jobs.get(job_id)
-                if not isinstance(job, dict):
-                    continue
-                job_type = str(job.get("type", ""))
-                payload = job.get("payload", {})
+                if not isinstance(job, dict) or self._leases.get(job_id) != lease_id:
+                    return
+                job["lease_expires_at"] = time.time() + self._lease_seconds
+                await self._persist_job(job)
+
+    async def reap_expired_leases(self) -> list[str]:
+        """Retry or dead-letter ``running`` jobs whose lease was not renewed."""
+        now = time.time()
+        async with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.get("status") == "running"
+                and float(job.get("lease_expires_at", now + 1)) < now
+            ]
+            for job_id in expired:
+                task = self._handler_tasks.get(job_id)
+                if task is not None:
+                    task.cancel()
+                lease_id = self._leases.get(job_id)
+                if lease_id is not None:
+                    self._release_lease(job_id, lease_id, self._job_type_of(job_id))
+        for job_id in expired:
+            await self._mark_failed_or_retry(
+                job_id=job_id,
+                error_message="Job lease expired without a heartbeat; handler cancelled.",
+            )
+            self._audit_logger.security(
+                "job_lease_expired",
+                actor="system",
+                details={"job_id": job_id},
+            )
+        return expired
+
+    async def _reaper_loop(self, stop_event: asyncio.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self._lease_seconds / 2)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                return
+            await self.reap_expired_leases()
+
+    async def _run_job(self, job_id: str) -> None:
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            lease_id = self._leases.get(job_id)
+            if not isinstance(job, dict) or lease_id is None:
+                return
+            job_type = str(job.get("type", ""))
+            payload = job.get("payload", {})
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, lease_id))
+        try:
             handler = self._handlers.get(job_type)
             if handler is None:
                 await self._mark_failed_or_retry(
                     job_id=job_id,
                     error_message=f"No handler registered for job type '{job_type}'.",
+                    lease_id=lease_id,
                 )
-                continue
+                return
+            task = asyncio.ensure_future(handler(payload if isinstance(payload, dict) else {}))
+            self._handler_tasks[job_id] = task
             try:
-                result = await handler(payload if isinstance(payload, dict) else {})
+                result = await run_with_timeout(
+                    task,
+                    timeout_seconds=self.execution_timeout_for(job_type),
+                )
             except Exception as exc:
-                await self._mark_failed_or_retry(job_id=job_id, error_message=str(exc))
-                continue
-            await self._mark_completed(job_id=job_id, result=result)
+                await self._mark_failed_or_retry(job_id=job_id, error_message=str(exc), lease_id=lease_id)
+                return
+            await self._mark_completed(job_id=job_id, result=result, lease_id=lease_id)
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._release_lease(job_id, lease_id, job_type)
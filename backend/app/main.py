@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import itertools
+import json
 import os
 import secrets
 from hashlib import sha256
-from typing import Any
+from typing import Any, AsyncIterator
 
 from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, Field
 
@@ -26,8 +29,20 @@ except ImportError:
 
 from .ai_service import AIProviderError, AIReviewRequestContext, AIReviewService
 from .demo_service import DemoDataService
-from .github_service import GitHubConfig, GitHubService
-from .job_queue import PersistentJobQueue
+from .github_cache import ConditionalResponseCache, PullDiffCache, parse_endpoint_ttls
+from .github_rate_limit import GitHubRateLimiter
+from .github_service import GitHubConfig, GitHubHTTPConfig, GitHubService
+from .job_archive import JobArchive
+from .job_queue import (
+    JobRetentionPolicy,
+    TERMINAL_STATUSES,
+    JobSpec,
+    PersistentJobQueue,
+    parse_retry_policies,
+    parse_type_limits,
+)
+from .redis_job_queue import RedisJobQueue, create_redis_client
+from .retry import RetryPolicy
 from .plugin_sandbox import PluginSandbox
 from .platform import (
     AgentContext,
@@ -66,7 +81,7 @@ from .security import (
     env_bool,
     env_int,
 )
-from .vault import LocalVault
+from .vault import AsyncVault, create_vault, run_expiry_sweeper, run_key_rotation
 
 VALID_APP_MODES = {"demo", "development", "production"}
 
@@ -107,12 +122,25 @@ GITHUB_APP_CLIENT_SECRET = os.getenv("GITHUB_APP_CLIENT_SECRET", "")
 GITHUB_APP_PRIVATE_KEY = os.getenv("GITHUB_APP_PRIVATE_KEY", "")
 GITHUB_OAUTH_REDIRECT_URI = os.getenv("GITHUB_OAUTH_REDIRECT_URI", "")
 APP_ENCRYPTION_KEY = os.getenv("APP_ENCRYPTION_KEY", "change_me")
+APP_ENCRYPTION_KEY_PREVIOUS = [
+    item.strip() for item in os.getenv("APP_ENCRYPTION_KEY_PREVIOUS", "").split(",") if item.strip()
+]
 PLUGIN_ROOT = os.getenv("PLUGIN_ROOT", "/app/plugins")
 
 security_config = SecurityConfig.from_env()
-vault = LocalVault(file_path=security_config.vault_file, master_key=APP_ENCRYPTION_KEY)
+vault = create_vault(
+    backend=security_config.vault_backend,
+    file_path=security_config.vault_file,
+    master_key=APP_ENCRYPTION_KEY,
+    previous_master_keys=APP_ENCRYPTION_KEY_PREVIOUS,
+    cache_enabled=security_config.vault_cache_enabled,
+    flush_interval_seconds=security_config.vault_flush_interval_ms / 1000,
+    journal_enabled=security_config.vault_journal_enabled,
+    journal_compact_records=security_config.vault_journal_compact_records,
+)
+async_vault = AsyncVault(vault)
 audit_logger = AuditLogger(file_path=security_config.audit_log_file)
-token_service = TokenService(config=security_config, vault=vault)
+token_service = TokenService(config=security_config, vault=async_vault)
 plugin_allowlist = {
     item.strip() for item in os.getenv("PLUGIN_ALLOWLIST", "").split(",") if item.strip()
 }
@@ -129,8 +157,36 @@ github_service = GitHubService(
         app_private_key=GITHUB_APP_PRIVATE_KEY,
         oauth_redirect_uri=GITHUB_OAUTH_REDIRECT_URI,
     ),
-    vault=vault,
+    vault=async_vault,
     audit_logger=audit_logger,
+    http_config=GitHubHTTPConfig(
+        max_connections=max(1, env_int("GITHUB_HTTP_MAX_CONNECTIONS", 50)),
+        max_keepalive_connections=max(0, env_int("GITHUB_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry_seconds=max(1, env_int("GITHUB_HTTP_KEEPALIVE_SECONDS", 30)),
+        http2=env_bool("GITHUB_HTTP2", False),
+    ),
+    page_concurrency=max(1, env_int("GITHUB_PAGE_CONCURRENCY", 4)),
+    rate_limiter=GitHubRateLimiter(
+        pace_below=max(0, env_int("GITHUB_RATE_LIMIT_PACE_BELOW", 100)),
+        max_wait_seconds=max(0, env_int("GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", 60)),
+        max_retries=max(0, env_int("GITHUB_RATE_LIMIT_RETRIES", 3)),
+    ),
+    response_cache=(
+        ConditionalResponseCache(
+            max_entries=max(1, env_int("GITHUB_CACHE_MAX_ENTRIES", 1000)),
+            default_ttl_seconds=max(0, env_int("GITHUB_CACHE_TTL_SECONDS", 30)),
+            endpoint_ttls=parse_endpoint_ttls(
+                os.getenv("GITHUB_CACHE_TTLS", "repos=60,pulls=15,issues=30,collaborators=300,pull_detail=0")
+            ),
+        )
+        if env_bool("GITHUB_CACHE_ENABLED", True)
+        else None
+    ),
+    diff_cache=(
+        PullDiffCache(max_entries=max(1, env_int("GITHUB_DIFF_CACHE_ENTRIES", 128)))
+        if env_bool("GITHUB_CACHE_ENABLED", True)
+        else None
+    ),
 )
 ai_review_service = AIReviewService(
     provider_name=AI_PROVIDER,
@@ -140,12 +196,56 @@ ai_review_service = AIReviewService(
     openai_api_key=OPENAI_API_KEY,
     openai_model=OPENAI_MODEL,
 )
-job_queue = PersistentJobQueue(
-    vault=vault,
-    audit_logger=audit_logger,
-    poll_interval_seconds=max(0, env_int("JOB_QUEUE_POLL_SECONDS", 1)),
-    retry_base_seconds=max(1, env_int("JOB_RETRY_BASE_SECONDS", 2)),
+default_retry_policy = RetryPolicy(
+    base_seconds=max(1, env_int("JOB_RETRY_BASE_SECONDS", 2)),
+    max_seconds=max(1, env_int("JOB_RETRY_MAX_SECONDS", 300)),
+    jitter=env_bool("JOB_RETRY_JITTER", True),
 )
+job_queue_options: dict[str, Any] = {
+    "audit_logger": audit_logger,
+    "default_retry_policy": default_retry_policy,
+    "retry_policies": parse_retry_policies(
+        os.getenv("JOB_RETRY_POLICIES", "ai_review=5:600"),
+        default=default_retry_policy,
+    ),
+    "worker_count": max(1, env_int("JOB_QUEUE_WORKERS", 4)),
+    "type_concurrency": parse_type_limits(os.getenv("JOB_TYPE_CONCURRENCY", "ai_review=2")),
+    "drain_timeout_seconds": max(0, env_int("JOB_QUEUE_DRAIN_SECONDS", 30)),
+    "retention": JobRetentionPolicy(
+        max_age_seconds={
+            "completed": max(0, env_int("JOB_RETENTION_COMPLETED_SECONDS", 7 * 86400)),
+            "failed": max(0, env_int("JOB_RETENTION_FAILED_SECONDS", 30 * 86400)),
+        },
+        max_count={
+            "completed": max(0, env_int("JOB_RETENTION_COMPLETED_MAX", 1000)),
+            "failed": max(0, env_int("JOB_RETENTION_FAILED_MAX", 1000)),
+        },
+        compaction_interval_seconds=max(60, env_int("JOB_COMPACTION_INTERVAL_SECONDS", 3600)),
+    ),
+    "archive": JobArchive(os.getenv("JOB_ARCHIVE_FILE", "/data/jobs/archive.jsonl.gz")),
+    "default_execution_timeout_seconds": max(1, env_int("JOB_EXECUTION_TIMEOUT_SECONDS", 900)),
+    "execution_timeouts": parse_type_limits(os.getenv("JOB_EXECUTION_TIMEOUTS", "ai_review=300")),
+}
+JOB_EVENTS_KEEPALIVE_SECONDS = max(1, env_int("JOB_EVENTS_KEEPALIVE_SECONDS", 15))
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "vault").strip().lower()
+job_queue: PersistentJobQueue | RedisJobQueue
+if JOB_QUEUE_BACKEND == "redis":
+    job_queue = RedisJobQueue(
+        redis=create_redis_client(REDIS_URL),
+        key_prefix=os.getenv("JOB_QUEUE_REDIS_PREFIX", "gitvibedev:jobs"),
+        visibility_timeout_seconds=max(1, env_int("JOB_VISIBILITY_TIMEOUT_SECONDS", 300)),
+        poll_interval_seconds=1.0,
+        **job_queue_options,
+    )
+elif JOB_QUEUE_BACKEND == "vault":
+    job_queue = PersistentJobQueue(
+        vault=async_vault,
+        poll_interval_seconds=max(0, env_int("JOB_QUEUE_POLL_SECONDS", 30)),
+        lease_seconds=max(1, env_int("JOB_LEASE_SECONDS", 60)),
+        **job_queue_options,
+    )
+else:
+    raise RuntimeError(f"Unknown JOB_QUEUE_BACKEND '{JOB_QUEUE_BACKEND}'. Expected 'vault' or 'redis'.")
 demo_data = DemoDataService()
 event_bus = AsyncEventBus(max_events=max(100, env_int("EVENT_BUS_MAX_EVENTS", 1000)))
 plugin_framework = PluginFramework(
@@ -165,6 +265,8 @@ git_provider_router.register(GitHubGitProvider(github_service))
 git_provider_router.register(GitLabGitProvider())
 git_provider_router.register(DemoGitProvider(demo_data))
 service_boundaries = ServiceBoundaryCatalog()
+vault_rotation_task: asyncio.Task[dict[str, Any]] | None = None
+vault_sweeper_task: asyncio.Task[None] | None = None
 app = FastAPI(title="GitVibeDev Backend", version="0.2.0")
 bearer = HTTPBearer(auto_error=False)
 
@@ -196,6 +298,11 @@ class TokenRefreshRequest(BaseModel):
     refresh_token: str = Field(min_length=16)
 
 
+class VaultKeyRotationRequest(BaseModel):
+    new_master_key: str = Field(min_length=16, max_length=512)
+    batch_size: int = Field(default=100, ge=1, le=10_000)
+
+
 class OAuthTokenStoreRequest(BaseModel):
     provider: str = Field(min_length=2, max_length=64)
     owner: str = Field(min_length=2, max_length=128)
@@ -229,6 +336,18 @@ class AIReviewRequest(BaseModel):
 
 class AIReviewJobRequest(AIReviewRequest):
     max_retries: int = Field(default=2, ge=0, le=8)
+    priority: str = Field(default="normal", pattern="^(high|normal|low)$")
+
+
+class AIReviewJobBatchRequest(BaseModel):
+    jobs: list[AIReviewJobRequest] = Field(min_length=1, max_length=100)
+
+
+class DeadLetterReplayRequest(BaseModel):
+    job_ids: list[str] | None = Field(default=None, max_length=500)
+    type: str | None = Field(default=None, max_length=64)
+    limit: int = Field(default=100, ge=1, le=500)
+    spread_seconds: int = Field(default=60, ge=0, le=3600)
 
 
 class AgentRunRequest(BaseModel):
@@ -281,6 +400,23 @@ def get_git_provider(provider_hint: str | None) -> Any:
         raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
 
 
+def encode_page_cursor(page: int, per_page: int) -> str:
+    raw = json.dumps({"page": page, "per_page": per_page}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(cursor: str) -> tuple[int, int]:
+    """Return ``(page, per_page)`` from an opaque list cursor; page size is fixed per cursor."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        page, per_page = int(data["page"]), int(data["per_page"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from None
+    if page < 1 or not 1 <= per_page <= 100:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return page, per_page
+
+
 class HealthProbePlugin(BaseSDKPlugin):
     descriptor = PluginDescriptor(
         name="health-probe",
@@ -426,14 +562,34 @@ job_queue.register_handler("ai_review", run_ai_review_job)
 
 @app.on_event("startup")
 async def startup_event() -> None:
+    global vault_sweeper_task
     if DEMO_MODE:
         demo_data.seed()
+    await github_service.start()
     await job_queue.start()
+    vault_sweeper_task = asyncio.create_task(
+        run_expiry_sweeper(
+            async_vault,
+            interval_seconds=security_config.vault_sweep_interval_seconds,
+        )
+    )
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    global vault_sweeper_task
     await job_queue.stop()
+    if vault_rotation_task is not None and not vault_rotation_task.done():
+        vault_rotation_task.cancel()
+    if vault_sweeper_task is not None:
+        vault_sweeper_task.cancel()
+        try:
+            await vault_sweeper_task
+        except asyncio.CancelledError:
+            pass
+        vault_sweeper_task = None
+    await github_service.aclose()
+    await async_vault.aclose()
 
 
 async def get_auth_context(
@@ -549,6 +705,7 @@ async def health() -> JSONResponse:
         "ai_provider": ai_review_service.provider_name,
         "demo_mode": DEMO_MODE,
         "services": services,
+        "github_rate_limit": github_service.rate_limit_health(),
     }
     return JSONResponse(status_code=200, content=payload)
 
@@ -582,7 +739,7 @@ async def issue_token(
         )
         raise HTTPException(status_code=401, detail="Invalid bootstrap token.")
 
-    issued = token_service.issue_token_pair(subject=payload.username, role=payload.role)
+    issued = await token_service.issue_token_pair(subject=payload.username, role=payload.role)
     audit_logger.security(
         "token_issued",
         actor=payload.username,
@@ -593,7 +750,7 @@ async def issue_token(
 
 @app.post("/api/auth/refresh")
 async def refresh_token(payload: TokenRefreshRequest) -> dict[str, Any]:
-    issued = token_service.rotate_refresh_token(payload.refresh_token)
+    issued = await token_service.rotate_refresh_token(payload.refresh_token)
     audit_logger.security(
         "refresh_token_rotated",
         actor="refresh-flow",
@@ -609,7 +766,7 @@ async def refresh_token(payload: TokenRefreshRequest) -> dict[str, Any]:
 async def rotate_signing_key(
     context: AuthContext = Depends(require_role("admin")),
 ) -> dict[str, Any]:
-    new_kid = token_service.rotate_signing_key()
+    new_kid = await token_service.rotate_signing_key()
     audit_logger.security(
         "jwt_signing_key_rotated",
         actor=context.subject,
@@ -618,6 +775,49 @@ async def rotate_signing_key(
     return {"status": "rotated", "kid": new_kid}
 
 
+@app.delete("/api/auth/sessions/{subject}")
+async def revoke_subject_sessions(
+    subject: str,
+    context: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    revoked = await token_service.revoke_subject_sessions(subject)
+    audit_logger.security(
+        "refresh_sessions_revoked",
+        actor=context.subject,
+        details={"subject": subject, "revoked_sessions": revoked},
+    )
+    return {"status": "revoked", "subject": subject, "revoked_sessions": revoked}
+
+
+@app.post("/api/vault/rotate-master-key")
+async def rotate_vault_master_key(
+    payload: VaultKeyRotationRequest,
+    context: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    global vault_rotation_task
+    task_running = vault_rotation_task is not None and not vault_rotation_task.done()
+    rotation_state = await async_vault.run(vault.rotation_status)
+    if task_running or rotation_state.get("status") == "running":
+        raise HTTPException(status_code=409, detail="A vault key rotation is already running.")
+    rotation = await async_vault.run(vault.begin_key_rotation, payload.new_master_key)
+    vault_rotation_task = asyncio.create_task(
+        run_key_rotation(async_vault, batch_size=payload.batch_size)
+    )
+    audit_logger.security(
+        "vault_key_rotation_started",
+        actor=context.subject,
+        details={"total_records": rotation.get("total_records", 0)},
+    )
+    return {"rotation": rotation}
+
+
+@app.get("/api/vault/rotation")
+async def vault_rotation_status(
+    _: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    return {"rotation": await async_vault.run(vault.rotation_status)}
+
+
 @app.post("/api/oauth/token")
 async def store_oauth_token(
     payload: OAuthTokenStoreRequest,
@@ -625,7 +825,7 @@ async def store_oauth_token(
 ) -> dict[str, Any]:
     key = oauth_vault_key(payload.provider, payload.owner)
     fingerprint = sha256(payload.access_token.encode("utf-8")).hexdigest()
-    vault.set(
+    await async_vault.aset(
         key,
         {
             "provider": payload.provider,
@@ -657,7 +857,7 @@ async def oauth_token_metadata(
     _: AuthContext = Depends(require_role("admin")),
 ) -> dict[str, Any]:
     key = oauth_vault_key(provider, owner)
-    stored = vault.get(key)
+    stored = await async_vault.aget(key)
     if not isinstance(stored, dict):
         raise HTTPException(status_code=404, detail="OAuth token not found.")
     return {
@@ -679,7 +879,7 @@ async def github_oauth_start(
     if DEMO_MODE:
         return {"status": "demo", "detail": "GitHub OAuth is not required in demo mode."}
     resolved_owner = resolve_oauth_owner(owner_hint, context)
-    payload = github_service.create_oauth_start(
+    payload = await github_service.create_oauth_start(
         redirect_uri=redirect_uri,
         scope=scope,
         owner_hint=resolved_owner,
@@ -712,36 +912,49 @@ async def github_oauth_owner_status(
     owner: str,
     _: AuthContext = Depends(require_role("viewer")),
 ) -> dict[str, Any]:
-    return github_service.oauth_metadata(owner.lower())
+    return await github_service.oauth_metadata(owner.lower())
+
+
+@app.get("/api/github/metrics")
+async def github_metrics(_: AuthContext = Depends(require_role("admin"))) -> dict[str, Any]:
+    return github_service.metrics()
 
 
 @app.get("/api/repos")
 async def list_repositories(
     limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, max_length=256),
     oauth_owner: str | None = Query(default=None, max_length=128),
     git_provider: str = Query(default="github", max_length=32),
     context: AuthContext | None = Depends(demo_or_viewer_context),
 ) -> dict[str, Any]:
     provider = get_git_provider(git_provider)
-    if DEMO_MODE:
-        try:
-            repos = await provider.list_repositories(oauth_owner="demo", limit=limit)
-        except GitProviderError as exc:
-            raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
-        return {"provider": provider.name, "repos": repos}
-    resolved_oauth_owner = resolve_oauth_owner(oauth_owner, context)
+    page, per_page = decode_page_cursor(cursor) if cursor else (1, limit)
+    resolved_oauth_owner = "demo" if DEMO_MODE else resolve_oauth_owner(oauth_owner, context)
     try:
-        repos = await provider.list_repositories(oauth_owner=resolved_oauth_owner, limit=limit)
+        result = await provider.list_repositories_page(
+            oauth_owner=resolved_oauth_owner,
+            limit=per_page,
+            page=page,
+        )
     except GitProviderError as exc:
         raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
-    return {"provider": provider.name, "owner": resolved_oauth_owner, "repos": repos}
+    next_page = result.get("next_page")
+    payload: dict[str, Any] = {
+        "provider": provider.name,
+        "repos": result["repos"],
+        "next_cursor": encode_page_cursor(next_page, per_page) if next_page else None,
+    }
+    if not DEMO_MODE:
+        payload["owner"] = resolved_oauth_owner
+    return payload
 
 
 @app.get("/api/repos/{owner}/{repo_name}/pulls")
 async def list_pull_requests(
     owner: str,
     repo_name: str,
-    limit: int = Query(default=50, ge=1, le=100),
+    limit: int = Query(default=50, ge=1, le=1000),
     state_filter: str = Query(default="open", alias="state", pattern="^(open|closed|all)$"),
     oauth_owner: str | None = Query(default=None, max_length=128),
     git_provider: str = Query(default="github", max_length=32),
@@ -773,7 +986,7 @@ async def list_pull_requests(
 async def list_pull_requests_legacy(
     repo_name: str,
     owner: str | None = Query(default=None, max_length=128),
-    limit: int = Query(default=50, ge=1, le=100),
+    limit: int = Query(default=50, ge=1, le=1000),
     state_filter: str = Query(default="open", alias="state", pattern="^(open|closed|all)$"),
     oauth_owner: str | None = Query(default=None, max_length=128),
     git_provider: str = Query(default="github", max_length=32),
@@ -799,7 +1012,7 @@ async def list_pull_requests_legacy(
 async def list_issues(
     owner: str,
     repo_name: str,
-    limit: int = Query(default=50, ge=1, le=100),
+    limit: int = Query(default=50, ge=1, le=1000),
     state_filter: str = Query(default="open", alias="state", pattern="^(open|closed|all)$"),
     oauth_owner: str | None = Query(default=None, max_length=128),
     git_provider: str = Query(default="github", max_length=32),
@@ -877,7 +1090,7 @@ async def merge_pull_request(
 async def list_collaborators(
     owner: str,
     repo_name: str,
-    limit: int = Query(default=100, ge=1, le=100),
+    limit: int = Query(default=100, ge=1, le=1000),
     oauth_owner: str | None = Query(default=None, max_length=128),
     git_provider: str = Query(default="github", max_length=32),
     context: AuthContext | None = Depends(demo_or_viewer_context),
@@ -1026,15 +1239,11 @@ async def review_pull_request_with_ai(
     return {"status": "completed", "review": review}
 
 
-@app.post("/api/ai/review/jobs")
-async def enqueue_ai_review_job(
-    payload: AIReviewJobRequest,
-    context: AuthContext | None = Depends(demo_or_viewer_context),
-) -> dict[str, Any]:
+def ai_review_job_spec(payload: AIReviewJobRequest, context: AuthContext | None) -> JobSpec:
     oauth_owner = ""
     if not DEMO_MODE:
         oauth_owner = resolve_oauth_owner(payload.oauth_owner, context)
-    queued_job = await job_queue.enqueue(
+    return JobSpec(
         job_type="ai_review",
         payload={
             "owner": payload.owner.lower(),
@@ -1045,10 +1254,172 @@ async def enqueue_ai_review_job(
             "focus": payload.focus or "",
         },
         max_retries=payload.max_retries,
+        priority=payload.priority,
+    )
+
+
+@app.post("/api/ai/review/jobs")
+async def enqueue_ai_review_job(
+    payload: AIReviewJobRequest,
+    context: AuthContext | None = Depends(demo_or_viewer_context),
+) -> dict[str, Any]:
+    spec = ai_review_job_spec(payload, context)
+    queued_job = await job_queue.enqueue(
+        job_type=spec.job_type,
+        payload=spec.payload,
+        max_retries=spec.max_retries,
+        priority=spec.priority,
     )
     return {"job": queued_job}
 
 
+@app.post("/api/ai/review/jobs:batch")
+async def enqueue_ai_review_jobs_batch(
+    payload: AIReviewJobBatchRequest,
+    context: AuthContext | None = Depends(demo_or_viewer_context),
+) -> dict[str, Any]:
+    specs = [ai_review_job_spec(item, context) for item in payload.jobs]
+    queued_jobs = await job_queue.enqueue_many(specs)
+    return {"jobs": queued_jobs, "count": len(queued_jobs)}
+
+
+def parse_job_ids(raw: str, *, limit: int) -> list[str]:
+    job_ids = list(dict.fromkeys(item.strip() for item in raw.split(",") if item.strip()))
+    if len(job_ids) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} job ids per request.")
+    return job_ids
+
+
+def format_sse(event: str, data: dict[str, Any], event_id: int | None = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def job_event_stream(job_ids: list[str]) -> AsyncIterator[str]:
+    """SSE frames for ``job_ids`` until every one of them is finished.
+
+    Transitions are pushed from the queue's watchers. On every keepalive tick
+    the stream also re-reads the jobs, which catches changes made by other
+    replicas and snapshots dropped for a slow reader.
+    """
+    subscription = job_queue.watchers.subscribe(job_ids)
+    sequence = itertools.count(1)
+    last_sent: dict[str, tuple[Any, ...]] = {}
+    try:
+        updates = await job_queue.list_jobs(job_ids=job_ids, limit=len(job_ids))
+        pending = {str(job["id"]) for job in updates}
+        while True:
+            for job in updates:
+                job_id = str(job["id"])
+                if job_id not in pending:
+                    continue
+                marker = (job.get("status"), job.get("attempts"), job.get("updated_at"))
+                if last_sent.get(job_id) != marker:
+                    last_sent[job_id] = marker
+                    yield format_sse("job", job, next(sequence))
+                if job.get("status") in TERMINAL_STATUSES:
+                    pending.discard(job_id)
+            if not pending:
+                break
+            try:
+                updates = [await asyncio.wait_for(subscription.get(), timeout=JOB_EVENTS_KEEPALIVE_SECONDS)]
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                updates = await job_queue.list_jobs(job_ids=sorted(pending), limit=len(pending))
+        yield format_sse("end", {"job_ids": job_ids})
+    finally:
+        job_queue.watchers.unsubscribe(subscription)
+
+
+async def job_events_response(job_ids: list[str]) -> StreamingResponse:
+    if not await job_queue.list_jobs(job_ids=job_ids, limit=len(job_ids)):
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return StreamingResponse(
+        job_event_stream(job_ids),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/jobs/events")
+async def stream_jobs_events(
+    ids: str = Query(min_length=1, max_length=4000),
+    _: AuthContext | None = Depends(demo_or_viewer_context),
+) -> StreamingResponse:
+    return await job_events_response(parse_job_ids(ids, limit=100))
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    _: AuthContext | None = Depends(demo_or_viewer_context),
+) -> StreamingResponse:
+    return await job_events_response([job_id])
+
+
+@app.get("/api/jobs")
+async def list_jobs(
+    ids: str | None = Query(default=None, max_length=20000),
+    status_filter: str | None = Query(
+        default=None,
+        alias="status",
+        pattern="^(queued|running|completed|failed)$",
+    ),
+    job_type: str | None = Query(default=None, alias="type", max_length=64),
+    limit: int = Query(default=100, ge=1, le=500),
+    _: AuthContext | None = Depends(demo_or_viewer_context),
+) -> dict[str, Any]:
+    job_ids = parse_job_ids(ids, limit=500) if ids is not None else None
+    jobs = await job_queue.list_jobs(
+        job_ids=job_ids,
+        status=status_filter,
+        job_type=job_type,
+        limit=limit,
+    )
+    return {"jobs": jobs, "count": len(jobs)}
+
+
+@app.post("/api/jobs/compact")
+async def compact_jobs(
+    context: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    report = await job_queue.compact()
+    audit_logger.security("jobs_compacted", actor=context.subject, details=report)
+    return {"status": "compacted", **report}
+
+
+@app.get("/api/jobs/dead-letter")
+async def list_dead_letter_jobs(
+    job_type: str | None = Query(default=None, alias="type", max_length=64),
+    limit: int = Query(default=100, ge=1, le=500),
+    _: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    jobs = await job_queue.list_dead_letters(job_type=job_type, limit=limit)
+    return {"jobs": jobs, "count": len(jobs)}
+
+
+@app.post("/api/jobs/dead-letter/replay")
+async def replay_dead_letter_jobs(
+    payload: DeadLetterReplayRequest,
+    context: AuthContext = Depends(require_role("admin")),
+) -> dict[str, Any]:
+    replayed = await job_queue.replay_dead_letters(
+        job_ids=payload.job_ids,
+        job_type=payload.type,
+        limit=payload.limit,
+        spread_seconds=payload.spread_seconds,
+    )
+    audit_logger.security(
+        "dead_letter_jobs_replayed",
+        actor=context.subject,
+        details={"count": len(replayed), "job_type": payload.type, "spread_seconds": payload.spread_seconds},
+    )
+    return {"status": "replayed", "replayed": len(replayed), "job_ids": replayed}
+
+
 @app.get("/api/jobs/{job_id}")
 async def get_job_status(
     job_id: str,
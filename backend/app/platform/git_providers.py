@@ -18,6 +18,12 @@ class BaseGitProvider(Protocol):
     async def list_repositories(self, *, oauth_owner: str, limit: int) -> list[dict[str, Any]]:
         raise NotImplementedError
 
+    async def list_repositories_page(
+        self, *, oauth_owner: str, limit: int, page: int
+    ) -> dict[str, Any]:
+        """Return ``{"repos": [...], "next_page": int | None}`` for 1-based ``page``."""
+        raise NotImplementedError
+
     async def list_pull_requests(
         self,
         *,
@@ -104,6 +110,15 @@ class GitHubGitProvider:
     async def list_repositories(self, *, oauth_owner: str, limit: int) -> list[dict[str, Any]]:
         return await self._github.list_repositories(oauth_owner=oauth_owner, limit=limit)
 
+    async def list_repositories_page(
+        self, *, oauth_owner: str, limit: int, page: int
+    ) -> dict[str, Any]:
+        return await self._github.list_repositories_page(
+            oauth_owner=oauth_owner,
+            limit=limit,
+            page=page,
+        )
+
     async def list_pull_requests(
         self,
         *,
@@ -225,6 +240,16 @@ class DemoGitProvider:
     async def list_repositories(self, *, oauth_owner: str, limit: int) -> list[dict[str, Any]]:
         return self._demo.list_repositories()[:limit]
 
+    async def list_repositories_page(
+        self, *, oauth_owner: str, limit: int, page: int
+    ) -> dict[str, Any]:
+        repos = self._demo.list_repositories()
+        start = (page - 1) * limit
+        return {
+            "repos": repos[start : start + limit],
+            "next_page": page + 1 if start + limit < len(repos) else None,
+        }
+
     async def list_pull_requests(
         self,
         *,
@@ -314,6 +339,11 @@ class GitLabGitProvider:
     async def list_repositories(self, *, oauth_owner: str, limit: int) -> list[dict[str, Any]]:
         self._not_supported()
 
+    async def list_repositories_page(
+        self, *, oauth_owner: str, limit: int, page: int
+    ) -> dict[str, Any]:
+        self._not_supported()
+
     async def list_pull_requests(
         self,
         *,
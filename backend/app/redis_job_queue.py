@@ -0,0 +1,703 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections import deque
+from typing import Any
+
+from .job_archive import JobArchive
+from .job_queue import (
+    DEFAULT_PRIORITY,
+    JOB_PRIORITIES,
+    TERMINAL_STATUSES,
+    JobHandler,
+    JobRetentionPolicy,
+    JobSpec,
+    JobWatchers,
+    new_job,
+    public_job,
+    run_with_timeout,
+)
+from .retry import RetryPolicy
+from .security import AuditLogger
+
+# redis is optional: only needed when JOB_QUEUE_BACKEND=redis.
+try:
+    from redis.asyncio import Redis
+    from redis.exceptions import RedisError, WatchError
+except ImportError:  # pragma: no cover - depends on optional dependency
+    Redis = None  # type: ignore[assignment,misc]
+    RedisError = OSError  # type: ignore[assignment,misc]
+    WatchError = OSError  # type: ignore[assignment,misc]
+
+LOGGER = logging.getLogger("gitvibedev.redis_job_queue")
+
+# (stream, message id, job id)
+StreamMessage = tuple[str, str, str]
+
+
+def create_redis_client(url: str) -> Any:
+    if Redis is None:
+        raise RuntimeError("JOB_QUEUE_BACKEND=redis requires the 'redis' package to be installed.")
+    return Redis.from_url(url, decode_responses=True)
+
+
+class RedisJobQueue:
+    """Job queue shared by every backend replica through Redis streams.
+
+    Offers the same interface as ``PersistentJobQueue``. Each job record is a
+    JSON string at ``<prefix>:job:<id>``. Runnable jobs are messages on one
+    stream per priority, read through a single consumer group, so each
+    message goes to exactly one consumer across all replicas. A message stays
+    pending until its job reaches a new state. A running job's worker
+    re-claims its message every third of ``visibility_timeout_seconds`` as a
+    heartbeat. Messages idle for longer than the timeout belong to a dead or
+    stuck consumer, and the maintenance loop of any replica reclaims them.
+    A reclaimed job that had not started is run. A reclaimed job that was
+    already running counts as a failed attempt, so a job that keeps killing
+    its worker ends up dead-lettered. Delivery is therefore at least once.
+
+    Retries wait in the ``<prefix>:delayed`` sorted set, scored by
+    ``run_after``. Every step that moves a job between the record, the
+    delayed set and a stream runs as one ``MULTI``/``EXEC`` transaction, so a
+    replica that dies midway never leaves a job in none of them. Promotions
+    and replays ``WATCH`` the job record and rewrite it, so when replicas race
+    only one transaction commits. Dead letters are tracked in ``<prefix>:dead``, and
+    finished jobs in ``<prefix>:finished:<status>`` for retention.
+    ``type_concurrency`` caps are enforced per replica: a job whose type is at
+    its cap is parked in the delayed set for one poll interval instead of
+    holding a worker, so other types keep flowing. Handlers are cancelled
+    after their ``execution_timeouts`` entry, or after
+    ``default_execution_timeout_seconds``.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis: Any,
+        audit_logger: AuditLogger,
+        key_prefix: str = "gitvibedev:jobs",
+        consumer_name: str | None = None,
+        visibility_timeout_seconds: float = 300.0,
+        poll_interval_seconds: float = 1.0,
+        default_retry_policy: RetryPolicy | None = None,
+        retry_policies: dict[str, RetryPolicy] | None = None,
+        worker_count: int = 1,
+        type_concurrency: dict[str, int] | None = None,
+        drain_timeout_seconds: float = 30.0,
+        retention: JobRetentionPolicy | None = None,
+        archive: JobArchive | None = None,
+        default_execution_timeout_seconds: float | None = None,
+        execution_timeouts: dict[str, float] | None = None,
+    ) -> None:
+        self._redis = redis
+        self._audit_logger = audit_logger
+        self._prefix = key_prefix.rstrip(":")
+        self._group = f"{self._prefix}:workers"
+        self._consumer = consumer_name or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._streams = [
+            f"{self._prefix}:stream:{name}"
+            for name, _ in sorted(JOB_PRIORITIES.items(), key=lambda item: item[1])
+        ]
+        self._delayed_key = f"{self._prefix}:delayed"
+        self._dead_key = f"{self._prefix}:dead"
+        self._visibility_timeout_seconds = max(1.0, visibility_timeout_seconds)
+        self._poll_interval_seconds = max(0.05, poll_interval_seconds)
+        self._default_retry_policy = default_retry_policy or RetryPolicy()
+        self._retry_policies = dict(retry_policies or {})
+        self._worker_count = max(1, worker_count)
+        self._type_concurrency = dict(type_concurrency or {})
+        self._drain_timeout_seconds = max(0.0, drain_timeout_seconds)
+        self._retention = retention
+        self._archive = archive
+        self._default_execution_timeout_seconds = default_execution_timeout_seconds
+        self._execution_timeouts = dict(execution_timeouts or {})
+        self._handlers: dict[str, JobHandler] = {}
+        self._claimed: deque[StreamMessage] = deque()
+        self._running: set[str] = set()
+        self._type_slots: dict[str, asyncio.Semaphore] = {}
+        self._worker_tasks: list[asyncio.Task[None]] = []
+        self._maintenance_task: asyncio.Task[None] | None = None
+        self._stop_event: asyncio.Event | None = None
+        # Only sees transitions made by this replica; stream readers resync
+        # from Redis to pick up the rest.
+        self.watchers = JobWatchers()
+
+    def register_handler(self, job_type: str, handler: JobHandler) -> None:
+        self._handlers[job_type] = handler
+
+    def retry_policy_for(self, job_type: str) -> RetryPolicy:
+        return self._retry_policies.get(job_type, self._default_retry_policy)
+
+    def execution_timeout_for(self, job_type: str) -> float | None:
+        return self._execution_timeouts.get(job_type, self._default_execution_timeout_seconds)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self._prefix}:job:{job_id}"
+
+    def _finished_key(self, status_value: str) -> str:
+        return f"{self._prefix}:finished:{status_value}"
+
+    def _stream_for(self, job: dict[str, Any]) -> str:
+        priority = str(job.get("priority", DEFAULT_PRIORITY))
+        level = JOB_PRIORITIES.get(priority, JOB_PRIORITIES[DEFAULT_PRIORITY])
+        return self._streams[level]
+
+    async def _load_job(self, job_id: str) -> dict[str, Any] | None:
+        raw = await self._redis.get(self._job_key(job_id))
+        if raw is None:
+            return None
+        job = json.loads(raw)
+        return job if isinstance(job, dict) else None
+
+    async def _load_jobs(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        if not job_ids:
+            return []
+        raw_values = await self._redis.mget([self._job_key(job_id) for job_id in job_ids])
+        jobs = [json.loads(raw) for raw in raw_values if raw is not None]
+        return [job for job in jobs if isinstance(job, dict)]
+
+    @staticmethod
+    def _dump(job: dict[str, Any]) -> str:
+        return json.dumps(job, separators=(",", ":"), sort_keys=True)
+
+    async def _save_job(self, job: dict[str, Any], *indexes: tuple[str, float]) -> None:
+        """Write ``job`` and add it to each ``(sorted set, score)`` in one transaction."""
+        job_id = str(job["id"])
+        if indexes:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.set(self._job_key(job_id), self._dump(job))
+                for name, score in indexes:
+                    pipe.zadd(name, {job_id: score})
+                await pipe.execute()
+        else:
+            await self._redis.set(self._job_key(job_id), self._dump(job))
+        self.watchers.publish(job)
+
+    async def _ensure_groups(self) -> None:
+        for stream in self._streams:
+            try:
+                await self._redis.xgroup_create(stream, self._group, id="0", mkstream=True)
+            except RedisError as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+
+    async def start(self) -> None:
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        if self._worker_tasks:
+            return
+        await self._ensure_groups()
+        # Created per start so the event and semaphores bind to the running loop.
+        self._stop_event = asyncio.Event()
+        self._type_slots = {
+            job_type: asyncio.Semaphore(limit) for job_type, limit in self._type_concurrency.items()
+        }
+        self._claimed.clear()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(self._stop_event), name=f"redis-job-worker-{index}")
+            for index in range(self._worker_count)
+        ]
+        self._maintenance_task = asyncio.create_task(
+            self._maintenance_loop(self._stop_event),
+            name="redis-job-maintenance",
+        )
+
+    async def stop(self) -> None:
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self._maintenance_task = None
+        if not self._worker_tasks:
+            return
+        # Workers notice the stop event within one blocking read.
+        _, pending = await asyncio.wait(
+            self._worker_tasks,
+            timeout=self._drain_timeout_seconds + self._poll_interval_seconds,
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Unacknowledged messages are reclaimed by another replica.
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def enqueue(
+        self,
+        *,
+        job_type: str,
+        payload: dict[str, Any],
+        max_retries: int,
+        priority: str = DEFAULT_PRIORITY,
+    ) -> dict[str, Any]:
+        job = new_job(
+            job_type=job_type,
+            payload=payload,
+            max_retries=max_retries,
+            priority=priority,
+        )
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._job_key(str(job["id"])), self._dump(job))
+            pipe.xadd(self._stream_for(job), {"job_id": str(job["id"])})
+            await pipe.execute()
+        self.watchers.publish(job)
+        self._audit_logger.security(
+            "job_enqueued",
+            actor="system",
+            details={"job_id": job["id"], "job_type": job_type},
+        )
+        return public_job(job)
+
+    async def enqueue_many(self, specs: list[JobSpec]) -> list[dict[str, Any]]:
+        """Enqueue ``specs`` in one transaction (``MSET`` plus an ``XADD`` each) with one audit line."""
+        jobs = [
+            new_job(
+                job_type=spec.job_type,
+                payload=spec.payload,
+                max_retries=spec.max_retries,
+                priority=spec.priority,
+            )
+            for spec in specs
+        ]
+        if not jobs:
+            return []
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.mset({self._job_key(str(job["id"])): self._dump(job) for job in jobs})
+            for job in jobs:
+                pipe.xadd(self._stream_for(job), {"job_id": str(job["id"])})
+            await pipe.execute()
+        for job in jobs:
+            self.watchers.publish(job)
+        self._audit_logger.security(
+            "jobs_enqueued",
+            actor="system",
+            details={
+                "count": len(jobs),
+                "job_types": sorted({str(job["type"]) for job in jobs}),
+            },
+        )
+        return [public_job(job) for job in jobs]
+
+    async def list_jobs(
+        self,
+        *,
+        job_ids: list[str] | None = None,
+        status: str | None = None,
+        job_type: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Same selection rules as ``PersistentJobQueue.list_jobs``."""
+        if job_ids is not None:
+            ordered_ids = list(dict.fromkeys(job_ids))
+            jobs = await self._load_jobs(ordered_ids)
+        else:
+            keys = [key async for key in self._redis.scan_iter(match=self._job_key("*"), count=500)]
+            prefix_length = len(self._job_key(""))
+            jobs = await self._load_jobs([key[prefix_length:] for key in keys])
+            jobs.sort(key=lambda job: float(job.get("enqueued_at", 0.0)), reverse=True)
+            ordered_ids = [str(job["id"]) for job in jobs]
+        found = {str(job["id"]): public_job(job) for job in jobs}
+        missing = [job_id for job_id in ordered_ids if job_id not in found]
+        if job_ids is not None and missing and self._archive is not None:
+            archived = await asyncio.to_thread(self._archive.find_many, missing)
+            found.update(
+                {job_id: {**public_job(record), "archived": True} for job_id, record in archived.items()}
+            )
+        selected = [
+            found[job_id]
+            for job_id in ordered_ids
+            if job_id in found
+            and (status is None or found[job_id]["status"] == status)
+            and (job_type is None or found[job_id]["type"] == job_type)
+        ]
+        return selected[: max(0, limit)]
+
+    async def get_job(self, job_id: str) -> dict[str, Any] | None:
+        job = await self._load_job(job_id)
+        if job is not None:
+            return public_job(job)
+        if self._archive is None:
+            return None
+        archived = await asyncio.to_thread(self._archive.find, job_id)
+        if archived is None:
+            return None
+        return {**public_job(archived), "archived": True}
+
+    @staticmethod
+    def _messages(entries: list[Any] | None) -> list[StreamMessage]:
+        messages: list[StreamMessage] = []
+        for stream, stream_entries in entries or []:
+            for message_id, fields in stream_entries:
+                messages.append((stream, message_id, str((fields or {}).get("job_id", ""))))
+        return messages
+
+    async def _next_message(self) -> StreamMessage | None:
+        if self._claimed:
+            return self._claimed.popleft()
+        # Drain lanes in priority order before blocking on all of them.
+        for stream in self._streams:
+            messages = self._messages(
+                await self._redis.xreadgroup(self._group, self._consumer, {stream: ">"}, count=1)
+            )
+            if messages:
+                self._claimed.extend(messages[1:])
+                return messages[0]
+        messages = self._messages(
+            await self._redis.xreadgroup(
+                self._group,
+                self._consumer,
+                {stream: ">" for stream in self._streams},
+                count=1,
+                block=int(self._poll_interval_seconds * 1000),
+            )
+        )
+        if not messages:
+            return None
+        # A multi-stream read can return one message per lane.
+        self._claimed.extend(messages[1:])
+        return messages[0]
+
+    async def _ack(self, stream: str, message_id: str) -> None:
+        await self._redis.xack(stream, self._group, message_id)
+        await self._redis.xdel(stream, message_id)
+
+    async def _heartbeat(self, stream: str, message_id: str) -> None:
+        interval = self._visibility_timeout_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._redis.xclaim(
+                    stream,
+                    self._group,
+                    self._consumer,
+                    min_idle_time=0,
+                    message_ids=[message_id],
+                    justid=True,
+                )
+            except RedisError:
+                LOGGER.warning("Job heartbeat failed for message %s; will retry.", message_id)
+
+    async def _worker_loop(self, stop_event: asyncio.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                message = await self._next_message()
+                if message is not None:
+                    await self._process(*message)
+            except RedisError:
+                LOGGER.exception("Redis job worker error; retrying.")
+                await asyncio.sleep(self._poll_interval_seconds)
+
+    async def _process(self, stream: str, message_id: str, job_id: str) -> None:
+        job = await self._load_job(job_id) if job_id else None
+        stale = (
+            job is None
+            or job.get("status") not in {"queued", "running"}
+            or (job.get("status") == "queued" and float(job.get("run_after", 0.0)) > time.time())
+        )
+        if stale:
+            # The job finished, was compacted, or waits in the delayed set for a retry.
+            await self._ack(stream, message_id)
+            return
+        if job.get("status") == "running":
+            if job_id in self._running:
+                # Reclaimed from this replica after a late heartbeat; its worker acks it.
+                return
+            # The consumer that started it died or stalled mid-run.
+            await self._mark_failed_or_retry(job, error_message="Job worker stopped responding; message reclaimed.")
+            await self._ack(stream, message_id)
+            return
+        job_type = str(job.get("type", ""))
+        slot = self._type_slots.get(job_type)
+        if slot is not None and slot.locked():
+            await self._defer(job, stream, message_id)
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(stream, message_id))
+        try:
+            if slot is not None:
+                # Free per the check above; nothing awaited in between.
+                await slot.acquire()
+            self._running.add(job_id)
+            try:
+                await self._execute(job)
+            finally:
+                self._running.discard(job_id)
+                if slot is not None:
+                    slot.release()
+            await self._ack(stream, message_id)
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+
+    async def _defer(self, job: dict[str, Any], stream: str, message_id: str) -> None:
+        """Park a job whose type is at its concurrency cap and release its message."""
+        job["status"] = "queued"
+        job["run_after"] = time.time() + self._poll_interval_seconds
+        await self._save_job(job, (self._delayed_key, job["run_after"]))
+        await self._ack(stream, message_id)
+
+    async def _execute(self, job: dict[str, Any]) -> None:
+        job_type = str(job.get("type", ""))
+        job["status"] = "running"
+        job["updated_at"] = int(time.time())
+        await self._save_job(job)
+        handler = self._handlers.get(job_type)
+        if handler is None:
+            await self._mark_failed_or_retry(
+                job,
+                error_message=f"No handler registered for job type '{job_type}'.",
+            )
+            return
+        payload = job.get("payload", {})
+        try:
+            result = await run_with_timeout(
+                asyncio.ensure_future(handler(payload if isinstance(payload, dict) else {})),
+                timeout_seconds=self.execution_timeout_for(job_type),
+            )
+        except Exception as exc:
+            await self._mark_failed_or_retry(job, error_message=str(exc))
+            return
+        job["status"] = "completed"
+        job["result"] = result
+        job["updated_at"] = int(time.time())
+        job["last_error"] = None
+        await self._save_job(job, (self._finished_key("completed"), job["updated_at"]))
+        self._audit_logger.security("job_completed", actor="system", details={"job_id": job["id"]})
+
+    async def _mark_failed_or_retry(self, job: dict[str, Any], *, error_message: str) -> None:
+        job_id = str(job["id"])
+        attempts = int(job.get("attempts", 0)) + 1
+        job["attempts"] = attempts
+        job["updated_at"] = int(time.time())
+        job["last_error"] = error_message
+        if attempts <= int(job.get("max_retries", 0)):
+            retry_delay = self.retry_policy_for(str(job.get("type", ""))).delay_seconds(attempts)
+            job["status"] = "queued"
+            job["run_after"] = time.time() + retry_delay
+            await self._save_job(job, (self._delayed_key, job["run_after"]))
+            self._audit_logger.security(
+                "job_retry_scheduled",
+                actor="system",
+                details={
+                    "job_id": job_id,
+                    "attempts": attempts,
+                    "retry_delay_seconds": round(retry_delay, 3),
+                },
+            )
+            return
+        job["status"] = "failed"
+        job["dead_lettered_at"] = int(time.time())
+        await self._save_job(
+            job,
+            (self._dead_key, job["dead_lettered_at"]),
+            (self._finished_key("failed"), job["updated_at"]),
+        )
+        self._audit_logger.security(
+            "job_failed",
+            actor="system",
+            details={"job_id": job_id, "attempts": attempts, "error": error_message, "dead_lettered": True},
+        )
+
+    async def _promote_due(self) -> int:
+        """Move retries whose ``run_after`` has passed back onto their stream."""
+        promoted = 0
+        due = await self._redis.zrangebyscore(self._delayed_key, "-inf", time.time(), start=0, num=100)
+        for job_id in due:
+            try:
+                promoted += int(await self._promote(job_id))
+            except WatchError:
+                # Another replica touched the job first; it stays delayed if still due.
+                continue
+        return promoted
+
+    async def _promote(self, job_id: str) -> bool:
+        key = self._job_key(job_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            raw = await pipe.get(key)
+            if await pipe.zscore(self._delayed_key, job_id) is None:
+                return False
+            job = json.loads(raw) if raw is not None else None
+            pipe.multi()
+            pipe.zrem(self._delayed_key, job_id)
+            runnable = isinstance(job, dict) and job.get("status") == "queued"
+            if runnable:
+                # Rewriting the watched record makes a racing replica's EXEC fail.
+                pipe.set(key, raw)
+                pipe.xadd(self._stream_for(job), {"job_id": job_id})
+            await pipe.execute()
+        return runnable
+
+    async def _reclaim_idle(self) -> int:
+        """Take over messages whose consumer stopped heartbeating."""
+        reclaimed = 0
+        for stream in self._streams:
+            result = await self._redis.xautoclaim(
+                stream,
+                self._group,
+                self._consumer,
+                min_idle_time=int(self._visibility_timeout_seconds * 1000),
+                start_id="0-0",
+                count=10,
+            )
+            for message_id, fields in result[1]:
+                if not fields:
+                    continue
+                self._claimed.append((stream, message_id, str(fields.get("job_id", ""))))
+                reclaimed += 1
+        if reclaimed:
+            self._audit_logger.security(
+                "jobs_reclaimed",
+                actor="system",
+                details={"count": reclaimed, "consumer": self._consumer},
+            )
+        return reclaimed
+
+    async def _maintenance_loop(self, stop_event: asyncio.Event) -> None:
+        next_compaction = time.time()
+        while not stop_event.is_set():
+            try:
+                await self._promote_due()
+                await self._reclaim_idle()
+                if self._retention is not None and time.time() >= next_compaction:
+                    next_compaction = time.time() + self._retention.compaction_interval_seconds
+                    report = await self.compact()
+                    if report["removed_jobs"]:
+                        self._audit_logger.security("jobs_compacted", actor="system", details=report)
+            except (RedisError, OSError, ValueError):
+                LOGGER.exception("Redis job maintenance failed; will retry.")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self._poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def list_dead_letters(
+        self,
+        *,
+        job_type: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Dead-lettered jobs, most recently failed first."""
+        jobs = await self._load_jobs(await self._redis.zrevrange(self._dead_key, 0, -1))
+        dead = [
+            job
+            for job in jobs
+            if job.get("status") == "failed" and (job_type is None or job.get("type") == job_type)
+        ]
+        return [public_job(job) for job in dead[: max(0, limit)]]
+
+    async def replay_dead_letters(
+        self,
+        *,
+        job_ids: list[str] | None = None,
+        job_type: str | None = None,
+        limit: int = 100,
+        spread_seconds: float = 0.0,
+    ) -> list[str]:
+        """Requeue dead-lettered jobs; same selection rules as ``PersistentJobQueue``."""
+        if job_ids is not None:
+            candidates = list(dict.fromkeys(job_ids))
+        else:
+            candidates = await self._redis.zrange(self._dead_key, 0, -1)
+        replayed: list[str] = []
+        now = time.time()
+        for job_id in candidates:
+            if len(replayed) >= max(0, limit):
+                break
+            try:
+                job = await self._replay(
+                    job_id,
+                    job_type=job_type,
+                    now=now,
+                    run_after=now + random.uniform(0.0, max(0.0, spread_seconds)),
+                )
+            except WatchError:
+                # A concurrent replay or update of the same job won.
+                continue
+            if job is not None:
+                self.watchers.publish(job)
+                replayed.append(job_id)
+        return replayed
+
+    async def _replay(
+        self,
+        job_id: str,
+        *,
+        job_type: str | None,
+        now: float,
+        run_after: float,
+    ) -> dict[str, Any] | None:
+        key = self._job_key(job_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            raw = await pipe.get(key)
+            job = json.loads(raw) if raw is not None else None
+            if not isinstance(job, dict) or job.get("status") != "failed" or job.get("dead_lettered_at") is None:
+                return None
+            if job_type is not None and job.get("type") != job_type:
+                return None
+            job["status"] = "queued"
+            job["attempts"] = 0
+            job["dead_lettered_at"] = None
+            job["replays"] = int(job.get("replays", 0)) + 1
+            job["updated_at"] = int(now)
+            job["run_after"] = run_after
+            job["enqueued_at"] = now
+            pipe.multi()
+            pipe.set(key, self._dump(job))
+            pipe.zrem(self._dead_key, job_id)
+            pipe.zrem(self._finished_key("failed"), job_id)
+            pipe.zadd(self._delayed_key, {job_id: run_after})
+            await pipe.execute()
+        return job
+
+    async def compact(self) -> dict[str, Any]:
+        """Archive and drop finished jobs beyond the retention policy."""
+        victims: list[str] = []
+        policy = self._retention
+        if policy is not None:
+            now = time.time()
+            for status_value in sorted(TERMINAL_STATUSES):
+                key = self._finished_key(status_value)
+                selected: set[str] = set()
+                max_age = policy.max_age_seconds.get(status_value)
+                if max_age is not None:
+                    selected.update(await self._redis.zrangebyscore(key, "-inf", now - max_age))
+                max_count = policy.max_count.get(status_value)
+                if max_count is not None:
+                    selected.update(await self._redis.zrevrange(key, max_count, -1))
+                if selected:
+                    victims.extend(sorted(selected))
+                    await self._redis.zrem(key, *selected)
+        jobs = await self._load_jobs(victims)
+        reclaimed_bytes = sum(
+            len(json.dumps(job, separators=(",", ":"), sort_keys=True)) for job in jobs
+        )
+        if jobs and self._archive is not None:
+            # Archive first: a crash before the delete only duplicates records.
+            await asyncio.to_thread(self._archive.append, jobs)
+        if victims:
+            await self._redis.delete(*(self._job_key(job_id) for job_id in victims))
+            await self._redis.zrem(self._dead_key, *victims)
+        remaining = 0
+        async for _ in self._redis.scan_iter(match=self._job_key("*"), count=500):
+            remaining += 1
+        return {
+            "archived_jobs": len(jobs) if self._archive is not None else 0,
+            "removed_jobs": len(jobs),
+            "reclaimed_bytes": reclaimed_bytes,
+            "remaining_jobs": remaining,
+            "archive_bytes": self._archive.size_bytes() if self._archive is not None else 0,
+        }
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with optional full jitter.
+
+    The n-th retry waits ``min(max_seconds, base_seconds * multiplier ** (n - 1))``
+    seconds, or a uniform random delay up to that ceiling with ``jitter`` so
+    retries of work that failed together do not hit the upstream in lockstep.
+    """
+
+    base_seconds: float = 2.0
+    max_seconds: float = 300.0
+    multiplier: float = 2.0
+    jitter: bool = True
+
+    def ceiling_seconds(self, attempts: int) -> float:
+        exponent = max(0, attempts - 1)
+        try:
+            raw = self.base_seconds * self.multiplier**exponent
+        except OverflowError:
+            raw = self.max_seconds
+        return max(0.0, min(self.max_seconds, raw))
+
+    def delay_seconds(self, attempts: int) -> float:
+        ceiling = self.ceiling_seconds(attempts)
+        return random.uniform(0.0, ceiling) if self.jitter else ceiling
@@ -10,6 +10,7 @@ import uuid
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -19,7 +20,7 @@ from jwt import ExpiredSignatureError, InvalidTokenError
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
-from .vault import LocalVault
+from .vault import AsyncVault, VaultTransaction
 
 ROLE_LEVELS: dict[str, int] = {"viewer": 10, "operator": 20, "admin": 30}
 
@@ -59,6 +60,12 @@ class SecurityConfig:
     security_headers_enabled: bool
     audit_log_file: str
     vault_file: str
+    vault_backend: str
+    vault_cache_enabled: bool
+    vault_flush_interval_ms: int
+    vault_journal_enabled: bool
+    vault_journal_compact_records: int
+    vault_sweep_interval_seconds: int
 
     @staticmethod
     def from_env() -> SecurityConfig:
@@ -75,6 +82,14 @@ class SecurityConfig:
             security_headers_enabled=env_bool("SECURITY_HEADERS_ENABLED", True),
             audit_log_file=os.getenv("AUDIT_LOG_FILE", "/data/logs/audit.log"),
             vault_file=os.getenv("VAULT_FILE", "/data/vault/secrets.enc"),
+            vault_backend=os.getenv("VAULT_BACKEND", "file").strip().lower(),
+            vault_cache_enabled=env_bool("VAULT_CACHE_ENABLED", False),
+            vault_flush_interval_ms=max(50, env_int("VAULT_FLUSH_INTERVAL_MS", 500)),
+            vault_journal_enabled=env_bool("VAULT_JOURNAL_ENABLED", False),
+            vault_journal_compact_records=max(
+                1, env_int("VAULT_JOURNAL_COMPACT_RECORDS", 1000)
+            ),
+            vault_sweep_interval_seconds=max(1, env_int("VAULT_SWEEP_INTERVAL_SECONDS", 60)),
         )
 
 
@@ -155,26 +170,30 @@ class TokenService:
     """JWT issuing, verification, and refresh-token rotation service."""
 
     SIGNING_STATE_KEY = "jwt_signing_state"
+    # Legacy single-map layout; migrated to per-session keys on startup.
     REFRESH_STATE_KEY = "refresh_sessions"
+    REFRESH_SESSION_PREFIX = "refresh_session::"
+    REFRESH_SUBJECT_PREFIX = "refresh_subject::"
 
-    def __init__(self, config: SecurityConfig, vault: LocalVault) -> None:
+    def __init__(self, config: SecurityConfig, vault: AsyncVault) -> None:
         self._config = config
         self._vault = vault
         self._signing_state = self._load_signing_state()
+        self._migrate_refresh_sessions()
 
     def _load_signing_state(self) -> dict[str, Any]:
-        loaded = self._vault.get(self.SIGNING_STATE_KEY)
+        loaded = self._vault.backend.get(self.SIGNING_STATE_KEY)
         if isinstance(loaded, dict) and "current" in loaded and "previous" in loaded:
             return loaded
         state = {
             "current": {"kid": "initial", "key": self._config.secret_key},
             "previous": [],
         }
-        self._vault.set(self.SIGNING_STATE_KEY, state)
+        self._vault.backend.set(self.SIGNING_STATE_KEY, state)
         return state
 
-    def _persist_signing_state(self) -> None:
-        self._vault.set(self.SIGNING_STATE_KEY, self._signing_state)
+    async def _persist_signing_state(self) -> None:
+        await self._vault.aset(self.SIGNING_STATE_KEY, self._signing_state)
 
     def _signing_keys_by_id(self) -> dict[str, str]:
         keys = {
@@ -188,23 +207,101 @@ class TokenService:
     def _hash_token(raw_token: str) -> str:
         return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
 
-    def _load_refresh_sessions(self) -> dict[str, dict[str, Any]]:
-        raw = self._vault.get(self.REFRESH_STATE_KEY, {})
-        sessions = raw if isinstance(raw, dict) else {}
+    @classmethod
+    def _session_key(cls, token_hash: str) -> str:
+        return f"{cls.REFRESH_SESSION_PREFIX}{token_hash}"
+
+    @classmethod
+    def _subject_key(cls, subject: str) -> str:
+        return f"{cls.REFRESH_SUBJECT_PREFIX}{subject}"
+
+    @staticmethod
+    def _seconds_until(expires_at: int) -> int:
+        return max(0, int(expires_at) - int(utc_now().timestamp()))
+
+    @staticmethod
+    def _live_subject_index(raw: Any) -> dict[str, int]:
+        index = raw if isinstance(raw, dict) else {}
         current_ts = int(utc_now().timestamp())
-        filtered = {
-            token_hash: details
-            for token_hash, details in sessions.items()
-            if isinstance(details, dict) and int(details.get("expires_at", 0)) > current_ts
+        return {
+            token_hash: int(expires_at)
+            for token_hash, expires_at in index.items()
+            if int(expires_at) > current_ts
         }
-        if filtered != sessions:
-            self._vault.set(self.REFRESH_STATE_KEY, filtered)
-        return filtered
 
-    def _save_refresh_sessions(self, sessions: dict[str, dict[str, Any]]) -> None:
-        self._vault.set(self.REFRESH_STATE_KEY, sessions)
-
-    def issue_token_pair(self, *, subject: str, role: str) -> dict[str, Any]:
+    def _save_subject_index(
+        self, txn: VaultTransaction, subject: str, index: dict[str, int]
+    ) -> None:
+        key = self._subject_key(subject)
+        if not index:
+            txn.delete(key)
+            return
+        txn.set(key, index, ttl_seconds=self._seconds_until(max(index.values())))
+
+    def _add_session(self, txn: VaultTransaction, token_hash: str, details: dict[str, Any]) -> None:
+        expires_at = int(details["expires_at"])
+        txn.set(
+            self._session_key(token_hash),
+            details,
+            ttl_seconds=self._seconds_until(expires_at),
+        )
+        subject = str(details["subject"])
+        index = self._live_subject_index(txn.get(self._subject_key(subject)))
+        index[token_hash] = expires_at
+        self._save_subject_index(txn, subject, index)
+
+    def _migrate_refresh_sessions(self) -> None:
+        with self._vault.backend.transaction() as txn:
+            legacy = txn.pop(self.REFRESH_STATE_KEY)
+            if not isinstance(legacy, dict):
+                return
+            current_ts = int(utc_now().timestamp())
+            for token_hash, details in legacy.items():
+                if (
+                    isinstance(details, dict)
+                    and "subject" in details
+                    and int(details.get("expires_at", 0)) > current_ts
+                ):
+                    self._add_session(txn, token_hash, details)
+
+    def _record_refresh_session(
+        self,
+        txn: VaultTransaction,
+        *,
+        token_hash: str,
+        details: dict[str, Any],
+        replaces_hash: str | None,
+    ) -> None:
+        if replaces_hash is not None:
+            previous = txn.pop(self._session_key(replaces_hash))
+            if not isinstance(previous, dict):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token is invalid or already rotated.",
+                )
+            previous_subject = str(previous.get("subject", ""))
+            index = self._live_subject_index(txn.get(self._subject_key(previous_subject)))
+            index.pop(replaces_hash, None)
+            self._save_subject_index(txn, previous_subject, index)
+        self._add_session(txn, token_hash, details)
+
+    def _revoke_subject(self, txn: VaultTransaction, subject: str) -> int:
+        index = self._live_subject_index(txn.pop(self._subject_key(subject)))
+        for token_hash in index:
+            txn.delete(self._session_key(token_hash))
+        return len(index)
+
+    async def revoke_subject_sessions(self, subject: str) -> int:
+        """Invalidate every refresh token issued to ``subject``; returns the count."""
+        return await self._vault.atransaction(partial(self._revoke_subject, subject=subject))
+
+    async def issue_token_pair(
+        self,
+        *,
+        subject: str,
+        role: str,
+        replaces_refresh_hash: str | None = None,
+    ) -> dict[str, Any]:
         if role not in ROLE_LEVELS:
             raise HTTPException(status_code=400, detail="Invalid role.")
         now = utc_now()
@@ -247,13 +344,19 @@ class TokenService:
             headers={"kid": kid},
         )
 
-        sessions = self._load_refresh_sessions()
-        sessions[self._hash_token(refresh_token)] = {
-            "subject": subject,
-            "role": role,
-            "expires_at": int(refresh_exp.timestamp()),
-        }
-        self._save_refresh_sessions(sessions)
+        # Revoking the previous session and inserting the new one commit together.
+        await self._vault.atransaction(
+            partial(
+                self._record_refresh_session,
+                token_hash=self._hash_token(refresh_token),
+                details={
+                    "subject": subject,
+                    "role": role,
+                    "expires_at": int(refresh_exp.timestamp()),
+                },
+                replaces_hash=replaces_refresh_hash,
+            )
+        )
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -316,23 +419,15 @@ class TokenService:
             token_id=token_id,
         )
 
-    def rotate_refresh_token(self, refresh_token: str) -> dict[str, Any]:
+    async def rotate_refresh_token(self, refresh_token: str) -> dict[str, Any]:
         payload = self._decode_token(refresh_token, expected_type="refresh")
-        token_hash = self._hash_token(refresh_token)
-        sessions = self._load_refresh_sessions()
-        existing = sessions.pop(token_hash, None)
-        if existing is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Refresh token is invalid or already rotated.",
-            )
-        self._save_refresh_sessions(sessions)
-        return self.issue_token_pair(
+        return await self.issue_token_pair(
             subject=str(payload["sub"]),
             role=str(payload["role"]),
+            replaces_refresh_hash=self._hash_token(refresh_token),
         )
 
-    def rotate_signing_key(self) -> str:
+    async def rotate_signing_key(self) -> str:
         previous_keys: list[dict[str, str]] = self._signing_state["previous"]
         previous_keys.insert(0, self._signing_state["current"])
         self._signing_state["previous"] = previous_keys[
@@ -342,7 +437,7 @@ class TokenService:
             "kid": str(uuid.uuid4()),
             "key": secrets.token_urlsafe(64),
         }
-        self._persist_signing_state()
+        await self._persist_signing_state()
         return str(self._signing_state["current"]["kid"])
 
 
@@ -1,18 +1,33 @@
 from __future__ import annotations
 
+import abc
+import asyncio
 import base64
+import copy
 import hashlib
+import heapq
 import json
 import logging
 import os
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from threading import Lock
-from typing import Any
+from threading import Event, Lock, RLock, Thread, local
+from typing import Any, Callable, Iterable, Iterator
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 LOGGER = logging.getLogger("gitvibedev.vault")
 
+VAULT_BACKENDS = {"file", "sharded", "sqlite"}
+_DELETED = object()
+# Reserved entry holding ``{key: deadline}`` for backends without a native TTL column.
+EXPIRY_INDEX_KEY = "__vault_expiry_index__"
+
 
 class VaultError(RuntimeError):
     """Raised when vault data cannot be read or written safely."""
@@ -23,75 +38,1289 @@ def _derive_fernet_key(master_key: str) -> bytes:
     return base64.urlsafe_b64encode(digest)
 
 
-class LocalVault:
-    """Encrypted local vault for tokens and security metadata."""
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
 
-    def __init__(self, file_path: str, master_key: str) -> None:
-        self._path = Path(file_path)
-        self._lock = Lock()
+
+def _chmod_private(path: Path, mode: int, description: str) -> None:
+    try:
+        os.chmod(path, mode)
+    except PermissionError:
+        LOGGER.warning("Could not set %s permissions to %s.", description, oct(mode)[2:].zfill(4))
+
+
+def _atomic_write_bytes(path: Path, data: bytes, *, description: str) -> None:
+    """Write ``data`` to a temp file, fsync it, then rename it over ``path``."""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    _chmod_private(temp_path, 0o600, description)
+    os.replace(temp_path, path)
+    try:
+        directory_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_fd)
+
+
+def _deadline(ttl_seconds: float | None) -> float | None:
+    return None if ttl_seconds is None else time.time() + max(0.0, float(ttl_seconds))
+
+
+def _apply_changes(data: dict[str, Any], updates: dict[str, Any], deletes: Iterable[str]) -> bool:
+    changed = bool(updates)
+    data.update(updates)
+    for key in deletes:
+        if key in data:
+            del data[key]
+            changed = True
+    return changed
+
+
+class VaultTransaction:
+    """Read-your-writes view used inside ``BaseVault.transaction``."""
+
+    def __init__(self, vault: BaseVault) -> None:
+        self._vault = vault
+        self._loaded: dict[str, Any] = {}
+        self.updates: dict[str, Any] = {}
+        self.deletes: set[str] = set()
+        self.deadlines: dict[str, float] = {}
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        wanted = list(keys)
+        missing = [
+            key
+            for key in wanted
+            if key not in self._loaded and key not in self.updates and key not in self.deletes
+        ]
+        if missing:
+            found = self._vault._read_live_unlocked(missing)
+            for key in missing:
+                self._loaded[key] = found.get(key, _DELETED)
+        result: dict[str, Any] = {}
+        for key in wanted:
+            if key in self.deletes:
+                continue
+            value = self.updates[key] if key in self.updates else self._loaded.get(key, _DELETED)
+            if value is not _DELETED:
+                result[key] = value
+        return result
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def set(self, key: str, value: Any, *, ttl_seconds: float | None = None) -> None:
+        self.updates[key] = value
+        self.deletes.discard(key)
+        deadline = _deadline(ttl_seconds)
+        if deadline is None:
+            self.deadlines.pop(key, None)
+        else:
+            self.deadlines[key] = deadline
+
+    def delete(self, key: str) -> None:
+        self.updates.pop(key, None)
+        self.deadlines.pop(key, None)
+        if self._loaded.get(key) is _DELETED:
+            # Known to be absent from storage; nothing to write.
+            return
+        self.deletes.add(key)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, default)
+        self.delete(key)
+        return value
+
+
+class BaseVault(abc.ABC):
+    """Shared locking and public API for encrypted vault backends.
+
+    Backends implement ``_read_many_unlocked`` / ``_write_many_unlocked`` and
+    the two rotation primitives; every public method holds the vault lock
+    while calling them. New data is always encrypted with the current master
+    key, while reads accept the current and any previous master key so that
+    rotation can proceed in batches without blocking readers.
+
+    Entries written with ``ttl_seconds`` get a deadline. Deadlines are mirrored
+    in memory (a dict plus a min-heap), so reads hide expired entries with one
+    dict lookup and ``purge_expired`` deletes them in deadline order without
+    scanning the store.
+    """
+
+    def __init__(self, master_key: str, previous_master_keys: Iterable[str] = ()) -> None:
+        self._lock = RLock()
         self._fernet = Fernet(_derive_fernet_key(master_key))
+        self._retired_fernets = [
+            Fernet(_derive_fernet_key(item)) for item in previous_master_keys if item
+        ]
+        self._decryptor = MultiFernet([self._fernet, *self._retired_fernets])
+        self._rotation_pending: list[str] = []
+        self._rotation_status: dict[str, Any] = {"status": "idle"}
+        self._expiries: dict[str, float] | None = None
+        self._expiry_heap: list[tuple[float, str]] = []
+
+    def _decrypt_json(self, ciphertext: bytes, *, description: str) -> Any:
+        try:
+            plaintext = self._decryptor.decrypt(ciphertext)
+        except InvalidToken as exc:
+            raise VaultError(f"{description} decryption failed. Invalid master key.") from exc
+        try:
+            return json.loads(plaintext.decode("utf-8"))
+        except json.JSONDecodeError as exc:
+            raise VaultError(f"{description} payload is corrupted.") from exc
+
+    @abc.abstractmethod
+    def _read_many_unlocked(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Decrypt and return the stored values of those ``keys`` that exist."""
+
+    @abc.abstractmethod
+    def _write_many_unlocked(self, updates: dict[str, Any], deletes: Iterable[str]) -> None:
+        """Persist ``updates`` and remove ``deletes``."""
+
+    @abc.abstractmethod
+    def _keys_unlocked(self, prefix: str) -> list[str]:
+        """Every stored key starting with ``prefix``."""
+
+    @abc.abstractmethod
+    def _rotation_ids_unlocked(self) -> list[str]:
+        """Identifiers of the encrypted records that a key rotation must rewrite."""
+
+    @abc.abstractmethod
+    def _rotate_records_unlocked(self, record_ids: list[str]) -> None:
+        """Re-encrypt the given records with the current master key."""
+
+    def _begin_transaction_unlocked(self) -> None:
+        """Hook for backends that can share one decrypted view across a transaction."""
+
+    def _end_transaction_unlocked(self) -> None:
+        """Counterpart of ``_begin_transaction_unlocked``."""
+
+    def _load_expiries_unlocked(self) -> dict[str, float]:
+        """Persisted deadlines; by default they live in a reserved vault entry."""
+        raw = self._read_many_unlocked([EXPIRY_INDEX_KEY]).get(EXPIRY_INDEX_KEY)
+        if not isinstance(raw, dict):
+            return {}
+        return {str(key): float(deadline) for key, deadline in raw.items()}
+
+    def _write_entries_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: list[str],
+        expiry_changes: dict[str, float | None],
+    ) -> None:
+        """Persist values together with deadline changes (``None`` clears one)."""
+        if expiry_changes:
+            index = dict(self._expiry_index_unlocked())
+            for key, deadline in expiry_changes.items():
+                if deadline is None:
+                    index.pop(key, None)
+                else:
+                    index[key] = deadline
+            updates = {**updates, EXPIRY_INDEX_KEY: index}
+        self._write_many_unlocked(updates, deletes)
+
+    def _expiry_index_unlocked(self) -> dict[str, float]:
+        if self._expiries is None:
+            self._expiries = self._load_expiries_unlocked()
+            self._expiry_heap = [(deadline, key) for key, deadline in self._expiries.items()]
+            heapq.heapify(self._expiry_heap)
+        return self._expiries
+
+    def _without_expired(self, found: dict[str, Any]) -> dict[str, Any]:
+        expiries = self._expiry_index_unlocked()
+        if expiries:
+            now = time.time()
+            for key in [key for key in found if key in expiries and expiries[key] <= now]:
+                del found[key]
+        return found
+
+    def _read_live_unlocked(self, keys: Iterable[str]) -> dict[str, Any]:
+        return self._without_expired(self._read_many_unlocked(keys))
+
+    def _commit_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: Iterable[str],
+        deadlines: dict[str, float] | None = None,
+    ) -> None:
+        deadlines = deadlines or {}
+        deletes = list(deletes)
+        index = self._expiry_index_unlocked()
+        changes: dict[str, float | None] = {}
+        for key in updates:
+            deadline = deadlines.get(key)
+            if index.get(key) != deadline:
+                changes[key] = deadline
+        for key in deletes:
+            if key in index:
+                changes[key] = None
+        self._write_entries_unlocked(updates, deletes, changes)
+        for key, deadline in changes.items():
+            if deadline is None:
+                index.pop(key, None)
+            else:
+                index[key] = deadline
+                heapq.heappush(self._expiry_heap, (deadline, key))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._read_live_unlocked([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Return the stored values for ``keys``; missing or expired keys are omitted."""
+        with self._lock:
+            return self._read_live_unlocked(list(keys))
+
+    def keys(self, prefix: str = "") -> list[str]:
+        """Sorted live keys starting with ``prefix`` (values are not returned)."""
+        with self._lock:
+            expiries = self._expiry_index_unlocked()
+            now = time.time()
+            return sorted(
+                key
+                for key in self._keys_unlocked(prefix)
+                if key != EXPIRY_INDEX_KEY and expiries.get(key, now + 1) > now
+            )
+
+    def set_many(self, values: dict[str, Any], *, ttl_seconds: float | None = None) -> None:
+        deadline = _deadline(ttl_seconds)
+        self.apply_changes(
+            values,
+            deadlines={key: deadline for key in values} if deadline is not None else None,
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[VaultTransaction]:
+        """Hold the vault lock and apply all buffered changes in one write on exit.
+
+        Nothing is written if the block raises.
+        """
+        with self._lock:
+            self._begin_transaction_unlocked()
+            try:
+                txn = VaultTransaction(self)
+                yield txn
+                if txn.updates or txn.deletes:
+                    self._commit_unlocked(txn.updates, txn.deletes, txn.deadlines)
+            finally:
+                self._end_transaction_unlocked()
+
+    def set(self, key: str, value: Any, *, ttl_seconds: float | None = None) -> None:
+        deadline = _deadline(ttl_seconds)
+        with self._lock:
+            self._commit_unlocked(
+                {key: value},
+                (),
+                {key: deadline} if deadline is not None else None,
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._commit_unlocked({}, (key,))
+
+    def purge_expired(self, limit: int = 1000) -> int:
+        """Delete up to ``limit`` entries whose deadline has passed."""
+        with self._lock:
+            index = self._expiry_index_unlocked()
+            heap = self._expiry_heap
+            now = time.time()
+            expired: dict[str, None] = {}
+            while heap and heap[0][0] <= now and len(expired) < limit:
+                deadline, key = heapq.heappop(heap)
+                # Heap entries are not removed when a deadline changes; skip stale ones.
+                if index.get(key) == deadline:
+                    expired[key] = None
+            if expired:
+                self._commit_unlocked({}, list(expired))
+            return len(expired)
+
+    def next_expiry(self) -> float | None:
+        """Earliest pending deadline (epoch seconds), or ``None``."""
+        with self._lock:
+            index = self._expiry_index_unlocked()
+            heap = self._expiry_heap
+            while heap and index.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def rotate_master_key(self, new_master_key: str) -> None:
+        self.begin_key_rotation(new_master_key)
+        while self.rotate_step()["status"] == "running":
+            continue
+
+    def begin_key_rotation(self, new_master_key: str) -> dict[str, Any]:
+        """Switch writes to ``new_master_key`` and queue every record for re-encryption."""
+        with self._lock:
+            new_fernet = Fernet(_derive_fernet_key(new_master_key))
+            # Keep every earlier key readable: an unfinished rotation may already
+            # have re-encrypted some records with the key being replaced.
+            self._retired_fernets = [self._fernet, *self._retired_fernets]
+            self._fernet = new_fernet
+            self._decryptor = MultiFernet([new_fernet, *self._retired_fernets])
+            self._rotation_pending = self._rotation_ids_unlocked()
+            self._rotation_status = {
+                "status": "running",
+                "total_records": len(self._rotation_pending),
+                "rotated_records": 0,
+                "started_at": int(time.time()),
+                "completed_at": None,
+            }
+            return dict(self._rotation_status)
+
+    def rotate_step(self, batch_size: int = 100) -> dict[str, Any]:
+        """Re-encrypt the next batch of records; the lock is held for one batch only."""
+        with self._lock:
+            if self._rotation_status.get("status") != "running":
+                return dict(self._rotation_status)
+            batch = self._rotation_pending[: max(1, batch_size)]
+            del self._rotation_pending[: len(batch)]
+            if batch:
+                try:
+                    self._rotate_records_unlocked(batch)
+                except Exception as exc:
+                    self._rotation_pending[:0] = batch
+                    self._rotation_status["status"] = "failed"
+                    self._rotation_status["error"] = str(exc)
+                    raise
+                self._rotation_status["rotated_records"] += len(batch)
+            if not self._rotation_pending:
+                self._retired_fernets = []
+                self._decryptor = MultiFernet([self._fernet])
+                self._rotation_status["status"] = "completed"
+                self._rotation_status["completed_at"] = int(time.time())
+            return dict(self._rotation_status)
+
+    def rotation_status(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._rotation_status)
+
+    def import_legacy_file(
+        self,
+        legacy_file_path: str,
+        master_key: str,
+        previous_master_keys: Iterable[str] = (),
+    ) -> int:
+        """Copy every key of a single-file ``secrets.enc`` vault into this backend.
+
+        A ``secrets.enc.journal`` next to the file is replayed first, so
+        changes that were never compacted into the snapshot are imported too.
+        """
+        journal_path = Path(f"{legacy_file_path}{LocalVault.JOURNAL_SUFFIX}")
+        legacy = LocalVault(
+            file_path=legacy_file_path,
+            master_key=master_key,
+            previous_master_keys=previous_master_keys,
+            journal_enabled=journal_path.exists(),
+        )
+        legacy_data = legacy.export_all()
+        with legacy._lock:
+            deadlines = dict(legacy._expiry_index_unlocked())
+        with self._lock:
+            self._commit_unlocked(legacy_data, (), deadlines)
+        LOGGER.info(
+            "Migrated %s vault keys from %s into %s.",
+            len(legacy_data),
+            legacy_file_path,
+            type(self).__name__,
+        )
+        return len(legacy_data)
+
+    def apply_changes(
+        self,
+        updates: dict[str, Any],
+        deletes: Iterable[str] = (),
+        deadlines: dict[str, float] | None = None,
+    ) -> None:
+        """Write ``updates`` and remove ``deletes`` while holding the lock once.
+
+        ``deadlines`` maps updated keys to absolute expiry times (epoch seconds).
+        """
+        with self._lock:
+            self._commit_unlocked(updates, deletes, deadlines)
+
+    def flush(self) -> None:
+        """Persist buffered writes; backends without buffering have nothing to do."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class LocalVault(BaseVault):
+    """Encrypted local vault for tokens and security metadata.
+
+    With ``cache_enabled`` the decrypted payload is kept in memory: reads are
+    served from it and writes are flushed to disk by a background thread every
+    ``flush_interval_seconds`` (and on ``flush``/``close``). A change of the
+    file's inode, mtime or size made by another writer invalidates the cache.
+
+    With ``journal_enabled`` every mutation is appended as one encrypted line
+    to ``<file>.journal`` instead of rewriting the whole file. The journal is
+    replayed on top of the snapshot at startup and compacted into a new
+    snapshot once it holds ``journal_compact_records`` entries.
+    """
+
+    JOURNAL_SUFFIX = ".journal"
+
+    def __init__(
+        self,
+        file_path: str,
+        master_key: str,
+        *,
+        previous_master_keys: Iterable[str] = (),
+        cache_enabled: bool = False,
+        flush_interval_seconds: float = 1.0,
+        journal_enabled: bool = False,
+        journal_compact_records: int = 1000,
+    ) -> None:
+        super().__init__(master_key, previous_master_keys)
+        self._path = Path(file_path)
+        self._journal_path = self._path.with_name(f"{self._path.name}{self.JOURNAL_SUFFIX}")
+        self._cache_enabled = cache_enabled
+        self._journal_enabled = journal_enabled
+        self._in_memory = cache_enabled or journal_enabled
+        self._flush_interval_seconds = max(0.05, flush_interval_seconds)
+        self._journal_compact_records = max(1, journal_compact_records)
+        self._journal_records = 0
+        self._cache: dict[str, Any] | None = None
+        self._cache_stat: tuple[Any, ...] | None = None
+        self._transaction_snapshot: dict[str, Any] | None = None
+        self._pending: dict[str, Any] = {}
+        self._flush_stop = Event()
+        self._flush_thread: Thread | None = None
         self._ensure_storage()
+        if self._journal_enabled:
+            with self._lock:
+                self._read_unlocked()
 
     def _ensure_storage(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            os.chmod(self._path.parent, 0o700)
-        except PermissionError:
-            LOGGER.warning("Could not set vault directory permissions to 0700.")
+        _chmod_private(self._path.parent, 0o700, "vault directory")
         if not self._path.exists():
             self._write_unlocked({})
+        _chmod_private(self._path, 0o600, "vault file")
+
+    @staticmethod
+    def _stat_signature(path: Path) -> tuple[int, int, int] | None:
         try:
-            os.chmod(self._path, 0o600)
-        except PermissionError:
-            LOGGER.warning("Could not set vault file permissions to 0600.")
+            stat_result = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
 
-    def _read_unlocked(self) -> dict[str, Any]:
+    def _storage_stat(self) -> tuple[Any, ...]:
+        if self._journal_enabled:
+            return self._stat_signature(self._path), self._stat_signature(self._journal_path)
+        return (self._stat_signature(self._path),)
+
+    def _read_file_unlocked(self) -> dict[str, Any]:
         if not self._path.exists():
             return {}
         ciphertext = self._path.read_bytes()
         if not ciphertext:
             return {}
-        try:
-            plaintext = self._fernet.decrypt(ciphertext)
-        except InvalidToken as exc:
-            raise VaultError("Vault decryption failed. Invalid master key.") from exc
-        try:
-            loaded = json.loads(plaintext.decode("utf-8"))
-        except json.JSONDecodeError as exc:
-            raise VaultError("Vault payload is corrupted.") from exc
+        loaded = self._decrypt_json(ciphertext, description="Vault")
         if not isinstance(loaded, dict):
             raise VaultError("Vault payload must be a JSON object.")
         return loaded
 
+    def _replay_journal_unlocked(self, data: dict[str, Any]) -> int:
+        if not self._journal_path.exists():
+            return 0
+        raw = self._journal_path.read_bytes()
+        lines = raw.split(b"\n")
+        replayed = 0
+        for index, line in enumerate(lines):
+            if not line:
+                continue
+            try:
+                entry = self._decrypt_json(line, description="Vault journal")
+            except VaultError:
+                if index == len(lines) - 1:
+                    # A crash mid-append leaves a torn final line; drop it.
+                    LOGGER.warning("Discarding incomplete trailing vault journal record.")
+                    with self._journal_path.open("r+b") as handle:
+                        handle.truncate(len(raw) - len(line))
+                    break
+                raise
+            if not isinstance(entry, dict):
+                raise VaultError("Vault journal record must be a JSON object.")
+            _apply_changes(data, entry.get("set") or {}, entry.get("delete") or [])
+            replayed += 1
+        return replayed
+
+    def _append_journal_unlocked(self, updates: dict[str, Any], deletes: list[str]) -> None:
+        record = self._fernet.encrypt(_encode_json({"set": updates, "delete": deletes}))
+        with self._journal_path.open("ab") as handle:
+            handle.write(record + b"\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        _chmod_private(self._journal_path, 0o600, "vault journal")
+        self._journal_records += 1
+
+    def _begin_transaction_unlocked(self) -> None:
+        if not self._in_memory:
+            self._transaction_snapshot = self._read_file_unlocked()
+
+    def _end_transaction_unlocked(self) -> None:
+        self._transaction_snapshot = None
+
+    def _read_unlocked(self) -> dict[str, Any]:
+        if self._transaction_snapshot is not None:
+            return self._transaction_snapshot
+        if not self._in_memory:
+            return self._read_file_unlocked()
+        current_stat = self._storage_stat()
+        if self._cache is None or current_stat != self._cache_stat:
+            if self._cache is not None:
+                LOGGER.info("Vault file changed on disk; reloading cached view.")
+                self._expiries = None
+            data = self._read_file_unlocked()
+            if self._journal_enabled:
+                self._journal_records = self._replay_journal_unlocked(data)
+            pending = self._pending
+            _apply_changes(
+                data,
+                {key: value for key, value in pending.items() if value is not _DELETED},
+                [key for key, value in pending.items() if value is _DELETED],
+            )
+            self._cache = data
+            self._cache_stat = self._storage_stat()
+        return self._cache
+
     def _write_unlocked(self, payload: dict[str, Any]) -> None:
-        encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
-        ciphertext = self._fernet.encrypt(encoded)
-        self._path.write_bytes(ciphertext)
-        try:
-            os.chmod(self._path, 0o600)
-        except PermissionError:
-            LOGGER.warning("Could not enforce vault file permissions to 0600.")
+        ciphertext = self._fernet.encrypt(_encode_json(payload))
+        _atomic_write_bytes(self._path, ciphertext, description="vault file")
+        if self._journal_enabled:
+            # The snapshot now contains every journaled change; replaying the
+            # old journal after a crash here would be idempotent anyway.
+            _atomic_write_bytes(self._journal_path, b"", description="vault journal")
+            self._journal_records = 0
+        if self._in_memory:
+            self._cache = payload
+            self._cache_stat = self._storage_stat()
+            self._pending = {}
 
-    def get(self, key: str, default: Any = None) -> Any:
+    def _read_many_unlocked(self, keys: Iterable[str]) -> dict[str, Any]:
+        data = self._read_unlocked()
+        found = {key: data[key] for key in keys if key in data}
+        # Cached values must not be mutated in place by callers.
+        return copy.deepcopy(found) if self._in_memory else found
+
+    def _write_many_unlocked(self, updates: dict[str, Any], deletes: Iterable[str]) -> None:
+        data = self._read_unlocked()
+        if self._journal_enabled:
+            updates = copy.deepcopy(updates)
+            removed = [key for key in deletes if key in data]
+            if not updates and not removed:
+                return
+            self._append_journal_unlocked(updates, removed)
+            _apply_changes(data, updates, removed)
+            self._cache_stat = self._storage_stat()
+            if self._journal_records >= self._journal_compact_records:
+                self._write_unlocked(data)
+            return
+        if self._cache_enabled:
+            for key, value in copy.deepcopy(updates).items():
+                data[key] = value
+                self._pending[key] = value
+            for key in deletes:
+                if key in data:
+                    del data[key]
+                    self._pending[key] = _DELETED
+            if self._pending:
+                self._start_flusher_unlocked()
+            return
+        if _apply_changes(data, updates, deletes):
+            self._write_unlocked(data)
+
+    def _keys_unlocked(self, prefix: str) -> list[str]:
+        return [key for key in self._read_unlocked() if key.startswith(prefix)]
+
+    def _rotation_ids_unlocked(self) -> list[str]:
+        # Snapshot and journal are rewritten together as a single record.
+        return [str(self._path)]
+
+    def _rotate_records_unlocked(self, record_ids: list[str]) -> None:
+        self._write_unlocked(dict(self._read_unlocked()))
+
+    def compact(self) -> None:
+        """Fold the journal (or pending cached writes) into a fresh snapshot."""
         with self._lock:
-            data = self._read_unlocked()
-            return data.get(key, default)
+            self._write_unlocked(dict(self._read_unlocked()))
 
-    def set(self, key: str, value: Any) -> None:
+    def _start_flusher_unlocked(self) -> None:
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        self._flush_stop.clear()
+        self._flush_thread = Thread(
+            target=self._flush_loop,
+            name="gitvibedev-vault-flush",
+            daemon=True,
+        )
+        self._flush_thread.start()
+
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(self._flush_interval_seconds):
+            try:
+                self.flush()
+            except (OSError, VaultError):
+                LOGGER.exception("Vault write-behind flush failed; will retry.")
+
+    def flush(self) -> None:
         with self._lock:
-            data = self._read_unlocked()
-            data[key] = value
-            self._write_unlocked(data)
+            if self._cache_enabled and self._pending:
+                self._write_unlocked(dict(self._read_unlocked()))
 
-    def delete(self, key: str) -> None:
+    def close(self) -> None:
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=5)
+            self._flush_thread = None
+        self.flush()
+        if self._journal_enabled and self._journal_records:
+            self.compact()
+
+    def export_all(self) -> dict[str, Any]:
         with self._lock:
-            data = self._read_unlocked()
-            if key in data:
-                del data[key]
-                self._write_unlocked(data)
+            exported = copy.deepcopy(self._read_unlocked())
+            exported.pop(EXPIRY_INDEX_KEY, None)
+            return self._without_expired(exported)
 
-    def rotate_master_key(self, new_master_key: str) -> None:
+
+class ShardedVault(BaseVault):
+    """Encrypted vault that stores every key as an independently encrypted record.
+
+    Records live in ``<directory>/<h[:2]>/<h>.enc`` where ``h`` is the SHA-256 of
+    the key, so a write only re-encrypts its own record and a read only decrypts
+    the record it needs. The plaintext key and any TTL deadline are kept inside
+    the encrypted record; deadlines are collected into the in-memory expiry
+    index when the vault opens.
+    """
+
+    RECORD_SUFFIX = ".enc"
+
+    def __init__(
+        self,
+        directory: str,
+        master_key: str,
+        *,
+        previous_master_keys: Iterable[str] = (),
+        legacy_file_path: str | None = None,
+    ) -> None:
+        super().__init__(master_key, previous_master_keys)
+        self._root = Path(directory)
+        self._ensure_storage(legacy_file_path, master_key, previous_master_keys)
+
+    def _ensure_storage(
+        self,
+        legacy_file_path: str | None,
+        master_key: str,
+        previous_master_keys: Iterable[str],
+    ) -> None:
+        if not self._root.exists() and legacy_file_path and Path(legacy_file_path).exists():
+            self._migrate_legacy_file(legacy_file_path, master_key, previous_master_keys)
+        self._root.mkdir(parents=True, exist_ok=True)
+        _chmod_private(self._root, 0o700, "vault directory")
         with self._lock:
-            data = self._read_unlocked()
-            self._fernet = Fernet(_derive_fernet_key(new_master_key))
-            self._write_unlocked(data)
+            self._expiry_index_unlocked()
+
+    def _migrate_legacy_file(
+        self,
+        legacy_file_path: str,
+        master_key: str,
+        previous_master_keys: Iterable[str],
+    ) -> None:
+        """Import the legacy file into a staging directory, then rename it into place.
+
+        The vault directory only appears once every record is written, so an
+        interrupted migration is retried from scratch on the next start.
+        """
+        root = self._root
+        staging = root.with_name(f"{root.name}.migrating")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True, mode=0o700)
+        self._root = staging
+        try:
+            self.import_legacy_file(legacy_file_path, master_key, previous_master_keys)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            self._root = root
+        os.replace(staging, root)
+
+    def _record_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._root / digest[:2] / f"{digest}{self.RECORD_SUFFIX}"
+
+    def _iter_record_paths(self) -> list[Path]:
+        return sorted(self._root.glob(f"*/*{self.RECORD_SUFFIX}"))
+
+    def _read_record(self, path: Path) -> tuple[str, Any, float | None] | None:
+        try:
+            ciphertext = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        record = self._decrypt_json(ciphertext, description="Vault record")
+        if not isinstance(record, dict) or not isinstance(record.get("key"), str):
+            raise VaultError(f"Vault record {path.name} is malformed.")
+        expires_at = record.get("expires_at")
+        return record["key"], record.get("value"), float(expires_at) if expires_at is not None else None
+
+    def _write_record(self, path: Path, key: str, value: Any, expires_at: float | None = None) -> None:
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        record: dict[str, Any] = {"key": key, "value": value}
+        if expires_at is not None:
+            record["expires_at"] = expires_at
+        ciphertext = self._fernet.encrypt(_encode_json(record))
+        _atomic_write_bytes(path, ciphertext, description="vault record")
+
+    def _read_many_unlocked(self, keys: Iterable[str]) -> dict[str, Any]:
+        found: dict[str, Any] = {}
+        for key in keys:
+            record = self._read_record(self._record_path(key))
+            if record is not None and record[0] == key:
+                found[key] = record[1]
+        return found
+
+    def _load_expiries_unlocked(self) -> dict[str, float]:
+        expiries: dict[str, float] = {}
+        legacy_index: Any = None
+        for path in self._iter_record_paths():
+            record = self._read_record(path)
+            if record is None:
+                continue
+            if record[0] == EXPIRY_INDEX_KEY:
+                legacy_index = record[1]
+            elif record[2] is not None:
+                expiries[record[0]] = record[2]
+        if isinstance(legacy_index, dict):
+            # Older directories kept every deadline in one reserved record;
+            # move them into their records and drop it.
+            moved = {str(key): float(deadline) for key, deadline in legacy_index.items()}
+            values = self._read_many_unlocked(list(moved))
+            self._write_many_unlocked(
+                values,
+                [EXPIRY_INDEX_KEY],
+                {key: moved[key] for key in values},
+            )
+            expiries.update({key: moved[key] for key in values})
+        return expiries
+
+    def _write_entries_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: list[str],
+        expiry_changes: dict[str, float | None],
+    ) -> None:
+        index = self._expiry_index_unlocked()
+        deadlines = {
+            key: expiry_changes[key] if key in expiry_changes else index.get(key)
+            for key in updates
+        }
+        self._write_many_unlocked(updates, deletes, deadlines)
+
+    def _write_many_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: Iterable[str],
+        deadlines: dict[str, float | None] | None = None,
+    ) -> None:
+        deadlines = deadlines or {}
+        for key, value in updates.items():
+            self._write_record(self._record_path(key), key, value, deadlines.get(key))
+        for key in deletes:
+            try:
+                self._record_path(key).unlink()
+            except FileNotFoundError:
+                continue
+
+    def _keys_unlocked(self, prefix: str) -> list[str]:
+        # Key names are only stored encrypted, so listing decrypts every record.
+        keys: list[str] = []
+        for path in self._iter_record_paths():
+            record = self._read_record(path)
+            if record is not None and record[0].startswith(prefix):
+                keys.append(record[0])
+        return keys
+
+    def _rotation_ids_unlocked(self) -> list[str]:
+        return [str(path) for path in self._iter_record_paths()]
+
+    def _rotate_records_unlocked(self, record_ids: list[str]) -> None:
+        for record_id in record_ids:
+            path = Path(record_id)
+            try:
+                ciphertext = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            try:
+                rotated = self._decryptor.rotate(ciphertext)
+            except InvalidToken as exc:
+                raise VaultError("Vault record decryption failed. Invalid master key.") from exc
+            _atomic_write_bytes(path, rotated, description="vault record")
+
+    def export_all(self) -> dict[str, Any]:
+        with self._lock:
+            exported: dict[str, Any] = {}
+            for path in self._iter_record_paths():
+                record = self._read_record(path)
+                if record is not None and record[0] != EXPIRY_INDEX_KEY:
+                    exported[record[0]] = record[1]
+            return self._without_expired(exported)
+
+
+class SQLiteVault(BaseVault):
+    """Encrypted vault backed by a stdlib ``sqlite3`` database in WAL mode.
+
+    Each key is one row whose value is a Fernet token, so lookups use the
+    primary-key index and writes are single-row transactions. Key names are
+    stored in plaintext; only values are encrypted. Reads use one connection
+    per thread and do not take the vault lock, relying on WAL snapshots.
+    TTL deadlines are kept in an indexed ``expires_at`` column of the row.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS vault_entries ("
+        "key TEXT PRIMARY KEY, "
+        "value BLOB NOT NULL, "
+        "updated_at INTEGER NOT NULL, "
+        "expires_at REAL"
+        ")"
+    )
+    EXPIRY_INDEX = (
+        "CREATE INDEX IF NOT EXISTS vault_entries_expires_at "
+        "ON vault_entries (expires_at) WHERE expires_at IS NOT NULL"
+    )
+
+    def __init__(
+        self,
+        database_path: str,
+        master_key: str,
+        *,
+        previous_master_keys: Iterable[str] = (),
+        legacy_file_path: str | None = None,
+    ) -> None:
+        super().__init__(master_key, previous_master_keys)
+        self._db_path = Path(database_path)
+        self._local = local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = Lock()
+        self._ensure_storage(legacy_file_path, master_key, previous_master_keys)
+
+    def _ensure_storage(
+        self,
+        legacy_file_path: str | None,
+        master_key: str,
+        previous_master_keys: Iterable[str],
+    ) -> None:
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        _chmod_private(self._db_path.parent, 0o700, "vault directory")
+        if not self._db_path.exists() and legacy_file_path and Path(legacy_file_path).exists():
+            self._migrate_legacy_file(legacy_file_path, master_key, previous_master_keys)
+        self._create_schema(self._connection())
+        _chmod_private(self._db_path, 0o600, "vault database")
+        with self._lock:
+            # Loaded eagerly because ``get`` reads the index without the lock.
+            self._expiry_index_unlocked()
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        with connection:
+            connection.execute(self.SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(vault_entries)")}
+            if "expires_at" not in columns:
+                connection.execute("ALTER TABLE vault_entries ADD COLUMN expires_at REAL")
+            connection.execute(self.EXPIRY_INDEX)
+
+    @staticmethod
+    def _remove_database_files(path: Path) -> None:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                path.with_name(f"{path.name}{suffix}").unlink()
+            except FileNotFoundError:
+                continue
+
+    def _migrate_legacy_file(
+        self,
+        legacy_file_path: str,
+        master_key: str,
+        previous_master_keys: Iterable[str],
+    ) -> None:
+        """Import the legacy file into a staging database, then rename it into place.
+
+        The database file only appears once every key is written, so an
+        interrupted or failed migration is retried on the next start.
+        """
+        database = self._db_path
+        staging = database.with_name(f"{database.name}.migrating")
+        self._remove_database_files(staging)
+        self._db_path = staging
+        try:
+            connection = self._connection()
+            self._create_schema(connection)
+            self.import_legacy_file(legacy_file_path, master_key, previous_master_keys)
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except BaseException:
+            self.close()
+            self._remove_database_files(staging)
+            raise
+        finally:
+            self._db_path = database
+        self.close()
+        os.replace(staging, database)
+        self._remove_database_files(staging)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                str(self._db_path),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _read_many_unlocked(self, keys: Iterable[str]) -> dict[str, Any]:
+        wanted = list(dict.fromkeys(keys))
+        found: dict[str, Any] = {}
+        connection = self._connection()
+        for offset in range(0, len(wanted), 500):
+            chunk = wanted[offset : offset + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = connection.execute(
+                f"SELECT key, value FROM vault_entries WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for key, ciphertext in rows:
+                found[key] = self._decrypt_json(bytes(ciphertext), description="Vault row")
+        return found
+
+    def _load_expiries_unlocked(self) -> dict[str, float]:
+        rows = self._connection().execute(
+            "SELECT key, expires_at FROM vault_entries WHERE expires_at IS NOT NULL"
+        ).fetchall()
+        return {key: float(deadline) for key, deadline in rows}
+
+    def _write_entries_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: list[str],
+        expiry_changes: dict[str, float | None],
+    ) -> None:
+        index = self._expiry_index_unlocked()
+        deadlines = {
+            key: expiry_changes[key] if key in expiry_changes else index.get(key)
+            for key in updates
+        }
+        self._write_many_unlocked(updates, deletes, deadlines)
+
+    def _write_many_unlocked(
+        self,
+        updates: dict[str, Any],
+        deletes: Iterable[str],
+        deadlines: dict[str, float | None] | None = None,
+    ) -> None:
+        now = int(time.time())
+        deadlines = deadlines or {}
+        rows = [
+            (key, self._fernet.encrypt(_encode_json(value)), now, deadlines.get(key))
+            for key, value in updates.items()
+        ]
+        removed = [(key,) for key in deletes]
+        if not rows and not removed:
+            return
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if rows:
+                connection.executemany(
+                    "INSERT INTO vault_entries (key, value, updated_at, expires_at) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "value = excluded.value, updated_at = excluded.updated_at, "
+                    "expires_at = excluded.expires_at",
+                    rows,
+                )
+            if removed:
+                connection.executemany("DELETE FROM vault_entries WHERE key = ?", removed)
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _keys_unlocked(self, prefix: str) -> list[str]:
+        if not prefix:
+            rows = self._connection().execute("SELECT key FROM vault_entries").fetchall()
+            return [row[0] for row in rows]
+        # Primary-key range scan: every key with the prefix sorts in [prefix, upper).
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self._connection().execute(
+            "SELECT key FROM vault_entries WHERE key >= ? AND key < ?",
+            (prefix, upper),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _rotation_ids_unlocked(self) -> list[str]:
+        rows = self._connection().execute("SELECT key FROM vault_entries ORDER BY key").fetchall()
+        return [row[0] for row in rows]
+
+    def _rotate_records_unlocked(self, record_ids: list[str]) -> None:
+        connection = self._connection()
+        placeholders = ",".join("?" for _ in record_ids)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                f"SELECT key, value FROM vault_entries WHERE key IN ({placeholders})",
+                record_ids,
+            ).fetchall()
+            connection.executemany(
+                "UPDATE vault_entries SET value = ? WHERE key = ?",
+                [(self._decryptor.rotate(bytes(ciphertext)), key) for key, ciphertext in rows],
+            )
+        except (sqlite3.Error, InvalidToken) as exc:
+            connection.execute("ROLLBACK")
+            if isinstance(exc, InvalidToken):
+                raise VaultError("Vault row decryption failed. Invalid master key.") from exc
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._read_live_unlocked([key]).get(key, default)
+
+    def export_all(self) -> dict[str, Any]:
+        rows = self._connection().execute("SELECT key, value FROM vault_entries").fetchall()
+        return self._without_expired(
+            {
+                key: self._decrypt_json(bytes(ciphertext), description="Vault row")
+                for key, ciphertext in rows
+            }
+        )
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = local()
+
+
+class AsyncVault:
+    """Event-loop facade that runs vault crypto and disk I/O on a dedicated thread.
+
+    Writes issued while a flush is being scheduled are coalesced into a single
+    ``apply_changes`` call (buffered as ``(value, deadline)`` pairs). The executor has one worker, so reads submitted
+    after a write always observe it; reads of keys still waiting to be flushed
+    are answered from memory.
+    """
+
+    def __init__(self, vault: BaseVault) -> None:
+        self._vault = vault
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: dict[str, tuple[Any, float | None]] = {}
+        self._inflight: list[dict[str, tuple[Any, float | None]]] = []
+        self._flush_task: asyncio.Future[None] | None = None
+
+    @property
+    def backend(self) -> BaseVault:
+        """The wrapped synchronous vault, for startup code that runs before the loop."""
+        return self._vault
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="gitvibedev-vault",
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args))
+
+    def _buffered(self, key: str) -> tuple[bool, Any]:
+        for batch in (self._pending, *reversed(self._inflight)):
+            if key in batch:
+                value, deadline = batch[key]
+                if deadline is not None and deadline <= time.time():
+                    return True, _DELETED
+                return True, value
+        return False, None
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        found, value = self._buffered(key)
+        if found:
+            return default if value is _DELETED else copy.deepcopy(value)
+        return await self.run(self._vault.get, key, default)
+
+    async def aget_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        missing: list[str] = []
+        for key in keys:
+            found, value = self._buffered(key)
+            if not found:
+                missing.append(key)
+            elif value is not _DELETED:
+                result[key] = copy.deepcopy(value)
+        if missing:
+            result.update(await self.run(self._vault.get_many, missing))
+        return result
+
+    async def akeys(self, prefix: str = "") -> list[str]:
+        keys = set(await self.run(self._vault.keys, prefix))
+        for batch in (*self._inflight, self._pending):
+            for key in batch:
+                if key.startswith(prefix):
+                    found, value = self._buffered(key)
+                    if found and value is _DELETED:
+                        keys.discard(key)
+                    elif found:
+                        keys.add(key)
+        return sorted(keys)
+
+    async def aset(self, key: str, value: Any, *, ttl_seconds: float | None = None) -> None:
+        await self._write({key: (copy.deepcopy(value), _deadline(ttl_seconds))})
+
+    async def aset_many(
+        self, values: dict[str, Any], *, ttl_seconds: float | None = None
+    ) -> None:
+        deadline = _deadline(ttl_seconds)
+        await self._write(
+            {key: (value, deadline) for key, value in copy.deepcopy(values).items()}
+        )
+
+    async def atransaction(self, function: Callable[[VaultTransaction], Any]) -> Any:
+        """Run ``function(txn)`` inside ``transaction()`` on the vault thread."""
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+        def run_in_transaction() -> Any:
+            with self._vault.transaction() as txn:
+                return function(txn)
+
+        return await self.run(run_in_transaction)
+
+    async def adelete(self, key: str) -> None:
+        await self._write({key: (_DELETED, None)})
+
+    async def adelete_many(self, keys: Iterable[str]) -> None:
+        await self._write({key: (_DELETED, None) for key in keys})
+
+    async def _write(self, changes: dict[str, tuple[Any, float | None]]) -> None:
+        self._pending.update(changes)
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_pending())
+        await asyncio.shield(self._flush_task)
+
+    async def _flush_pending(self) -> None:
+        # Yield once so writers scheduled in the same loop iteration join this batch.
+        await asyncio.sleep(0)
+        batch, self._pending = self._pending, {}
+        self._flush_task = None
+        self._inflight.append(batch)
+        try:
+            await self.run(
+                self._vault.apply_changes,
+                {key: value for key, (value, _) in batch.items() if value is not _DELETED},
+                [key for key, (value, _) in batch.items() if value is _DELETED],
+                {key: deadline for key, (_, deadline) in batch.items() if deadline is not None},
+            )
+        finally:
+            self._inflight.remove(batch)
+
+    async def aclose(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+        await self.run(self._vault.close)
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+async def run_key_rotation(
+    vault: AsyncVault,
+    *,
+    batch_size: int = 100,
+    pause_seconds: float = 0.05,
+) -> dict[str, Any]:
+    """Drive ``rotate_step`` on the vault executor until rotation finishes."""
+    while True:
+        status = await vault.run(vault.backend.rotate_step, batch_size)
+        if status.get("status") != "running":
+            return status
+        await asyncio.sleep(pause_seconds)
+
+
+async def run_expiry_sweeper(
+    vault: AsyncVault,
+    *,
+    interval_seconds: float = 60.0,
+    batch_size: int = 1000,
+) -> None:
+    """Purge expired entries forever, sleeping until the next deadline or interval."""
+    while True:
+        try:
+            removed = await vault.run(vault.backend.purge_expired, batch_size)
+            next_deadline = await vault.run(vault.backend.next_expiry)
+        except (OSError, VaultError):
+            LOGGER.exception("Vault expiry sweep failed; will retry.")
+            removed, next_deadline = 0, None
+        if removed >= batch_size:
+            await asyncio.sleep(0)
+            continue
+        delay = interval_seconds
+        if next_deadline is not None:
+            delay = min(delay, max(0.0, next_deadline - time.time()))
+        await asyncio.sleep(delay)
+
+
+def create_vault(
+    *,
+    backend: str,
+    file_path: str,
+    master_key: str,
+    previous_master_keys: Iterable[str] = (),
+    cache_enabled: bool = False,
+    flush_interval_seconds: float = 1.0,
+    journal_enabled: bool = False,
+    journal_compact_records: int = 1000,
+) -> BaseVault:
+    """Build the configured vault backend (``file``, ``sharded`` or ``sqlite``)."""
+    normalized = backend.strip().lower() or "file"
+    if normalized == "file":
+        return LocalVault(
+            file_path=file_path,
+            master_key=master_key,
+            previous_master_keys=previous_master_keys,
+            cache_enabled=cache_enabled,
+            flush_interval_seconds=flush_interval_seconds,
+            journal_enabled=journal_enabled,
+            journal_compact_records=journal_compact_records,
+        )
+    if normalized == "sharded":
+        return ShardedVault(
+            directory=str(Path(file_path).with_suffix(".d")),
+            master_key=master_key,
+            previous_master_keys=previous_master_keys,
+            legacy_file_path=file_path,
+        )
+    if normalized == "sqlite":
+        return SQLiteVault(
+            database_path=str(Path(file_path).with_suffix(".db")),
+            master_key=master_key,
+            previous_master_keys=previous_master_keys,
+            legacy_file_path=file_path,
+        )
+    raise VaultError(
+        f"Unknown VAULT_BACKEND '{backend}'. Expected one of: {', '.join(sorted(VAULT_BACKENDS))}."
+    )
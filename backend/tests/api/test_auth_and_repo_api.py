@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import uuid
+
 import pytest
 
+from app import main as app_main
+
 pytestmark = [pytest.mark.api]
 
 
@@ -16,6 +20,22 @@ def test_auth_status_and_repos(client) -> None:
     assert len(repos.json()["repos"]) >= 1
 
 
+def test_repos_cursor_pagination(client) -> None:
+    everything = client.get("/api/repos").json()["repos"]
+    collected: list[dict] = []
+    response = client.get("/api/repos?limit=1").json()
+    while True:
+        collected.extend(response["repos"])
+        if response["next_cursor"] is None:
+            break
+        # The cursor keeps the page size it was issued with.
+        response = client.get(f"/api/repos?limit=50&cursor={response['next_cursor']}").json()
+
+    assert len(everything) > 1
+    assert collected == everything
+    assert client.get("/api/repos?cursor=not-a-cursor").status_code == 400
+
+
 def test_plugin_execution_requires_auth(client) -> None:
     response = client.post("/api/plugins/health-probe/run", json={"args": []})
     assert response.status_code == 401
@@ -50,3 +70,110 @@ def test_platform_metadata_endpoints(client) -> None:
     assert plugins.status_code == 200
     assert agents.status_code == 200
     assert workflows.status_code == 200
+
+
+def test_refresh_rotation_and_admin_revoke_all_sessions(client, admin_tokens) -> None:
+    subject = f"session-user-{uuid.uuid4().hex[:8]}"
+    issued = [
+        client.post(
+            "/api/auth/token",
+            headers={"x-bootstrap-token": app_main.security_config.bootstrap_admin_token},
+            json={"username": subject, "role": "viewer"},
+        ).json()
+        for _ in range(2)
+    ]
+    rotated = client.post(
+        "/api/auth/refresh", json={"refresh_token": issued[0]["refresh_token"]}
+    )
+    replayed = client.post(
+        "/api/auth/refresh", json={"refresh_token": issued[0]["refresh_token"]}
+    )
+
+    assert rotated.status_code == 200
+    assert replayed.status_code == 401
+
+    revoked = client.delete(
+        f"/api/auth/sessions/{subject}",
+        headers={
+            "Authorization": f"Bearer {admin_tokens['access_token']}",
+            "x-csrf-token": admin_tokens["csrf_token"],
+        },
+    )
+
+    assert revoked.status_code == 200
+    assert revoked.json()["revoked_sessions"] == 2
+    for token in (issued[1]["refresh_token"], rotated.json()["refresh_token"]):
+        response = client.post("/api/auth/refresh", json={"refresh_token": token})
+        assert response.status_code == 401
+    admin_refresh = client.post(
+        "/api/auth/refresh", json={"refresh_token": admin_tokens["refresh_token"]}
+    )
+    assert admin_refresh.status_code == 200
+
+
+def test_job_compaction_endpoint_requires_admin(client, admin_tokens) -> None:
+    anonymous = client.post("/api/jobs/compact")
+    compacted = client.post(
+        "/api/jobs/compact",
+        headers={
+            "Authorization": f"Bearer {admin_tokens['access_token']}",
+            "x-csrf-token": admin_tokens["csrf_token"],
+        },
+    )
+
+    assert anonymous.status_code == 401
+    assert compacted.status_code == 200
+    assert compacted.json()["status"] == "compacted"
+    assert {"removed_jobs", "reclaimed_bytes", "archive_bytes"} <= set(compacted.json())
+
+
+def test_dead_letter_endpoints_list_and_replay(client, admin_tokens) -> None:
+    headers = {
+        "Authorization": f"Bearer {admin_tokens['access_token']}",
+        "x-csrf-token": admin_tokens["csrf_token"],
+    }
+    job_id = f"dead-{uuid.uuid4()}"
+    app_main.job_queue._jobs[job_id] = {
+        "id": job_id,
+        "type": "ai_review",
+        "payload": {},
+        "status": "failed",
+        "attempts": 3,
+        "max_retries": 2,
+        "last_error": "upstream down",
+        "dead_lettered_at": 1,
+    }
+
+    anonymous = client.get("/api/jobs/dead-letter")
+    listed = client.get("/api/jobs/dead-letter?type=ai_review", headers=headers)
+    replayed = client.post(
+        "/api/jobs/dead-letter/replay",
+        json={"job_ids": [job_id], "spread_seconds": 0},
+        headers=headers,
+    )
+
+    assert anonymous.status_code == 401
+    assert listed.status_code == 200
+    assert [job["id"] for job in listed.json()["jobs"]] == [job_id]
+    assert replayed.status_code == 200
+    assert replayed.json()["job_ids"] == [job_id]
+    assert client.get("/api/jobs/dead-letter", headers=headers).json()["count"] == 0
+
+
+def test_batch_enqueue_and_batch_status(client) -> None:
+    review = {"owner": "demo-org", "repo": "platform-api", "git_provider": "demo"}
+    enqueued = client.post(
+        "/api/ai/review/jobs:batch",
+        json={"jobs": [{**review, "pull_number": number} for number in (41, 42, 43)]},
+    )
+    assert enqueued.status_code == 200
+    job_ids = [job["id"] for job in enqueued.json()["jobs"]]
+    assert len(job_ids) == 3
+
+    statuses = client.get("/api/jobs", params={"ids": ",".join([*job_ids, "unknown"])})
+    assert statuses.status_code == 200
+    assert [job["id"] for job in statuses.json()["jobs"]] == job_ids
+    filtered = client.get("/api/jobs", params={"ids": ",".join(job_ids), "type": "other"})
+    assert filtered.json()["count"] == 0
+    assert client.get("/api/jobs", params={"status": "bogus"}).status_code == 422
+    assert client.post("/api/ai/review/jobs:batch", json={"jobs": []}).status_code == 422
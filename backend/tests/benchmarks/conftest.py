@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parents[2] / "vault-benchmarks.json"
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+@pytest.fixture(scope="session")
+def benchmark_results() -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    yield results
+    if not results:
+        return
+    output_path = Path(os.getenv("VAULT_BENCHMARK_OUTPUT", str(DEFAULT_OUTPUT)))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "schema_version": 1,
+        "generated_at": int(time.time()),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": os.getenv("VAULT_BENCHMARK_SCALE", "quick"),
+        "results": sorted(results, key=lambda item: item["case"]),
+    }
+    output_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
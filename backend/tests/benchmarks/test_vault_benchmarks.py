@@ -0,0 +1,176 @@
+"""Vault latency/throughput benchmarks.
+
+Opt-in (``-m benchmark``). Results are written as JSON to ``VAULT_BENCHMARK_OUTPUT``
+(default ``backend/vault-benchmarks.json``) so runs can be diffed across commits.
+
+``VAULT_BENCHMARK_SCALE=full`` adds the 100k-key and 10/50 MB blob cases.
+``VAULT_BENCHMARK_BACKENDS`` selects storage engines (comma-separated, default ``file``).
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from app.vault import BaseVault, create_vault
+
+
+pytestmark = [pytest.mark.benchmark]
+
+KIB = 1024
+MIB = 1024 * KIB
+
+SCALE = os.getenv("VAULT_BENCHMARK_SCALE", "quick").strip().lower()
+KEY_COUNTS = [10, 1_000, 100_000] if SCALE == "full" else [10, 1_000]
+BLOB_SIZES = (
+    [1 * KIB, 64 * KIB, 1 * MIB, 10 * MIB, 50 * MIB]
+    if SCALE == "full"
+    else [1 * KIB, 64 * KIB, 1 * MIB]
+)
+BACKENDS = [
+    item.strip()
+    for item in os.getenv("VAULT_BENCHMARK_BACKENDS", "file").split(",")
+    if item.strip()
+]
+SMALL_VALUE_BYTES = 128
+MASTER_KEYS = ("benchmark-key-a", "benchmark-key-b")
+
+
+def _payload(size: int) -> str:
+    return os.urandom(size // 2 + 1).hex()[:size]
+
+
+def _iterations(stored_bytes: int) -> int:
+    if stored_bytes < 1 * MIB:
+        return 20
+    if stored_bytes < 20 * MIB:
+        return 5
+    return 2
+
+
+def _storage_bytes(root: Path) -> int:
+    return sum(path.stat().st_size for path in root.rglob("*") if path.is_file())
+
+
+def _measure(
+    operation: Callable[[int], None],
+    iterations: int,
+    setup: Callable[[int], None] | None = None,
+) -> dict[str, float]:
+    samples: list[float] = []
+    for index in range(iterations):
+        if setup is not None:
+            setup(index)
+        started = time.perf_counter()
+        operation(index)
+        samples.append(time.perf_counter() - started)
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    return {
+        "iterations": iterations,
+        "min_s": ordered[0],
+        "median_s": statistics.median(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "mean_s": mean,
+        "ops_per_s": (1.0 / mean) if mean > 0 else 0.0,
+    }
+
+
+def _run_suite(
+    vault: BaseVault,
+    *,
+    root: Path,
+    target_value: str,
+    stored_bytes: int,
+) -> dict[str, Any]:
+    iterations = _iterations(stored_bytes)
+    target = "bench::target"
+    vault.set(target, target_value)
+
+    def get_op(_: int) -> None:
+        assert vault.get(target) is not None
+
+    def set_op(_: int) -> None:
+        vault.set(target, target_value)
+
+    def delete_setup(index: int) -> None:
+        vault.set(f"bench::delete::{index}", "x")
+
+    def delete_op(index: int) -> None:
+        vault.delete(f"bench::delete::{index}")
+
+    def rotate_op(index: int) -> None:
+        vault.rotate_master_key(MASTER_KEYS[(index + 1) % 2])
+
+    operations = {
+        "get": _measure(get_op, iterations),
+        "set": _measure(set_op, iterations),
+        "delete": _measure(delete_op, iterations, setup=delete_setup),
+        "rotate": _measure(rotate_op, max(1, iterations // 4)),
+    }
+    vault.flush()
+    return {"operations": operations, "storage_bytes": _storage_bytes(root)}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("key_count", KEY_COUNTS)
+def test_vault_scaling_with_key_count(tmp_path, benchmark_results, backend, key_count):
+    vault = create_vault(
+        backend=backend,
+        file_path=str(tmp_path / "bench.enc"),
+        master_key=MASTER_KEYS[0],
+    )
+    value = _payload(SMALL_VALUE_BYTES)
+    vault.set_many({f"bench::key::{index}": value for index in range(key_count)})
+    try:
+        measured = _run_suite(
+            vault,
+            root=tmp_path,
+            target_value=value,
+            stored_bytes=key_count * SMALL_VALUE_BYTES,
+        )
+        assert vault.get(f"bench::key::{key_count - 1}") == value
+    finally:
+        vault.close()
+
+    benchmark_results.append(
+        {
+            "case": f"{backend}/keys={key_count}",
+            "backend": backend,
+            "key_count": key_count,
+            "value_bytes": SMALL_VALUE_BYTES,
+            **measured,
+        }
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("blob_bytes", BLOB_SIZES)
+def test_vault_scaling_with_blob_size(tmp_path, benchmark_results, backend, blob_bytes):
+    vault = create_vault(
+        backend=backend,
+        file_path=str(tmp_path / "bench.enc"),
+        master_key=MASTER_KEYS[0],
+    )
+    blob = _payload(blob_bytes)
+    vault.set_many({f"bench::key::{index}": _payload(SMALL_VALUE_BYTES) for index in range(10)})
+    try:
+        measured = _run_suite(vault, root=tmp_path, target_value=blob, stored_bytes=blob_bytes)
+        assert vault.get("bench::target") == blob
+    finally:
+        vault.close()
+
+    benchmark_results.append(
+        {
+            "case": f"{backend}/blob={blob_bytes}",
+            "backend": backend,
+            "key_count": 11,
+            "value_bytes": blob_bytes,
+            **measured,
+        }
+    )
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import itertools
 import os
 import tempfile
-import time
 from pathlib import Path
 
 import pytest
@@ -15,19 +15,22 @@ os.environ["DEMO_MODE"] = "true"
 os.environ["FAST_BOOT"] = "true"
 os.environ["VAULT_FILE"] = str(runtime_dir / "vault.enc")
 os.environ["AUDIT_LOG_FILE"] = str(runtime_dir / "audit.log")
+os.environ["JOB_ARCHIVE_FILE"] = str(runtime_dir / "job-archive.jsonl.gz")
 os.environ["PLUGIN_SANDBOX_ENABLED"] = "false"
 os.environ["PLUGIN_ALLOWLIST"] = ""
 
 from app import main as app_main
 
+# Each test client gets its own address so the per-IP rate limiter does not
+# carry request counts from one test into the next.
+_client_hosts = (f"testclient-{index}" for index in itertools.count())
+
 
 def _reset_job_queue_state() -> None:
     app_main.job_queue._jobs = {}
-    app_main.job_queue._queue = []
-    app_main.vault.set(
-        app_main.job_queue.STATE_KEY,
-        {"jobs": {}, "queue": [], "updated_at": int(time.time())},
-    )
+    app_main.job_queue._scheduler.clear()
+    stale_jobs = app_main.vault.keys(app_main.job_queue.JOB_KEY_PREFIX)
+    app_main.vault.apply_changes({}, [*stale_jobs, app_main.job_queue.STATE_KEY])
 
 
 @pytest.fixture(autouse=True)
@@ -41,7 +44,7 @@ def reset_global_state() -> None:
 
 @pytest.fixture
 def client() -> TestClient:
-    with TestClient(app_main.app) as test_client:
+    with TestClient(app_main.app, client=(next(_client_hosts), 50000)) as test_client:
         yield test_client
 
 
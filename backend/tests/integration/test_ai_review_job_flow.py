@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import time
 
 import pytest
@@ -66,3 +67,53 @@ def test_workflow_pipeline_runs_with_mock_ai(client, monkeypatch) -> None:
         assert data["steps"][1]["result"]["result"]["provider"] == "mock-ai"
     finally:
         monkeypatch.setattr(app_main.ai_review_service, "_provider", original_provider)
+
+
+def _read_sse(response) -> list[tuple[str, dict]]:
+    events: list[tuple[str, dict]] = []
+    event_name = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event_name = line[len("event: ") :]
+        elif line.startswith("data: "):
+            events.append((event_name, json.loads(line[len("data: ") :])))
+            if event_name == "end":
+                break
+    return events
+
+
+def test_job_events_stream_pushes_transitions_until_finished(client, monkeypatch) -> None:
+    monkeypatch.setattr(app_main.ai_review_service, "_provider", MockAIProvider())
+    review = {"owner": "demo-org", "repo": "platform-api", "git_provider": "demo"}
+    queued = client.post("/api/ai/review/jobs", json={**review, "pull_number": 42})
+    job_id = queued.json()["job"]["id"]
+
+    with client.stream("GET", f"/api/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_sse(response)
+
+    assert events[-1] == ("end", {"job_ids": [job_id]})
+    job_events = [data for name, data in events if name == "job"]
+    assert all(data["id"] == job_id for data in job_events)
+    assert job_events[-1]["status"] == "completed"
+    assert job_events[-1]["result"]["provider"] == "mock-ai"
+    assert len(app_main.job_queue.watchers) == 0
+
+
+def test_multiplexed_job_events_stream(client, monkeypatch) -> None:
+    monkeypatch.setattr(app_main.ai_review_service, "_provider", MockAIProvider())
+    review = {"owner": "demo-org", "repo": "platform-api", "git_provider": "demo"}
+    batch = client.post(
+        "/api/ai/review/jobs:batch",
+        json={"jobs": [{**review, "pull_number": 42}, {**review, "pull_number": 44}]},
+    )
+    job_ids = [job["id"] for job in batch.json()["jobs"]]
+
+    with client.stream("GET", "/api/jobs/events", params={"ids": ",".join(job_ids)}) as response:
+        events = _read_sse(response)
+
+    finished = {data["id"]: data["status"] for name, data in events if name == "job"}
+    assert finished == {job_ids[0]: "completed", job_ids[1]: "completed"}
+    assert client.get("/api/jobs/events", params={"ids": "missing"}).status_code == 404
+    assert client.get("/api/jobs/missing/events").status_code == 404
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+try:
+    from redis.exceptions import ResponseError, WatchError
+except ImportError:
+
+    class ResponseError(OSError):  # type: ignore[no-redef]
+        pass
+
+    class WatchError(OSError):  # type: ignore[no-redef]
+        pass
+
+
+@dataclass
+class _Group:
+    last_delivered: tuple[int, int] = (0, 0)
+    # message id -> (consumer, last delivery time)
+    pending: dict[str, tuple[str, float]] = field(default_factory=dict)
+
+
+@dataclass
+class _Stream:
+    entries: dict[str, dict[str, str]] = field(default_factory=dict)
+    groups: dict[str, _Group] = field(default_factory=dict)
+
+
+def _parse_id(message_id: str) -> tuple[int, int]:
+    millis, _, seq = message_id.partition("-")
+    return int(millis), int(seq or 0)
+
+
+class _FakePipeline:
+    """``MULTI``/``EXEC`` pipeline with ``WATCH``, mirroring redis-py's asyncio ``Pipeline``.
+
+    Commands are buffered until ``execute`` unless the pipeline is watching
+    and ``multi`` has not been called, in which case they run immediately.
+    ``execute`` raises ``WatchError`` without running anything if a watched
+    key was written since ``watch``.
+    """
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self._redis = redis
+        self._buffering = True
+        self._watched: dict[str, int] = {}
+        self._commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> _FakePipeline:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.reset()
+
+    async def reset(self) -> None:
+        self._buffering = True
+        self._watched = {}
+        self._commands = []
+
+    async def watch(self, *keys: str) -> None:
+        self._buffering = False
+        self._watched.update({key: self._redis._versions.get(key, 0) for key in keys})
+
+    def multi(self) -> None:
+        self._buffering = True
+
+    def __getattr__(self, name: str) -> Any:
+        command = getattr(self._redis, name)
+        if not self._buffering:
+            return command
+
+        def buffer(*args: Any, **kwargs: Any) -> _FakePipeline:
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return buffer
+
+    async def execute(self) -> list[Any]:
+        commands, watched = self._commands, self._watched
+        await self.reset()
+        if any(self._redis._versions.get(key, 0) != version for key, version in watched.items()):
+            raise WatchError("Watched variable changed.")
+        # Nothing below yields to the event loop, so the batch runs atomically.
+        return [await getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class FakeRedis:
+    """In-process stand-in for the ``redis.asyncio.Redis`` commands the job queue uses.
+
+    Strings, sorted sets and streams with consumer groups (pending entries,
+    ``XCLAIM``/``XAUTOCLAIM`` idle times, blocking ``XREADGROUP``), plus
+    transactional pipelines with ``WATCH``. Responses mirror
+    ``decode_responses=True``. Several queue instances can share one
+    ``FakeRedis`` to simulate replicas.
+    """
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._strings: dict[str, str] = {}
+        self._zsets: dict[str, dict[str, float]] = {}
+        self._streams: dict[str, _Stream] = {}
+        self._sequence = itertools.count(1)
+        self._added = asyncio.Condition()
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self) -> None:
+        return None
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+    def _touch(self, *keys: str) -> None:
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    # Strings -----------------------------------------------------------
+
+    async def get(self, key: str) -> str | None:
+        return self._strings.get(key)
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self._strings.get(key) for key in keys]
+
+    async def set(self, key: str, value: str) -> bool:
+        self._strings[key] = value
+        self._touch(key)
+        return True
+
+    async def mset(self, mapping: dict[str, str]) -> bool:
+        self._strings.update(mapping)
+        self._touch(*mapping)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        self._touch(*keys)
+        for key in keys:
+            removed += int(self._strings.pop(key, None) is not None)
+            removed += int(self._zsets.pop(key, None) is not None)
+        return removed
+
+    async def scan_iter(self, match: str = "*", count: int | None = None) -> AsyncIterator[str]:
+        for key in list(self._strings):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    # Sorted sets -------------------------------------------------------
+
+    async def zadd(self, name: str, mapping: dict[str, float]) -> int:
+        zset = self._zsets.setdefault(name, {})
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update({member: float(score) for member, score in mapping.items()})
+        self._touch(name)
+        return added
+
+    async def zrem(self, name: str, *members: str) -> int:
+        zset = self._zsets.get(name, {})
+        removed = sum(1 for member in members if zset.pop(member, None) is not None)
+        if removed:
+            self._touch(name)
+        return removed
+
+    async def zscore(self, name: str, member: str) -> float | None:
+        return self._zsets.get(name, {}).get(member)
+
+    async def zcard(self, name: str) -> int:
+        return len(self._zsets.get(name, {}))
+
+    def _sorted(self, name: str) -> list[tuple[str, float]]:
+        return sorted(self._zsets.get(name, {}).items(), key=lambda item: (item[1], item[0]))
+
+    async def zrangebyscore(
+        self,
+        name: str,
+        min: float | str,
+        max: float | str,
+        start: int | None = None,
+        num: int | None = None,
+    ) -> list[str]:
+        low, high = float(min), float(max)
+        members = [member for member, score in self._sorted(name) if low <= score <= high]
+        if start is not None and num is not None:
+            members = members[start : start + num]
+        return members
+
+    async def zrange(self, name: str, start: int, end: int) -> list[str]:
+        members = [member for member, _ in self._sorted(name)]
+        return members[start:] if end == -1 else members[start : end + 1]
+
+    async def zrevrange(self, name: str, start: int, end: int) -> list[str]:
+        members = [member for member, _ in reversed(self._sorted(name))]
+        return members[start:] if end == -1 else members[start : end + 1]
+
+    # Streams -----------------------------------------------------------
+
+    def _stream(self, name: str) -> _Stream:
+        stream = self._streams.get(name)
+        if stream is None:
+            raise ResponseError(f"no such key '{name}'")
+        return stream
+
+    def _group(self, name: str, groupname: str) -> _Group:
+        group = self._stream(name).groups.get(groupname)
+        if group is None:
+            raise ResponseError(f"NOGROUP No such consumer group '{groupname}' for key '{name}'")
+        return group
+
+    async def xgroup_create(
+        self,
+        name: str,
+        groupname: str,
+        id: str = "$",
+        mkstream: bool = False,
+    ) -> bool:
+        if name not in self._streams:
+            if not mkstream:
+                raise ResponseError("The XGROUP subcommand requires the key to exist.")
+            self._streams[name] = _Stream()
+        stream = self._streams[name]
+        if groupname in stream.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        last = (0, 0) if id == "0" else max(map(_parse_id, stream.entries), default=(0, 0))
+        stream.groups[groupname] = _Group(last_delivered=last)
+        return True
+
+    async def xadd(self, name: str, fields: dict[str, str]) -> str:
+        stream = self._streams.setdefault(name, _Stream())
+        message_id = f"{int(time.time() * 1000)}-{next(self._sequence)}"
+        stream.entries[message_id] = dict(fields)
+        async with self._added:
+            self._added.notify_all()
+        return message_id
+
+    async def xdel(self, name: str, *ids: str) -> int:
+        stream = self._streams.get(name)
+        if stream is None:
+            return 0
+        return sum(1 for message_id in ids if stream.entries.pop(message_id, None) is not None)
+
+    def _read_new(
+        self,
+        groupname: str,
+        consumername: str,
+        streams: dict[str, str],
+        count: int | None,
+    ) -> list[list[Any]]:
+        result: list[list[Any]] = []
+        for name in streams:
+            group = self._group(name, groupname)
+            fresh = sorted(
+                (
+                    message_id
+                    for message_id in self._streams[name].entries
+                    if _parse_id(message_id) > group.last_delivered
+                ),
+                key=_parse_id,
+            )[: count or None]
+            if not fresh:
+                continue
+            now = time.monotonic()
+            for message_id in fresh:
+                group.pending[message_id] = (consumername, now)
+            group.last_delivered = _parse_id(fresh[-1])
+            result.append(
+                [name, [(message_id, dict(self._streams[name].entries[message_id])) for message_id in fresh]]
+            )
+        return result
+
+    async def xreadgroup(
+        self,
+        groupname: str,
+        consumername: str,
+        streams: dict[str, str],
+        count: int | None = None,
+        block: int | None = None,
+    ) -> list[list[Any]]:
+        result = self._read_new(groupname, consumername, streams, count)
+        if result or block is None:
+            return result
+        deadline = time.monotonic() + block / 1000
+        async with self._added:
+            while not result:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._added.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                result = self._read_new(groupname, consumername, streams, count)
+        return result
+
+    async def xack(self, name: str, groupname: str, *ids: str) -> int:
+        group = self._group(name, groupname)
+        return sum(1 for message_id in ids if group.pending.pop(message_id, None) is not None)
+
+    async def xclaim(
+        self,
+        name: str,
+        groupname: str,
+        consumername: str,
+        min_idle_time: int,
+        message_ids: list[str],
+        justid: bool = False,
+    ) -> list[Any]:
+        group = self._group(name, groupname)
+        now = time.monotonic()
+        claimed: list[Any] = []
+        for message_id in message_ids:
+            entry = group.pending.get(message_id)
+            if entry is None or (now - entry[1]) * 1000 < min_idle_time:
+                continue
+            group.pending[message_id] = (consumername, now)
+            fields = self._streams[name].entries.get(message_id)
+            claimed.append(message_id if justid else (message_id, fields))
+        return claimed
+
+    async def xautoclaim(
+        self,
+        name: str,
+        groupname: str,
+        consumername: str,
+        min_idle_time: int,
+        start_id: str = "0-0",
+        count: int | None = None,
+    ) -> list[Any]:
+        group = self._group(name, groupname)
+        now = time.monotonic()
+        idle = [
+            message_id
+            for message_id, (_, delivered_at) in sorted(group.pending.items(), key=lambda item: _parse_id(item[0]))
+            if _parse_id(message_id) >= _parse_id(start_id) and (now - delivered_at) * 1000 >= min_idle_time
+        ][: count or None]
+        claimed: list[tuple[str, dict[str, str]]] = []
+        deleted: list[str] = []
+        for message_id in idle:
+            fields = self._streams[name].entries.get(message_id)
+            if fields is None:
+                group.pending.pop(message_id, None)
+                deleted.append(message_id)
+                continue
+            group.pending[message_id] = (consumername, now)
+            claimed.append((message_id, dict(fields)))
+        return ["0-0", claimed, deleted]
+
+    def pending_count(self, name: str, groupname: str) -> int:
+        """Test helper: number of delivered but unacknowledged messages."""
+        return len(self._group(name, groupname).pending)
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
+import httpx
+
 
 @dataclass
 class MockTextResponse:
@@ -80,10 +82,26 @@ class MockGitHubAPI:
                 "title": "Mock PR",
                 "body": "Mock body",
                 "html_url": "https://example/pr",
+                "base": {"sha": "base000"},
+                "head": {"sha": "head111"},
             }
         raise AssertionError(f"Unhandled mock route: {method} {path}")
 
+    def api_response(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json_body: dict[str, Any] | None = None,
+    ) -> httpx.Response:
+        """``json_response`` as a single-page ``httpx.Response`` (no ``Link`` header)."""
+        return httpx.Response(
+            200,
+            json=self.json_response(method, path, params=params, json_body=json_body),
+        )
+
     def request_response(self, method: str, path: str) -> MockTextResponse:
-        if method == "GET" and "/pulls/" in path:
+        if method == "GET" and path.endswith("/compare/base000...head111"):
             return MockTextResponse(text="diff --git a/a.py b/a.py\n+print('hi')\n")
         raise AssertionError(f"Unhandled text route: {method} {path}")
@@ -7,7 +7,7 @@ import pytest
 
 from app.job_queue import PersistentJobQueue
 from app.security import AuditLogger
-from app.vault import LocalVault
+from app.vault import AsyncVault, LocalVault
 
 
 pytestmark = [pytest.mark.stress, pytest.mark.asyncio]
@@ -17,7 +17,7 @@ async def test_job_queue_handles_burst_load(tmp_path):
     vault = LocalVault(file_path=str(tmp_path / "stress-vault.enc"), master_key="stress-key")
     logger = AuditLogger(file_path=str(tmp_path / "stress-audit.log"))
     queue = PersistentJobQueue(
-        vault=vault,
+        vault=AsyncVault(vault),
         audit_logger=logger,
         poll_interval_seconds=0.2,
         retry_base_seconds=1,
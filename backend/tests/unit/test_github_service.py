@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import time
+
+import httpx
 import pytest
+from fastapi import HTTPException
 
-from app.github_service import GitHubConfig, GitHubService
+from app.github_cache import ConditionalResponseCache, PullDiffCache
+from app.github_rate_limit import GitHubRateLimiter
+from app.github_service import HTTP2_AVAILABLE, GitHubConfig, GitHubHTTPConfig, GitHubService
+from app.retry import RetryPolicy
 from app.security import AuditLogger
-from app.vault import LocalVault
+from app.vault import AsyncVault, LocalVault
 from tests.mocks.github_api import MockGitHubAPI
 
 
@@ -22,7 +30,7 @@ def github_service(tmp_path):
             app_private_key="pk",
             oauth_redirect_uri="http://localhost/callback",
         ),
-        vault=vault,
+        vault=AsyncVault(vault),
         audit_logger=logger,
     )
     vault.set(service.oauth_vault_key("alice"), {"access_token": "token"})
@@ -32,15 +40,10 @@ def github_service(tmp_path):
 async def test_list_repositories_and_issues_filtering(github_service, monkeypatch):
     mock_api = MockGitHubAPI()
 
-    async def fake_json(method, path, **kwargs):
-        return mock_api.json_response(
-            method,
-            path,
-            params=kwargs.get("params"),
-            json_body=kwargs.get("json_body"),
-        )
+    async def fake_request(method, path, **kwargs):
+        return mock_api.api_response(method, path, params=kwargs.get("params"))
 
-    monkeypatch.setattr(github_service, "_github_api_json", fake_json)
+    monkeypatch.setattr(github_service, "_github_api_request", fake_request)
 
     repos = await github_service.list_repositories(oauth_owner="alice", limit=20)
     issues = await github_service.list_issues(
@@ -68,7 +71,9 @@ async def test_merge_collaborators_and_pull_context(github_service, monkeypatch)
         )
 
     async def fake_request(method, path, **kwargs):
-        return mock_api.request_response(method, path)
+        if kwargs.get("accept") == "application/vnd.github.v3.diff":
+            return mock_api.request_response(method, path)
+        return mock_api.api_response(method, path, params=kwargs.get("params"))
 
     monkeypatch.setattr(github_service, "_github_api_json", fake_json)
     monkeypatch.setattr(github_service, "_github_api_request", fake_request)
@@ -97,3 +102,414 @@ async def test_merge_collaborators_and_pull_context(github_service, monkeypatch)
     assert merged["merged"] is True
     assert collaborators[0]["login"] == "alice"
     assert "diff --git" in context["diff"]
+
+
+async def _serve_keepalive(connections: list[int]):
+    """Minimal HTTP/1.1 server that answers every request with a JSON user on one socket."""
+
+    async def handle(reader, writer):
+        connections.append(1)
+        body = b'{"login": "alice"}'
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def test_shared_client_reuses_pooled_connections(tmp_path):
+    connections: list[int] = []
+    server = await _serve_keepalive(connections)
+    port = server.sockets[0].getsockname()[1]
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="test-key")
+    service = GitHubService(
+        config=GitHubConfig(
+            client_id="cid",
+            client_secret="secret",
+            app_private_key="pk",
+            oauth_redirect_uri="http://localhost/callback",
+            api_base_url=f"http://127.0.0.1:{port}",
+        ),
+        vault=AsyncVault(vault),
+        audit_logger=AuditLogger(file_path=str(tmp_path / "audit.log")),
+        http_config=GitHubHTTPConfig(max_connections=4, max_keepalive_connections=2, http2=True),
+    )
+    vault.set(service.oauth_vault_key("alice"), {"access_token": "token"})
+    try:
+        await service.start()
+        for _ in range(3):
+            user = await service._fetch_user(access_token="token")
+            assert user["login"] == "alice"
+        await service._github_api_json("GET", "/user", oauth_owner="alice")
+        stats = service.pool_stats()
+    finally:
+        await service.aclose()
+        server.close()
+        await server.wait_closed()
+
+    assert len(connections) == 1
+    assert stats["requests"] == 4
+    assert stats["connections_opened"] == 1
+    assert stats["open_connections"] == 1
+    assert stats["idle_connections"] == 1
+    assert stats["peak_in_flight"] == 1
+    assert stats["http2"] is HTTP2_AVAILABLE
+    assert service.pool_stats()["started"] is False
+
+
+async def test_conditional_cache_serves_fresh_hits_and_304s(tmp_path):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        etag = f'"{request.url.path}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        if request.url.path.endswith("/merge"):
+            return httpx.Response(200, json={"merged": True, "sha": "abc"})
+        payload = [{"number": 7, "state": "open", "user": {"login": "alice"}}]
+        return httpx.Response(200, json=payload, headers={"ETag": etag})
+
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="test-key")
+    cache = ConditionalResponseCache(max_entries=2, endpoint_ttls={"repos": 60, "pulls": 0})
+    service = GitHubService(
+        config=GitHubConfig(
+            client_id="cid",
+            client_secret="secret",
+            app_private_key="pk",
+            oauth_redirect_uri="http://localhost/callback",
+        ),
+        vault=AsyncVault(vault),
+        audit_logger=AuditLogger(file_path=str(tmp_path / "audit.log")),
+        transport=httpx.MockTransport(handler),
+        response_cache=cache,
+    )
+    for owner in ("alice", "bob"):
+        vault.set(service.oauth_vault_key(owner), {"access_token": f"token-{owner}"})
+
+    async def pulls(oauth_owner: str = "alice") -> list[dict]:
+        return await service.list_pull_requests(
+            owner="demo", repo="alpha", oauth_owner=oauth_owner, limit=20, state_filter="open"
+        )
+
+    try:
+        # repos: fresh for 60s, so the second read never reaches GitHub.
+        await service._github_api_json("GET", "/user/repos", oauth_owner="alice", cache_endpoint="repos")
+        await service._github_api_json("GET", "/user/repos", oauth_owner="alice", cache_endpoint="repos")
+        assert len(requests) == 1
+
+        # pulls: TTL 0, so every read revalidates and a 304 is served from cache.
+        first = await pulls()
+        second = await pulls()
+        assert first == second and second[0]["number"] == 7
+        assert [r.headers.get("If-None-Match") for r in requests[1:]] == [
+            None,
+            '"/repos/demo/alpha/pulls"',
+        ]
+
+        # Another owner never shares an entry; it also evicts the LRU repos entry.
+        await pulls("bob")
+        assert requests[-1].headers.get("If-None-Match") is None
+        assert requests[-1].headers["Authorization"] == "Bearer token-bob"
+
+        # A merge invalidates the repo's cached pull lists for every owner.
+        await service.merge_pull_request(
+            owner="demo",
+            repo="alpha",
+            pull_number=7,
+            oauth_owner="alice",
+            merge_method="squash",
+            commit_title=None,
+        )
+        await pulls()
+        assert requests[-1].headers.get("If-None-Match") is None
+    finally:
+        await service.aclose()
+
+    assert service.metrics()["cache"] == {
+        "entries": 1,
+        "max_entries": 2,
+        "hits": 1,
+        "revalidated": 1,
+        "misses": 4,
+        "evictions": 1,
+        "hit_ratio": 0.3333,
+    }
+
+
+async def test_cached_responses_are_not_served_after_the_token_is_removed(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[], headers={"ETag": '"repos"'})
+
+    service = _paginated_service(
+        tmp_path, handler, response_cache=ConditionalResponseCache(endpoint_ttls={"repos": 60})
+    )
+    try:
+        await service._github_api_json("GET", "/user/repos", oauth_owner="alice", cache_endpoint="repos")
+        await service._vault.adelete(service.oauth_vault_key("alice"))
+        with pytest.raises(HTTPException) as revoked:
+            await service._github_api_json("GET", "/user/repos", oauth_owner="alice", cache_endpoint="repos")
+    finally:
+        await service.aclose()
+
+    assert revoked.value.status_code == 401
+    assert service.metrics()["cache"]["hits"] == 0
+
+
+def _paginated_service(tmp_path, handler, **options) -> GitHubService:
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="test-key")
+    service = GitHubService(
+        config=GitHubConfig(
+            client_id="cid",
+            client_secret="secret",
+            app_private_key="pk",
+            oauth_redirect_uri="http://localhost/callback",
+        ),
+        vault=AsyncVault(vault),
+        audit_logger=AuditLogger(file_path=str(tmp_path / "audit.log")),
+        transport=httpx.MockTransport(handler),
+        **options,
+    )
+    vault.set(service.oauth_vault_key("alice"), {"access_token": "token"})
+    return service
+
+
+def _repo_pages(total: int, *, advertise_last: bool = True):
+    """MockTransport handler paging ``total`` repositories with GitHub-style ``Link`` headers."""
+    served: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        per_page = int(request.url.params["per_page"])
+        served.append(page)
+        await asyncio.sleep(0.01)
+        last = max(1, -(-total // per_page))
+        items = [
+            {"id": n, "name": f"repo-{n}", "owner": {"login": "org"}}
+            for n in range((page - 1) * per_page, min(total, page * per_page))
+        ]
+        url = f"https://api.github.com/user/repos?per_page={per_page}"
+        links = []
+        if page < last:
+            links.append(f'<{url}&page={page + 1}>; rel="next"')
+            if advertise_last:
+                links.append(f'<{url}&page={last}>; rel="last"')
+        return httpx.Response(200, json=items, headers={"Link": ", ".join(links)} if links else {})
+
+    return handler, served
+
+
+async def test_pagination_fetches_known_pages_concurrently(tmp_path):
+    handler, served = _repo_pages(950)
+    service = _paginated_service(tmp_path, handler, page_concurrency=4)
+    try:
+        repos = await service.list_repositories(oauth_owner="alice", limit=1000)
+        stats = service.pool_stats()
+        assert [repo["id"] for repo in repos] == list(range(950))
+        assert sorted(served) == list(range(1, 11))
+        assert stats["peak_in_flight"] == 4
+
+        served.clear()
+        repos = await service.list_repositories(oauth_owner="alice", limit=150)
+        assert len(repos) == 150
+        assert sorted(served) == [1, 2]
+    finally:
+        await service.aclose()
+
+
+async def test_pagination_follows_next_links_and_pages_by_cursor(tmp_path):
+    handler, served = _repo_pages(250, advertise_last=False)
+    service = _paginated_service(tmp_path, handler, page_concurrency=4)
+    try:
+        pages = [page async for page in service.iter_pages("/user/repos", oauth_owner="alice")]
+        assert [(page.page, page.next_page, len(page.items)) for page in pages] == [
+            (1, 2, 100),
+            (2, 3, 100),
+            (3, None, 50),
+        ]
+        assert service.pool_stats()["peak_in_flight"] == 1
+
+        second = await service.list_repositories_page(oauth_owner="alice", limit=100, page=2)
+        last = await service.list_repositories_page(oauth_owner="alice", limit=100, page=3)
+        assert (second["repos"][0]["id"], second["next_page"]) == (100, 3)
+        assert (len(last["repos"]), last["next_page"]) == (50, None)
+    finally:
+        await service.aclose()
+
+
+def _rate_headers(remaining: int, reset_at: float, limit: int = 5000) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset_at)),
+        "X-RateLimit-Resource": "core",
+    }
+
+
+async def test_rate_limiter_paces_low_budgets_per_owner():
+    limiter = GitHubRateLimiter(pace_below=100, max_wait_seconds=60)
+    now = time.time()
+    limiter.update("alice", httpx.Response(200, headers=_rate_headers(3, now + 30)))
+    reset_at = int(now + 30)
+
+    delays = [limiter._reserve("alice", now) for _ in range(4)]
+    assert delays[0] == 0
+    # The remaining budget is spread evenly over the time left until the reset.
+    assert delays[1] == pytest.approx((reset_at - now) / 3)
+    assert delays[2] == pytest.approx(delays[1] + (reset_at - now) / 2)
+    # Budget exhausted: the next request waits for the reset.
+    assert delays[3] == pytest.approx(reset_at - now)
+    assert limiter._reserve("bob", now) == 0
+
+    limiter.update("alice", httpx.Response(200, headers=_rate_headers(0, now + 3600)))
+    with pytest.raises(HTTPException) as rejected:
+        limiter._reserve("alice", now)
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers["Retry-After"]) >= 3599
+    assert limiter.health() == {"tracked_owners": 1, "lowest_remaining": 0, "exhausted_owners": 1}
+    assert limiter.snapshot()["owners"]["alice"]["remaining"] == 0
+
+
+async def test_concurrent_acquires_on_an_exhausted_budget_all_wait_for_the_reset():
+    limiter = GitHubRateLimiter(max_wait_seconds=5)
+    limiter.update("alice", httpx.Response(200, headers=_rate_headers(0, time.time() + 60)))
+    # GitHub reports whole seconds; move the reset closer to keep the test fast.
+    limiter._budgets["alice"].reset_at = time.time() + 0.2
+    started = time.monotonic()
+
+    async def timed_acquire() -> float:
+        await limiter.acquire("alice")
+        return time.monotonic() - started
+
+    waits = await asyncio.gather(*(timed_acquire() for _ in range(4)))
+
+    assert min(waits) >= 0.19
+    assert limiter.snapshot()["throttled_requests"] == 4
+
+
+async def test_secondary_rate_limits_are_retried_and_exhaustion_fails_fast(tmp_path):
+    responses = [
+        httpx.Response(403, json={"message": "You have exceeded a secondary rate limit."}, headers={"Retry-After": "0"}),
+        httpx.Response(429, json={"message": "Too many requests"}),
+        httpx.Response(200, json={"login": "alice"}, headers=_rate_headers(4999, time.time() + 3600)),
+        httpx.Response(403, json={"message": "API rate limit exceeded"}, headers=_rate_headers(0, time.time() + 3600)),
+    ]
+    served: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        served.append(request)
+        return responses[len(served) - 1]
+
+    limiter = GitHubRateLimiter(backoff=RetryPolicy(base_seconds=0.05, jitter=False))
+    service = _paginated_service(tmp_path, handler, rate_limiter=limiter)
+    try:
+        started = time.monotonic()
+        assert (await service._github_api_json("GET", "/user", oauth_owner="alice"))["login"] == "alice"
+        assert time.monotonic() - started >= 0.05
+        assert len(served) == 3
+
+        # Primary budget exhausted until a reset an hour away: surfaced, not retried...
+        with pytest.raises(HTTPException) as exhausted:
+            await service._github_api_json("GET", "/user", oauth_owner="alice")
+        assert exhausted.value.status_code == 403
+        # ...and later calls are refused locally without spending a request.
+        with pytest.raises(HTTPException) as refused:
+            await service._github_api_json("GET", "/user", oauth_owner="alice")
+        assert refused.value.status_code == 429
+        assert len(served) == 4
+    finally:
+        await service.aclose()
+
+    rate_limits = service.metrics()["rate_limits"]
+    assert (rate_limits["retries"], rate_limits["rejected"]) == (2, 1)
+    assert rate_limits["owners"]["alice"]["remaining"] == 0
+
+
+async def test_pull_review_context_pins_the_diff_to_the_head_and_reuses_it(tmp_path):
+    head = {"sha": "aaa111"}
+    served: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["Accept"] == "application/vnd.github.v3.diff":
+            served.append(request.url.path)
+            revision = request.url.path.rsplit("/", 1)[-1]
+            return httpx.Response(200, text=f"diff --git a/{revision} b/{revision}\n")
+        etag = f'"{head["sha"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            served.append("pull:304")
+            return httpx.Response(304, headers={"ETag": etag})
+        served.append("pull")
+        payload = {"title": "Fix", "base": {"sha": "base000"}, "head": dict(head)}
+        return httpx.Response(200, json=payload, headers={"ETag": etag})
+
+    service = _paginated_service(
+        tmp_path,
+        handler,
+        response_cache=ConditionalResponseCache(endpoint_ttls={"pull_detail": 0}),
+        diff_cache=PullDiffCache(max_entries=8),
+    )
+
+    async def review_context() -> dict:
+        return await service.get_pull_review_context(
+            owner="demo", repo="alpha", pull_number=7, oauth_owner="alice"
+        )
+
+    try:
+        first = await review_context()
+        second = await review_context()
+        head["sha"] = "bbb222"
+        third = await review_context()
+    finally:
+        await service.aclose()
+
+    # The diff is requested at the SHAs the JSON named, so it is cached at once
+    # and an unchanged head costs only the revalidated JSON.
+    assert served == [
+        "pull",
+        "/repos/demo/alpha/compare/base000...aaa111",
+        "pull:304",
+        "pull",
+        "/repos/demo/alpha/compare/base000...bbb222",
+    ]
+    assert first["diff"] == second["diff"] == "diff --git a/base000...aaa111 b/base000...aaa111\n"
+    assert (third["head_sha"], third["diff"]) == ("bbb222", "diff --git a/base000...bbb222 b/base000...bbb222\n")
+    assert service.metrics()["diff_cache"] == {"entries": 1, "max_entries": 8, "hits": 1, "misses": 2}
+
+
+async def test_pull_diff_without_shas_is_fetched_but_not_cached(tmp_path):
+    served: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        served.append(request.url.path)
+        if request.headers["Accept"] == "application/vnd.github.v3.diff":
+            return httpx.Response(200, text="diff --git a/a.py b/a.py\n")
+        return httpx.Response(200, json={"title": "Fix"})
+
+    diff_cache = PullDiffCache(max_entries=8)
+    service = _paginated_service(tmp_path, handler, diff_cache=diff_cache)
+    try:
+        context = await service.get_pull_review_context(
+            owner="demo", repo="alpha", pull_number=7, oauth_owner="alice"
+        )
+    finally:
+        await service.aclose()
+
+    assert served == ["/repos/demo/alpha/pulls/7", "/repos/demo/alpha/pulls/7"]
+    assert context["head_sha"] is None
+    assert context["diff"] == "diff --git a/a.py b/a.py\n"
+    assert diff_cache.stats()["entries"] == 0
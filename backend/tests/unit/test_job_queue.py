@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import gzip
 import time
 
 import pytest
 
-from app.job_queue import PersistentJobQueue
+from app.job_archive import JobArchive
+from app.job_queue import (
+    JOB_PRIORITIES,
+    JobRetentionPolicy,
+    JobScheduler,
+    JobSpec,
+    JobWatchers,
+    PersistentJobQueue,
+    parse_retry_policies,
+)
+from app.retry import RetryPolicy
 from app.security import AuditLogger
-from app.vault import LocalVault
+from app.vault import AsyncVault, LocalVault
 
 
 pytestmark = [pytest.mark.unit, pytest.mark.asyncio]
@@ -17,7 +28,7 @@ async def test_queue_completes_job(tmp_path):
     vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
     logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
     queue = PersistentJobQueue(
-        vault=vault,
+        vault=AsyncVault(vault),
         audit_logger=logger,
         poll_interval_seconds=0.2,
         retry_base_seconds=1,
@@ -47,7 +58,7 @@ async def test_queue_retry_state_transition(tmp_path):
     vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
     logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
     queue = PersistentJobQueue(
-        vault=vault,
+        vault=AsyncVault(vault),
         audit_logger=logger,
         poll_interval_seconds=0.2,
         retry_base_seconds=1,
@@ -59,3 +70,443 @@ async def test_queue_retry_state_transition(tmp_path):
     assert current is not None
     assert current["status"] == "queued"
     assert current["attempts"] == 1
+
+
+async def test_worker_pool_respects_type_limits_and_drains_on_stop(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        poll_interval_seconds=0.2,
+        retry_base_seconds=1,
+        worker_count=4,
+        type_concurrency={"slow": 2},
+        drain_timeout_seconds=5,
+    )
+    running = {"slow": 0, "fast": 0}
+    peak = {"slow": 0, "fast": 0}
+    release = asyncio.Event()
+
+    def make_handler(job_type):
+        async def handler(payload):
+            running[job_type] += 1
+            peak[job_type] = max(peak[job_type], running[job_type])
+            try:
+                await release.wait()
+            finally:
+                running[job_type] -= 1
+            return {"index": payload["index"]}
+
+        return handler
+
+    queue.register_handler("slow", make_handler("slow"))
+    queue.register_handler("fast", make_handler("fast"))
+    jobs = [
+        await queue.enqueue(job_type=job_type, payload={"index": index}, max_retries=0)
+        for index, job_type in enumerate(["slow", "slow", "slow", "fast", "fast"])
+    ]
+    await queue.start()
+    deadline = time.time() + 3
+    while running["slow"] + running["fast"] < 4 and time.time() < deadline:
+        await asyncio.sleep(0.02)
+
+    assert peak == {"slow": 2, "fast": 2}
+
+    stopper = asyncio.create_task(queue.stop())
+    await asyncio.sleep(0.1)
+    assert not stopper.done()
+    release.set()
+    await stopper
+
+    statuses = [(await queue.get_job(job["id"]))["status"] for job in jobs]
+    assert statuses.count("completed") == 4
+    assert statuses.count("queued") == 1
+
+
+async def test_idle_workers_wake_on_enqueue_and_at_retry_deadline(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        poll_interval_seconds=60,
+        retry_policies={"flaky": RetryPolicy(base_seconds=1, jitter=False)},
+    )
+    attempts: list[float] = []
+
+    async def flaky(payload):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RuntimeError("transient")
+        return {"status": "ok"}
+
+    queue.register_handler("flaky", flaky)
+    await queue.start()
+    try:
+        await asyncio.sleep(0.1)
+        enqueued_at = time.monotonic()
+        queued = await queue.enqueue(job_type="flaky", payload={}, max_retries=1)
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            current = await queue.get_job(queued["id"])
+            if current and current["status"] == "completed":
+                break
+            await asyncio.sleep(0.02)
+        else:
+            raise AssertionError("Job did not complete in time")
+    finally:
+        await queue.stop()
+
+    assert attempts[0] - enqueued_at < 0.5
+    assert 0.9 <= attempts[1] - attempts[0] < 2.0
+
+
+def _dispatch_order(scheduler: JobScheduler) -> list[str]:
+    """Pop every ready job, ignoring type caps; empties the scheduler."""
+    order: list[str] = []
+    while (
+        job_id := scheduler.pop_ready(
+            time.time(),
+            is_runnable=lambda job_id: True,
+            job_type_of=lambda job_id: "",
+            has_capacity=lambda job_type: True,
+        )
+    ) is not None:
+        order.append(job_id)
+    return order
+
+
+async def test_scheduler_orders_by_priority_and_run_after():
+    scheduler = JobScheduler()
+    now = 1000.0
+    scheduler.push("bulk", priority=JOB_PRIORITIES["low"], run_after=now, now=now)
+    scheduler.push("normal", priority=JOB_PRIORITIES["normal"], run_after=now, now=now)
+    scheduler.push("retry", priority=JOB_PRIORITIES["high"], run_after=now + 5, now=now)
+    scheduler.push("interactive", priority=JOB_PRIORITIES["high"], run_after=now, now=now)
+    capped = {"capped"}
+    types = {"capped-job": "capped"}
+    scheduler.push("capped-job", priority=JOB_PRIORITIES["high"], run_after=now, now=now)
+
+    def pop(at):
+        return scheduler.pop_ready(
+            at,
+            is_runnable=lambda job_id: True,
+            job_type_of=lambda job_id: types.get(job_id, "free"),
+            has_capacity=lambda job_type: job_type not in capped,
+        )
+
+    assert pop(now) == "interactive"
+    assert pop(now) == "normal"
+    assert scheduler.next_run_after() == now + 5
+    assert pop(now + 5) == "retry"
+    capped.clear()
+    scheduler.release_type("capped")
+    assert pop(now + 5) == "capped-job"
+    assert pop(now + 5) == "bulk"
+    assert pop(now + 5) is None
+    assert len(scheduler) == 0
+
+
+async def test_jobs_persist_individually_and_legacy_state_migrates(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    vault.set(
+        PersistentJobQueue.STATE_KEY,
+        {
+            "jobs": {
+                "old-running": {"id": "old-running", "type": "echo", "status": "running"},
+                "old-queued": {"id": "old-queued", "type": "echo", "status": "queued"},
+                "old-done": {"id": "old-done", "type": "echo", "status": "completed"},
+            },
+            "queue": ["old-queued"],
+        },
+    )
+    queue = PersistentJobQueue(vault=AsyncVault(vault), audit_logger=logger)
+
+    assert vault.get(PersistentJobQueue.STATE_KEY) is None
+    assert vault.keys(PersistentJobQueue.JOB_KEY_PREFIX) == [
+        "background_job::old-done",
+        "background_job::old-queued",
+        "background_job::old-running",
+    ]
+    assert vault.get("background_job::old-running")["status"] == "queued"
+    assert _dispatch_order(queue._scheduler) == ["old-queued", "old-running"]
+
+    written: list[dict] = []
+    original_apply = vault.apply_changes
+
+    def recording_apply(updates, deletes=(), deadlines=None):
+        written.append(dict(updates))
+        original_apply(updates, deletes, deadlines)
+
+    vault.apply_changes = recording_apply
+    fresh = await queue.enqueue(job_type="echo", payload={}, max_retries=0, priority="high")
+
+    assert [list(batch) for batch in written] == [[f"background_job::{fresh['id']}"]]
+    reloaded = PersistentJobQueue(vault=AsyncVault(vault), audit_logger=logger)
+    assert _dispatch_order(reloaded._scheduler) == [fresh["id"], "old-queued", "old-running"]
+
+
+async def test_compaction_archives_jobs_beyond_retention(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    archive = JobArchive(str(tmp_path / "archive.jsonl.gz"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        retention=JobRetentionPolicy(
+            max_age_seconds={"failed": 60},
+            max_count={"completed": 2},
+        ),
+        archive=archive,
+    )
+    now = int(time.time())
+    jobs = [await queue.enqueue(job_type="echo", payload={"i": i}, max_retries=0) for i in range(5)]
+    for index, job in enumerate(jobs[:3]):
+        queue._jobs[job["id"]].update(status="completed", updated_at=now - index, result={"i": index})
+    queue._jobs[jobs[3]["id"]].update(status="failed", updated_at=now - 120)
+
+    report = await queue.compact()
+
+    assert report["removed_jobs"] == 2
+    assert report["archived_jobs"] == 2
+    assert report["reclaimed_bytes"] > 0
+    assert report["remaining_jobs"] == 3
+    assert vault.get(f"background_job::{jobs[2]['id']}") is None
+    assert vault.get(f"background_job::{jobs[4]['id']}") is not None
+    archived = await queue.get_job(jobs[2]["id"])
+    assert archived["archived"] is True
+    assert archived["result"] == {"i": 2}
+    assert (await queue.get_job(jobs[3]["id"]))["status"] == "failed"
+    assert (await queue.compact())["removed_jobs"] == 0
+
+
+async def test_archive_lookups_read_only_the_indexed_member(tmp_path, monkeypatch):
+    path = tmp_path / "archive.jsonl.gz"
+    archive = JobArchive(str(path))
+    archive.append([{"id": "a", "status": "failed"}, {"id": "b", "status": "completed"}])
+    archive.append([{"id": "a", "status": "completed"}])
+
+    reopened = JobArchive(str(path))
+    decompressed: list[int] = []
+    original_decompress = gzip.decompress
+    monkeypatch.setattr(
+        gzip, "decompress", lambda data: decompressed.append(len(data)) or original_decompress(data)
+    )
+    assert reopened.find("missing") is None
+    assert decompressed == []
+    assert reopened.find_many(["a", "b"]) == {
+        "a": {"id": "a", "status": "completed"},
+        "b": {"id": "b", "status": "completed"},
+    }
+    assert sum(decompressed) == path.stat().st_size
+
+    path.with_name("archive.jsonl.gz.idx").unlink()
+    assert JobArchive(str(path)).find("a") == {"id": "a", "status": "completed"}
+
+
+async def test_retry_policy_backoff_is_exponential_capped_and_jittered(monkeypatch):
+    policy = RetryPolicy(base_seconds=2, max_seconds=30, jitter=False)
+    assert [policy.delay_seconds(attempt) for attempt in range(1, 7)] == [2, 4, 8, 16, 30, 30]
+    assert RetryPolicy(base_seconds=2, max_seconds=30).ceiling_seconds(10_000) == 30
+
+    bounds: list[tuple[float, float]] = []
+    monkeypatch.setattr(
+        "app.job_queue.random.uniform",
+        lambda low, high: bounds.append((low, high)) or high / 2,
+    )
+    jittered = RetryPolicy(base_seconds=2, max_seconds=30)
+    assert jittered.delay_seconds(3) == 4
+    assert bounds == [(0.0, 8)]
+
+    policies = parse_retry_policies("ai_review=5:600, bad=x, fast=1", default=jittered)
+    assert policies == {
+        "ai_review": RetryPolicy(base_seconds=5, max_seconds=600),
+        "fast": RetryPolicy(base_seconds=1, max_seconds=30),
+    }
+
+
+async def test_exhausted_jobs_are_dead_lettered_and_replayed_in_bulk(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        retry_policies={"flaky": RetryPolicy(base_seconds=10, max_seconds=10, jitter=False)},
+    )
+    flaky = await queue.enqueue(job_type="flaky", payload={}, max_retries=1)
+    other = await queue.enqueue(job_type="other", payload={}, max_retries=0)
+
+    before = time.time()
+    await queue._mark_failed_or_retry(job_id=flaky["id"], error_message="down")
+    assert queue._jobs[flaky["id"]]["run_after"] >= before + 10
+    await queue._mark_failed_or_retry(job_id=flaky["id"], error_message="still down")
+    await queue._mark_failed_or_retry(job_id=other["id"], error_message="down")
+
+    dead = await queue.list_dead_letters()
+    assert {job["id"] for job in dead} == {flaky["id"], other["id"]}
+    assert all(job["status"] == "failed" and job["dead_lettered_at"] for job in dead)
+    assert [job["id"] for job in await queue.list_dead_letters(job_type="other")] == [other["id"]]
+
+    replayed = await queue.replay_dead_letters(job_type="flaky", spread_seconds=30)
+    assert replayed == [flaky["id"]]
+    job = await queue.get_job(flaky["id"])
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert job["dead_lettered_at"] is None
+    assert job["replays"] == 1
+    assert time.time() - 1 <= queue._jobs[flaky["id"]]["run_after"] <= time.time() + 30
+    assert vault.get(f"background_job::{flaky['id']}")["status"] == "queued"
+    assert await queue.replay_dead_letters(job_ids=[flaky["id"], "missing"]) == []
+    assert [job["id"] for job in await queue.list_dead_letters()] == [other["id"]]
+
+
+async def test_execution_timeout_cancels_hung_handler_and_frees_the_slot(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        poll_interval_seconds=0.2,
+        worker_count=1,
+        type_concurrency={"review": 1},
+        execution_timeouts={"review": 0.2},
+    )
+    cancelled = asyncio.Event()
+
+    async def review(payload):
+        if payload["hang"]:
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                # Misbehaving handler: swallows the cancellation and keeps going.
+                await asyncio.sleep(0.3)
+        return {"status": "ok"}
+
+    queue.register_handler("review", review)
+    await queue.start()
+    try:
+        hung = await queue.enqueue(job_type="review", payload={"hang": True}, max_retries=0)
+        healthy = await queue.enqueue(job_type="review", payload={"hang": False}, max_retries=0)
+        deadline = time.time() + 3
+        while time.time() < deadline:
+            current = await queue.get_job(healthy["id"])
+            if current and current["status"] == "completed":
+                break
+            await asyncio.sleep(0.02)
+        else:
+            raise AssertionError("Healthy job was starved by the hung handler")
+        failed = await queue.get_job(hung["id"])
+        # Let the misbehaving handler run out; its late result must be discarded.
+        await asyncio.sleep(0.4)
+        assert (await queue.get_job(hung["id"]))["status"] == "failed"
+    finally:
+        await queue.stop()
+
+    assert cancelled.is_set()
+    assert failed["status"] == "failed"
+    assert "execution timeout" in failed["last_error"]
+    assert queue._running_by_type == {"review": 0}
+
+
+async def test_reaper_retries_jobs_whose_lease_expired(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    queue = PersistentJobQueue(
+        vault=AsyncVault(vault),
+        audit_logger=logger,
+        poll_interval_seconds=0.2,
+        lease_seconds=0.3,
+        retry_policies={"stuck": RetryPolicy(base_seconds=30, jitter=False)},
+    )
+
+    async def silent_heartbeat(job_id, lease_id):
+        await asyncio.sleep(30)
+
+    queue._heartbeat = silent_heartbeat
+    cancelled = asyncio.Event()
+
+    async def stuck(payload):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {"status": "late"}
+
+    queue.register_handler("stuck", stuck)
+    await queue.start()
+    try:
+        queued = await queue.enqueue(job_type="stuck", payload={}, max_retries=1)
+        deadline = time.time() + 3
+        while time.time() < deadline:
+            current = await queue.get_job(queued["id"])
+            if current and current["attempts"] == 1:
+                break
+            await asyncio.sleep(0.02)
+        else:
+            raise AssertionError("Expired lease was not reaped")
+        await asyncio.sleep(0.1)
+    finally:
+        await queue.stop()
+
+    assert cancelled.is_set()
+    assert current["status"] == "queued"
+    assert "lease expired" in current["last_error"]
+    assert queue._leases == {}
+    assert queue._running_by_type == {"stuck": 0}
+
+
+async def test_enqueue_many_writes_once_and_list_jobs_filters(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="queue-key")
+    logger = AuditLogger(file_path=str(tmp_path / "audit.log"))
+    archive = JobArchive(str(tmp_path / "archive.jsonl.gz"))
+    async_vault = AsyncVault(vault)
+    queue = PersistentJobQueue(vault=async_vault, audit_logger=logger, archive=archive)
+    writes: list[int] = []
+    original_aset_many = async_vault.aset_many
+
+    async def counting_aset_many(values, **kwargs):
+        writes.append(len(values))
+        await original_aset_many(values, **kwargs)
+
+    async_vault.aset_many = counting_aset_many
+
+    jobs = await queue.enqueue_many(
+        [JobSpec(job_type="review", payload={"n": n}, max_retries=0) for n in range(5)]
+        + [JobSpec(job_type="lint", payload={}, max_retries=0, priority="low")]
+    )
+
+    assert writes == [6]
+    assert len(vault.keys(PersistentJobQueue.JOB_KEY_PREFIX)) == 6
+    queue._jobs[jobs[1]["id"]]["status"] = "completed"
+    archive.append([{"id": "archived-job", "type": "review", "status": "completed"}])
+
+    by_id = await queue.list_jobs(job_ids=[jobs[2]["id"], "archived-job", "missing", jobs[0]["id"]])
+    assert [job["id"] for job in by_id] == [jobs[2]["id"], "archived-job", jobs[0]["id"]]
+    assert by_id[1]["archived"] is True
+    completed = await queue.list_jobs(job_ids=[job["id"] for job in jobs], status="completed")
+    assert [job["id"] for job in completed] == [jobs[1]["id"]]
+    assert [job["id"] for job in await queue.list_jobs(job_type="lint")] == [jobs[5]["id"]]
+    newest = await queue.list_jobs(status="queued", limit=2)
+    assert [job["id"] for job in newest] == [jobs[5]["id"], jobs[4]["id"]]
+
+
+async def test_job_watchers_filter_by_id_and_drop_oldest_when_full():
+    watchers = JobWatchers(max_buffer=2)
+    only_a = watchers.subscribe(["a"])
+    everything = watchers.subscribe()
+    for status_value in ("queued", "running", "completed"):
+        watchers.publish({"id": "a", "status": status_value})
+    watchers.publish({"id": "b", "status": "queued"})
+
+    assert [only_a.get_nowait()["status"] for _ in range(only_a.qsize())] == ["running", "completed"]
+    assert [(item["id"], item["status"]) for item in [everything.get_nowait(), everything.get_nowait()]] == [
+        ("a", "completed"),
+        ("b", "queued"),
+    ]
+    watchers.unsubscribe(only_a)
+    watchers.unsubscribe(everything)
+    assert len(watchers) == 0
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.job_queue import JobSpec
+from app.redis_job_queue import RedisJobQueue
+from app.retry import RetryPolicy
+from app.security import AuditLogger
+from tests.mocks.fake_redis import FakeRedis, _FakePipeline
+
+
+pytestmark = [pytest.mark.unit, pytest.mark.asyncio]
+
+
+def _queue(redis: FakeRedis, tmp_path, name: str, **overrides) -> RedisJobQueue:
+    options = {
+        "poll_interval_seconds": 0.05,
+        "worker_count": 2,
+        "visibility_timeout_seconds": 1,
+        **overrides,
+    }
+    return RedisJobQueue(
+        redis=redis,
+        audit_logger=AuditLogger(file_path=str(tmp_path / f"audit-{name}.log")),
+        consumer_name=name,
+        **options,
+    )
+
+
+async def _wait_for_status(queue: RedisJobQueue, job_id: str, expected: str, timeout: float = 5) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = await queue.get_job(job_id)
+        if job and job["status"] == expected:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not reach {expected}")
+
+
+async def test_replicas_share_work_and_run_each_job_once(tmp_path):
+    redis = FakeRedis()
+    replicas = [_queue(redis, tmp_path, f"replica-{index}") for index in range(2)]
+    runs: dict[int, list[str]] = {}
+
+    for index, replica in enumerate(replicas):
+
+        async def handler(payload, index=index):
+            await asyncio.sleep(0.01)
+            runs.setdefault(payload["n"], []).append(f"replica-{index}")
+            return {"n": payload["n"]}
+
+        replica.register_handler("echo", handler)
+        await replica.start()
+    try:
+        jobs = [
+            await replicas[n % 2].enqueue(job_type="echo", payload={"n": n}, max_retries=0)
+            for n in range(20)
+        ]
+        for job in jobs:
+            await _wait_for_status(replicas[0], job["id"], "completed")
+    finally:
+        for replica in replicas:
+            await replica.stop()
+
+    assert sorted(runs) == list(range(20))
+    assert all(len(consumers) == 1 for consumers in runs.values())
+    assert {consumer for consumers in runs.values() for consumer in consumers} == {
+        "replica-0",
+        "replica-1",
+    }
+    assert all(redis.pending_count(stream, "gitvibedev:jobs:workers") == 0 for stream in replicas[0]._streams)
+
+
+async def test_unacknowledged_job_is_reclaimed_after_visibility_timeout(tmp_path):
+    redis = FakeRedis()
+    crashed = _queue(redis, tmp_path, "crashed")
+    survivor = _queue(redis, tmp_path, "survivor")
+    await crashed._ensure_groups()
+    queued = await crashed.enqueue(job_type="echo", payload={}, max_retries=0, priority="high")
+    # The crashed replica takes delivery and never acknowledges it.
+    stream, _, job_id = await crashed._next_message()
+    assert job_id == queued["id"]
+
+    async def handler(payload):
+        return {"status": "ok"}
+
+    survivor.register_handler("echo", handler)
+    await survivor.start()
+    try:
+        await asyncio.sleep(0.3)
+        assert (await survivor.get_job(job_id))["status"] == "queued"
+        await _wait_for_status(survivor, job_id, "completed", timeout=3)
+    finally:
+        await survivor.stop()
+    assert redis.pending_count(stream, "gitvibedev:jobs:workers") == 0
+
+
+async def test_job_that_keeps_killing_its_worker_is_dead_lettered(tmp_path):
+    redis = FakeRedis()
+    crasher = _queue(redis, tmp_path, "crasher")
+    survivor = _queue(
+        redis,
+        tmp_path,
+        "survivor",
+        retry_policies={"poison": RetryPolicy(base_seconds=0.01, max_seconds=0.01, jitter=False)},
+    )
+    survivor._visibility_timeout_seconds = 0.05
+
+    async def handler(payload):
+        return {"status": "ok"}
+
+    survivor.register_handler("poison", handler)
+    await survivor._ensure_groups()
+    queued = await survivor.enqueue(job_type="poison", payload={}, max_retries=1)
+
+    for attempt in (1, 2):
+        # The crasher starts the job and dies before acknowledging it.
+        stream, _, job_id = await crasher._next_message()
+        job = await crasher._load_job(job_id)
+        job["status"] = "running"
+        await crasher._save_job(job)
+        await asyncio.sleep(0.1)
+        assert await survivor._reclaim_idle() == 1
+        await survivor._process(*survivor._claimed.popleft())
+        assert (await survivor.get_job(job_id))["attempts"] == attempt
+        await asyncio.sleep(0.05)
+        await survivor._promote_due()
+
+    dead = await survivor.get_job(queued["id"])
+    assert dead["status"] == "failed"
+    assert dead["dead_lettered_at"] is not None
+    assert [job["id"] for job in await survivor.list_dead_letters()] == [queued["id"]]
+    assert redis.pending_count(stream, "gitvibedev:jobs:workers") == 0
+
+
+async def test_capped_type_does_not_block_workers_for_other_types(tmp_path):
+    redis = FakeRedis()
+    queue = _queue(redis, tmp_path, "capped", type_concurrency={"slow": 1})
+    release = asyncio.Event()
+
+    async def slow(payload):
+        await release.wait()
+        return {"n": payload["n"]}
+
+    async def fast(payload):
+        return {"status": "ok"}
+
+    queue.register_handler("slow", slow)
+    queue.register_handler("fast", fast)
+    await queue.start()
+    try:
+        slow_jobs = [
+            await queue.enqueue(job_type="slow", payload={"n": n}, max_retries=0) for n in range(2)
+        ]
+        await _wait_for_status(queue, slow_jobs[0]["id"], "running")
+        await asyncio.sleep(0.1)
+        quick = await queue.enqueue(job_type="fast", payload={}, max_retries=0)
+        await _wait_for_status(queue, quick["id"], "completed", timeout=1)
+        assert (await queue.get_job(slow_jobs[1]["id"]))["status"] == "queued"
+
+        release.set()
+        for job in slow_jobs:
+            await _wait_for_status(queue, job["id"], "completed")
+    finally:
+        await queue.stop()
+
+
+async def test_retries_dead_letters_and_replay(tmp_path):
+    redis = FakeRedis()
+    queue = _queue(
+        redis,
+        tmp_path,
+        "solo",
+        retry_policies={"flaky": RetryPolicy(base_seconds=0.2, max_seconds=0.2, jitter=False)},
+    )
+    calls: list[float] = []
+    healthy = asyncio.Event()
+
+    async def flaky(payload):
+        calls.append(time.monotonic())
+        if not healthy.is_set():
+            raise RuntimeError("upstream down")
+        return {"status": "ok"}
+
+    queue.register_handler("flaky", flaky)
+    await queue.start()
+    try:
+        queued = await queue.enqueue(job_type="flaky", payload={}, max_retries=1)
+        dead = await _wait_for_status(queue, queued["id"], "failed")
+        assert dead["attempts"] == 2
+        assert dead["dead_lettered_at"] is not None
+        assert calls[1] - calls[0] >= 0.19
+        assert [job["id"] for job in await queue.list_dead_letters(job_type="flaky")] == [queued["id"]]
+
+        healthy.set()
+        assert await queue.replay_dead_letters(job_type="flaky") == [queued["id"]]
+        assert await queue.replay_dead_letters(job_type="flaky") == []
+        replayed = await _wait_for_status(queue, queued["id"], "completed")
+        assert replayed["replays"] == 1
+        assert await queue.list_dead_letters() == []
+    finally:
+        await queue.stop()
+
+
+async def test_crash_before_exec_never_strands_a_job(tmp_path, monkeypatch):
+    redis = FakeRedis()
+    replicas = [_queue(redis, tmp_path, f"replica-{index}") for index in range(2)]
+    await replicas[0]._ensure_groups()
+    stream = replicas[0]._streams[1]
+    original_execute = _FakePipeline.execute
+
+    class ReplicaCrash(Exception):
+        pass
+
+    async def crash(self):
+        raise ReplicaCrash("replica died before EXEC")
+
+    monkeypatch.setattr(_FakePipeline, "execute", crash)
+    with pytest.raises(ReplicaCrash):
+        await replicas[0].enqueue(job_type="echo", payload={}, max_retries=0)
+    assert [key async for key in redis.scan_iter()] == []
+    assert await redis.xreadgroup("gitvibedev:jobs:workers", "probe", {stream: ">"}) == []
+
+    monkeypatch.setattr(_FakePipeline, "execute", original_execute)
+    job = await replicas[0].enqueue(job_type="echo", payload={}, max_retries=0)
+    stream, message_id, _ = await replicas[0]._next_message()
+    await replicas[0]._ack(stream, message_id)
+    job = await replicas[0]._load_job(job["id"])
+    job["run_after"] = time.time() - 1
+    await replicas[0]._save_job(job, (replicas[0]._delayed_key, job["run_after"]))
+
+    monkeypatch.setattr(_FakePipeline, "execute", crash)
+    with pytest.raises(ReplicaCrash):
+        await replicas[0]._promote_due()
+    assert await redis.zscore(replicas[0]._delayed_key, job["id"]) is not None
+
+    monkeypatch.setattr(_FakePipeline, "execute", original_execute)
+    assert [await replica._promote_due() for replica in replicas] == [1, 0]
+    assert await redis.zcard(replicas[0]._delayed_key) == 0
+    assert (await replicas[1]._next_message())[2] == job["id"]
+    assert await replicas[1]._next_message() is None
+
+
+async def test_enqueue_many_and_list_jobs(tmp_path):
+    redis = FakeRedis()
+    queue = _queue(redis, tmp_path, "batch")
+    await queue._ensure_groups()
+    jobs = await queue.enqueue_many(
+        [JobSpec(job_type="review", payload={"n": n}, max_retries=0) for n in range(3)]
+        + [JobSpec(job_type="lint", payload={}, max_retries=0, priority="high")]
+    )
+
+    by_id = await queue.list_jobs(job_ids=[jobs[1]["id"], "missing", jobs[0]["id"]])
+    assert [job["id"] for job in by_id] == [jobs[1]["id"], jobs[0]["id"]]
+    assert [job["id"] for job in await queue.list_jobs(job_type="lint")] == [jobs[3]["id"]]
+    assert len(await queue.list_jobs(status="queued")) == 4
+    stream, _, job_id = await queue._next_message()
+    assert (stream, job_id) == (queue._streams[0], jobs[3]["id"])
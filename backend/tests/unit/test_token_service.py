@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.security import SecurityConfig, TokenService
+from app.vault import AsyncVault, LocalVault
+
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_legacy_refresh_map_is_split_into_per_session_keys(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="token-key")
+    now = int(time.time())
+    vault.set(
+        TokenService.REFRESH_STATE_KEY,
+        {
+            "live-a": {"subject": "alice", "role": "admin", "expires_at": now + 600},
+            "live-b": {"subject": "alice", "role": "admin", "expires_at": now + 900},
+            "expired": {"subject": "bob", "role": "viewer", "expires_at": now - 1},
+        },
+    )
+
+    TokenService(config=SecurityConfig.from_env(), vault=AsyncVault(vault))
+
+    stored = vault.export_all()
+    assert TokenService.REFRESH_STATE_KEY not in stored
+    assert stored["refresh_session::live-a"]["subject"] == "alice"
+    assert "refresh_session::expired" not in stored
+    assert stored["refresh_subject::alice"] == {"live-a": now + 600, "live-b": now + 900}
+    assert "refresh_subject::bob" not in stored
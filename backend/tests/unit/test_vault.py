@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.vault import (
+    EXPIRY_INDEX_KEY,
+    AsyncVault,
+    BaseVault,
+    LocalVault,
+    ShardedVault,
+    SQLiteVault,
+    VaultError,
+    create_vault,
+    run_expiry_sweeper,
+    run_key_rotation,
+)
+
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_local_vault_roundtrip_and_rotation(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="first-key")
+    vault.set("alpha", {"value": 1})
+    vault.set("beta", "two")
+    vault.delete("beta")
+
+    assert vault.get("alpha") == {"value": 1}
+    assert vault.get("beta", "missing") == "missing"
+
+    vault.rotate_master_key("second-key")
+    reopened = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="second-key")
+    assert reopened.get("alpha") == {"value": 1}
+    with pytest.raises(VaultError):
+        LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="first-key").get("alpha")
+
+
+def test_sharded_vault_writes_only_touched_record(tmp_path):
+    vault = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="shard-key")
+    vault.set("oauth::github::alice", {"access_token": "a"})
+    vault.set("refresh_sessions", {"hash": {"subject": "alice"}})
+    untouched = vault._record_path("refresh_sessions")
+    before = untouched.stat().st_mtime_ns
+
+    vault.set("oauth::github::alice", {"access_token": "b"})
+    vault.delete("missing-key")
+
+    assert untouched.stat().st_mtime_ns == before
+    assert vault.get("oauth::github::alice") == {"access_token": "b"}
+    assert len(list((tmp_path / "secrets.d").glob("*/*.enc"))) == 2
+
+    vault.delete("oauth::github::alice")
+    assert vault.get("oauth::github::alice") is None
+
+
+def test_sharded_vault_rotation_and_legacy_migration(tmp_path):
+    legacy_path = tmp_path / "secrets.enc"
+    legacy = LocalVault(file_path=str(legacy_path), master_key="master")
+    legacy.set("jwt_signing_state", {"current": {"kid": "initial"}})
+    legacy.set("oauth::github::bob", {"access_token": "t"})
+
+    vault = create_vault(backend="sharded", file_path=str(legacy_path), master_key="master")
+
+    assert isinstance(vault, ShardedVault)
+    assert vault.export_all() == legacy.export_all()
+
+    vault.rotate_master_key("rotated")
+    reopened = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="rotated")
+    assert reopened.get("oauth::github::bob") == {"access_token": "t"}
+
+
+def test_sharded_vault_keeps_deadlines_in_their_own_records(tmp_path):
+    directory = str(tmp_path / "secrets.d")
+    vault = ShardedVault(directory=directory, master_key="shard-key")
+    vault.set("session::a", "a", ttl_seconds=60)
+    untouched = vault._record_path("session::a")
+    before = untouched.stat().st_mtime_ns
+
+    vault.set("session::b", "b", ttl_seconds=120)
+
+    assert untouched.stat().st_mtime_ns == before
+    assert len(list((tmp_path / "secrets.d").glob("*/*.enc"))) == 2
+    reopened = ShardedVault(directory=directory, master_key="shard-key")
+    assert reopened._expiry_index_unlocked() == vault._expiry_index_unlocked()
+
+
+def test_sharded_vault_moves_legacy_expiry_index_into_records(tmp_path):
+    directory = str(tmp_path / "secrets.d")
+    vault = ShardedVault(directory=directory, master_key="shard-key")
+    vault.set("session::a", "a")
+    vault._write_record(
+        vault._record_path(EXPIRY_INDEX_KEY), EXPIRY_INDEX_KEY, {"session::a": 4_000_000_000.0}
+    )
+
+    reopened = ShardedVault(directory=directory, master_key="shard-key")
+
+    assert reopened.next_expiry() == 4_000_000_000.0
+    assert not reopened._record_path(EXPIRY_INDEX_KEY).exists()
+    assert reopened._read_record(reopened._record_path("session::a"))[2] == 4_000_000_000.0
+
+
+def test_interrupted_legacy_migration_leaves_no_partial_directory(tmp_path, monkeypatch):
+    legacy_path = tmp_path / "secrets.enc"
+    legacy = LocalVault(file_path=str(legacy_path), master_key="master")
+    legacy.set("first", 1)
+    legacy.set("second", 2)
+    original_write = ShardedVault._write_record
+    written: list[str] = []
+
+    def failing_write(self, path, key, value, expires_at=None):
+        if written:
+            raise OSError("disk full")
+        written.append(key)
+        original_write(self, path, key, value, expires_at)
+
+    monkeypatch.setattr(ShardedVault, "_write_record", failing_write)
+    with pytest.raises(OSError):
+        create_vault(backend="sharded", file_path=str(legacy_path), master_key="master")
+    assert not (tmp_path / "secrets.d").exists()
+    assert not (tmp_path / "secrets.d.migrating").exists()
+
+    monkeypatch.setattr(ShardedVault, "_write_record", original_write)
+    vault = create_vault(backend="sharded", file_path=str(legacy_path), master_key="master")
+    assert vault.export_all() == {"first": 1, "second": 2}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class ReadOnlyVault(BaseVault):
+        def _read_many_unlocked(self, keys):
+            return {}
+
+    with pytest.raises(TypeError):
+        ReadOnlyVault(master_key="key")
+
+
+def test_create_vault_rejects_unknown_backend(tmp_path):
+    with pytest.raises(VaultError):
+        create_vault(backend="s3", file_path=str(tmp_path / "vault.enc"), master_key="k")
+
+
+def test_write_behind_cache_flushes_and_detects_external_changes(tmp_path):
+    path = tmp_path / "vault.enc"
+    vault = LocalVault(
+        file_path=str(path),
+        master_key="cache-key",
+        cache_enabled=True,
+        flush_interval_seconds=60,
+    )
+    vault.set("tokens", {"alice": "a"})
+    cached = vault.get("tokens")
+    cached["alice"] = "mutated"
+
+    assert vault.get("tokens") == {"alice": "a"}
+    assert LocalVault(file_path=str(path), master_key="cache-key").get("tokens") is None
+
+    vault.flush()
+    external = LocalVault(file_path=str(path), master_key="cache-key")
+    assert external.get("tokens") == {"alice": "a"}
+
+    external.set("external", True)
+    vault.set("pending", 1)
+    assert vault.get("external") is True
+    assert vault.get("pending") == 1
+
+    vault.close()
+    assert not list(tmp_path.glob(".*.tmp"))
+    reopened = LocalVault(file_path=str(path), master_key="cache-key")
+    assert reopened.get("pending") == 1
+    assert reopened.get("external") is True
+
+
+def test_journal_appends_replays_and_compacts(tmp_path):
+    path = tmp_path / "vault.enc"
+    journal_path = tmp_path / "vault.enc.journal"
+    vault = LocalVault(
+        file_path=str(path),
+        master_key="journal-key",
+        journal_enabled=True,
+        journal_compact_records=3,
+    )
+    snapshot_before = path.read_bytes()
+    vault.set("a", 1)
+    vault.set("b", 2)
+    vault.delete("a")
+
+    assert path.read_bytes() != snapshot_before
+    assert journal_path.read_bytes() == b""
+
+    vault.set("c", 3)
+    assert len(journal_path.read_bytes().splitlines()) == 1
+    with journal_path.open("ab") as handle:
+        handle.write(b"gAAAAAtorn-record")
+
+    recovered = LocalVault(file_path=str(path), master_key="journal-key", journal_enabled=True)
+    assert recovered.export_all() == {"b": 2, "c": 3}
+    assert len(journal_path.read_bytes().splitlines()) == 1
+
+    recovered.close()
+    assert journal_path.read_bytes() == b""
+    assert LocalVault(file_path=str(path), master_key="journal-key").get("c") == 3
+
+
+def test_sqlite_vault_migrates_and_rotates(tmp_path):
+    legacy_path = tmp_path / "secrets.enc"
+    LocalVault(file_path=str(legacy_path), master_key="master").set("refresh_sessions", {"h": 1})
+
+    vault = create_vault(backend="sqlite", file_path=str(legacy_path), master_key="master")
+    assert isinstance(vault, SQLiteVault)
+    assert vault.get("refresh_sessions") == {"h": 1}
+
+    vault.set("oauth::github::carol", {"access_token": "c"})
+    vault.delete("refresh_sessions")
+    vault.rotate_master_key("rotated")
+    vault.close()
+
+    reopened = SQLiteVault(database_path=str(tmp_path / "secrets.db"), master_key="rotated")
+    assert reopened.export_all() == {"oauth::github::carol": {"access_token": "c"}}
+    journal_mode = reopened._connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+    reopened.close()
+
+
+def test_failed_sqlite_migration_is_retried_on_next_start(tmp_path):
+    legacy_path = tmp_path / "secrets.enc"
+    LocalVault(file_path=str(legacy_path), master_key="old").set("refresh_sessions", {"h": 1})
+
+    with pytest.raises(VaultError):
+        create_vault(backend="sqlite", file_path=str(legacy_path), master_key="new")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["secrets.enc"]
+
+    vault = create_vault(
+        backend="sqlite",
+        file_path=str(legacy_path),
+        master_key="new",
+        previous_master_keys=["old"],
+    )
+    assert vault.export_all() == {"refresh_sessions": {"h": 1}}
+    vault.close()
+
+
+@pytest.mark.parametrize("backend", ["sharded", "sqlite"])
+def test_legacy_migration_replays_the_journal(tmp_path, backend):
+    legacy_path = tmp_path / "secrets.enc"
+    legacy = LocalVault(file_path=str(legacy_path), master_key="master", journal_enabled=True)
+    legacy.set("compacted", 1)
+    legacy.compact()
+    legacy.set("journaled", 2)
+    legacy.delete("compacted")
+    # Simulate a crash: the journal is never compacted into the snapshot.
+
+    vault = create_vault(backend=backend, file_path=str(legacy_path), master_key="master")
+
+    assert vault.export_all() == {"journaled": 2}
+    vault.close()
+
+
+def test_incremental_rotation_serves_reads_under_both_keys(tmp_path):
+    vault = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="old-key")
+    for index in range(5):
+        vault.set(f"key-{index}", index)
+
+    started = vault.begin_key_rotation("new-key")
+    progress = vault.rotate_step(batch_size=2)
+
+    assert started["total_records"] == 5
+    assert progress["status"] == "running"
+    assert progress["rotated_records"] == 2
+    assert [vault.get(f"key-{index}") for index in range(5)] == [0, 1, 2, 3, 4]
+    vault.set("written-mid-rotation", True)
+
+    final = asyncio.run(run_key_rotation(AsyncVault(vault), batch_size=2, pause_seconds=0))
+
+    assert final["status"] == "completed"
+    reopened = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="new-key")
+    assert reopened.get("key-4") == 4
+    assert reopened.get("written-mid-rotation") is True
+
+
+def test_rotation_after_failed_rotation_keeps_intermediate_key(tmp_path, monkeypatch):
+    vault = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="first")
+    for index in range(4):
+        vault.set(f"key-{index}", index)
+    vault.begin_key_rotation("second")
+    vault.rotate_step(batch_size=2)
+
+    def failing_rotate(self, record_ids):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(ShardedVault, "_rotate_records_unlocked", failing_rotate)
+        with pytest.raises(OSError):
+            vault.rotate_step(batch_size=2)
+    assert vault.rotation_status()["status"] == "failed"
+
+    vault.begin_key_rotation("third")
+    assert [vault.get(f"key-{index}") for index in range(4)] == [0, 1, 2, 3]
+    while vault.rotate_step(batch_size=2)["status"] == "running":
+        pass
+
+    reopened = ShardedVault(directory=str(tmp_path / "secrets.d"), master_key="third")
+    assert reopened.export_all() == {f"key-{index}": index for index in range(4)}
+
+
+def test_previous_master_keys_allow_resuming_after_restart(tmp_path):
+    vault = SQLiteVault(database_path=str(tmp_path / "secrets.db"), master_key="old-key")
+    vault.set("a", 1)
+    vault.set("b", 2)
+    vault.begin_key_rotation("new-key")
+    vault.rotate_step(batch_size=1)
+    vault.close()
+
+    restarted = SQLiteVault(
+        database_path=str(tmp_path / "secrets.db"),
+        master_key="new-key",
+        previous_master_keys=["old-key"],
+    )
+    assert restarted.export_all() == {"a": 1, "b": 2}
+    restarted.rotate_master_key("new-key")
+    restarted.close()
+    assert SQLiteVault(
+        database_path=str(tmp_path / "secrets.db"), master_key="new-key"
+    ).export_all() == {"a": 1, "b": 2}
+
+
+def test_async_vault_coalesces_concurrent_writes(tmp_path):
+    vault = LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="async-key")
+    async_vault = AsyncVault(vault)
+    calls = []
+    original_apply = vault.apply_changes
+
+    def counting_apply(updates, deletes=(), deadlines=None):
+        calls.append((dict(updates), list(deletes)))
+        original_apply(updates, deletes, deadlines)
+
+    vault.apply_changes = counting_apply
+
+    async def scenario():
+        await async_vault.aset("seed", 0)
+        await asyncio.gather(
+            *(async_vault.aset(f"key-{index}", index) for index in range(10)),
+            async_vault.adelete("seed"),
+        )
+        values = await asyncio.gather(*(async_vault.aget(f"key-{index}") for index in range(10)))
+        missing = await async_vault.aget("seed", "gone")
+        await async_vault.aclose()
+        return values, missing
+
+    values, missing = asyncio.run(scenario())
+
+    assert values == list(range(10))
+    assert missing == "gone"
+    assert len(calls) == 2
+    assert calls[1][1] == ["seed"]
+    assert LocalVault(file_path=str(tmp_path / "vault.enc"), master_key="async-key").get("key-9") == 9
+
+
+def test_transaction_reads_once_and_commits_atomically(tmp_path):
+    path = tmp_path / "vault.enc"
+    vault = LocalVault(file_path=str(path), master_key="txn-key")
+    vault.set_many({"a": 1, "b": 2})
+    decrypts = []
+    original_decrypt = vault._decrypt_json
+
+    def counting_decrypt(token, **kwargs):
+        decrypts.append(token)
+        return original_decrypt(token, **kwargs)
+
+    vault._decrypt_json = counting_decrypt
+
+    with vault.transaction() as txn:
+        assert txn.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        txn.set("c", txn.get("a") + txn.get("b"))
+        assert txn.pop("a") == 1
+        assert txn.get("a") is None
+
+    assert len(decrypts) == 1
+    assert vault.export_all() == {"b": 2, "c": 3}
+
+    with pytest.raises(RuntimeError):
+        with vault.transaction() as txn:
+            txn.set("b", 99)
+            txn.delete("c")
+            raise RuntimeError("abort")
+
+    assert LocalVault(file_path=str(path), master_key="txn-key").export_all() == {"b": 2, "c": 3}
+
+
+@pytest.mark.parametrize("backend", ["file", "sharded", "sqlite"])
+def test_ttl_entries_hidden_after_deadline_and_purged(tmp_path, monkeypatch, backend):
+    clock = [1_000_000.0]
+    monkeypatch.setattr("app.vault.time.time", lambda: clock[0])
+    file_path = str(tmp_path / "vault.enc")
+    vault = create_vault(backend=backend, file_path=file_path, master_key="ttl-key")
+    vault.set("short", "s", ttl_seconds=10)
+    vault.set_many({"long-a": 1, "long-b": 2}, ttl_seconds=100)
+    vault.set("forever", True)
+    vault.set("long-b", 3)
+
+    assert vault.next_expiry() == clock[0] + 10
+    clock[0] += 11
+    assert vault.get("short") is None
+    assert vault.get_many(["short", "long-a"]) == {"long-a": 1}
+    assert vault.purge_expired() == 1
+    vault.close()
+
+    reopened = create_vault(backend=backend, file_path=file_path, master_key="ttl-key")
+    assert reopened.next_expiry() == 1_000_100.0
+    clock[0] += 100
+    assert reopened.purge_expired() == 1
+    assert reopened.export_all() == {"forever": True, "long-b": 3}
+    assert reopened.next_expiry() is None
+    reopened.close()
+
+
+def test_expiry_sweeper_and_async_ttl(tmp_path):
+    vault = SQLiteVault(database_path=str(tmp_path / "secrets.db"), master_key="sweep-key")
+    async_vault = AsyncVault(vault)
+
+    async def scenario():
+        await async_vault.aset("oauth-state", {"s": 1}, ttl_seconds=0.05)
+        await async_vault.aset("kept", 1)
+        sweeper = asyncio.create_task(run_expiry_sweeper(async_vault, interval_seconds=5))
+        await asyncio.sleep(0.3)
+        sweeper.cancel()
+        remaining = await async_vault.run(vault.export_all)
+        await async_vault.aclose()
+        return remaining
+
+    assert asyncio.run(scenario()) == {"kept": 1}
+    rows = vault._connection().execute("SELECT key FROM vault_entries").fetchall()
+    assert rows == [("kept",)]
+    vault.close()
+
+
+@pytest.mark.parametrize("backend", ["file", "sharded", "sqlite"])
+def test_keys_lists_live_keys_by_prefix(tmp_path, backend):
+    vault = create_vault(backend=backend, file_path=str(tmp_path / "vault.enc"), master_key="k")
+    vault.set_many({"job::b": 1, "job::a": 2, "jobs": 3, "other": 4})
+    vault.set("job::gone", 5, ttl_seconds=0)
+
+    assert vault.keys("job::") == ["job::a", "job::b"]
+    assert vault.keys() == ["job::a", "job::b", "jobs", "other"]
+    vault.close()
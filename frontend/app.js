@@ -68,8 +68,14 @@
     state.error = null;
     render();
     try {
-      var data = await ensureApi().get("/api/repos");
+      // Large orgs arrive a page at a time; render each page as it lands.
+      var data = await ensureApi().get("/api/repos?limit=100");
       state.repos = data.repos || [];
+      while (data.next_cursor) {
+        render();
+        data = await ensureApi().get("/api/repos?cursor=" + encodeURIComponent(data.next_cursor));
+        state.repos = state.repos.concat(data.repos || []);
+      }
     } catch (e) {
       state.error = "Failed to load repositories: " + e.message;
       state.repos = [];
@@ -134,29 +140,54 @@
         pull_number: pullNumber,
       });
       state.aiJobId = data.job && data.job.id;
-      if (state.aiJobId) pollAIJob(state.aiJobId);
+      if (state.aiJobId) watchAIJob(state.aiJobId);
     } catch (e) {
       toast("AI review failed: " + e.message, "error");
     }
   }
 
+  // Returns true once the job reached a final state.
+  function handleAIJobUpdate(job) {
+    if (job.status === "completed") {
+      state.aiReview = job.result;
+      state.aiJobId = null;
+      toast("AI review complete!", "success");
+      render();
+      return true;
+    }
+    if (job.status === "failed") {
+      state.aiJobId = null;
+      toast("AI review failed: " + (job.error || job.last_error || "unknown"), "error");
+      render();
+      return true;
+    }
+    return false;
+  }
+
+  // Follows the job over server-sent events; falls back to polling when the
+  // runtime has no stream support or the stream ends early.
+  function watchAIJob(jobId) {
+    var client = ensureApi();
+    if (typeof client.streamEvents !== "function") {
+      pollAIJob(jobId);
+      return;
+    }
+    var finished = false;
+    client.streamEvents("/api/jobs/" + encodeURIComponent(jobId) + "/events", function (event) {
+      if (finished || event.event !== "job" || !event.data) return;
+      finished = handleAIJobUpdate(event.data);
+    }).catch(function () {
+      return null;
+    }).then(function () {
+      if (!finished) pollAIJob(jobId);
+    });
+  }
+
   function pollAIJob(jobId) {
     var interval = setInterval(async function () {
       try {
         var data = await ensureApi().get("/api/jobs/" + jobId);
-        var job = data.job;
-        if (job.status === "completed") {
-          clearInterval(interval);
-          state.aiReview = job.result;
-          state.aiJobId = null;
-          toast("AI review complete!", "success");
-          render();
-        } else if (job.status === "failed") {
-          clearInterval(interval);
-          state.aiJobId = null;
-          toast("AI review failed: " + (job.error || "unknown"), "error");
-          render();
-        }
+        if (handleAIJobUpdate(data.job)) clearInterval(interval);
       } catch (e) {
         clearInterval(interval);
         state.aiJobId = null;
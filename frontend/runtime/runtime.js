@@ -502,6 +502,27 @@
     }
   }
 
+  function parseSseFrame(frame) {
+    var event = { event: "message", id: null, data: null };
+    var dataLines = [];
+    frame.split("\n").forEach(function (line) {
+      if (!line || line.charAt(0) === ":") return;
+      var separator = line.indexOf(":");
+      var field = separator === -1 ? line : line.slice(0, separator);
+      var value = separator === -1 ? "" : line.slice(separator + 1).replace(/^ /, "");
+      if (field === "event") event.event = value;
+      if (field === "id") event.id = value;
+      if (field === "data") dataLines.push(value);
+    });
+    if (!dataLines.length) return null;
+    try {
+      event.data = JSON.parse(dataLines.join("\n"));
+    } catch (error) {
+      event.data = dataLines.join("\n");
+    }
+    return event;
+  }
+
   class HttpApiClient {
     constructor(baseUrl) {
       this._baseUrl = String(baseUrl || "").replace(/\/$/, "");
@@ -542,6 +563,35 @@
       }
       return response.json();
     }
+
+    // Reads a server-sent event stream through fetch (unlike EventSource, this
+    // goes through the same request path as get/post). Resolves when the
+    // server closes the stream.
+    async streamEvents(path, onEvent, options) {
+      var url = this._normalizePath(path);
+      var response = await global.fetch(url, {
+        headers: { Accept: "text/event-stream" },
+        signal: options && options.signal
+      });
+      if (!response.ok || !response.body || typeof global.TextDecoder !== "function") {
+        throw new Error("Event stream unavailable (HTTP " + response.status + ").");
+      }
+      var reader = response.body.getReader();
+      var decoder = new global.TextDecoder();
+      var buffer = "";
+      while (true) {
+        var chunk = await reader.read();
+        if (chunk.done) break;
+        buffer += decoder.decode(chunk.value, { stream: true }).replace(/\r\n/g, "\n");
+        var boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          var event = parseSseFrame(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+          if (event) onEvent(event);
+          boundary = buffer.indexOf("\n\n");
+        }
+      }
+    }
   }
 
   class MockApiClient {